@@ -0,0 +1,235 @@
+# api.py
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, json, jsonify, request
+
+from characters import CHARACTERS_BY_NAME
+from eta_simulation import PERCENTILES, simulate_from_rollups
+from snapshot import REFRESHER, SNAPSHOTS, Snapshot
+from storage import STORAGE, slice_dates
+from xp_calculator import cumulative_exp_closed
+
+# API somente leitura para bots e overlays: lê o snapshot atual (nunca a
+# planilha) e responde 304 quando o snapshot não mudou desde a última consulta
+api = Blueprint("api", __name__, url_prefix="/api")
+
+MAX_TARGET_LEVEL = 5000
+
+
+def _jsonable(value: Any) -> Any:
+    """Converte tipos do numpy/pandas para tipos nativos do JSON."""
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _error(status: int, message: str) -> Response:
+    response = jsonify(error=message)
+    response.status_code = status
+    return response
+
+
+def _current_snapshot() -> Snapshot:
+    name = request.args.get("character")
+    if name and name not in CHARACTERS_BY_NAME:
+        raise LookupError(f"Personagem desconhecido: {name}")
+    snapshot = SNAPSHOTS.latest(name)
+    if snapshot is None:
+        raise RuntimeError("Dados ainda não carregados")
+    return snapshot
+
+
+def _is_stale(snapshot: Snapshot) -> bool:
+    """Dados de leitura salva ou de antes de uma atualização que falhou."""
+    return snapshot.stale or REFRESHER.last_error(snapshot.character.name) is not None
+
+
+def _conditional(snapshot: Snapshot, variant: str, build: Callable[[], Dict[str, Any]]) -> Response:
+    """
+    Resposta com ETag (chave do snapshot + variante) e Last-Modified (criação
+    do snapshot). Se o cliente já tem essa versão, devolve 304 sem montar o corpo.
+    """
+    response = Response(mimetype="application/json")
+    response.set_etag(hashlib.sha1(f"{snapshot.key}:{variant}:{_is_stale(snapshot)}".encode()).hexdigest())
+    response.last_modified = snapshot.created_at.astimezone(timezone.utc).replace(microsecond=0)
+    response.cache_control.no_cache = True
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    response.set_data(json.dumps(_jsonable(build())))
+    return response
+
+
+def _snapshot_info(snapshot: Snapshot) -> Dict[str, Any]:
+    return {
+        "character": snapshot.character.name,
+        "snapshot_created_at": snapshot.created_at,
+        "rows": len(snapshot.df),
+        "stale": _is_stale(snapshot),
+    }
+
+
+@api.errorhandler(LookupError)
+def _not_found(e):
+    return _error(404, str(e))
+
+
+@api.errorhandler(RuntimeError)
+def _unavailable(e):
+    return _error(503, str(e))
+
+
+@api.route("/metrics")
+def metrics():
+    snapshot = _current_snapshot()
+    m = snapshot.metrics
+
+    def build():
+        return {
+            **_snapshot_info(snapshot),
+            "level_real": m["level_real"],
+            "level_target": m["level_target"],
+            "xp_consolidada": m["xp_consolidada"],
+            "xp_objetivo": m["xp_objetivo"],
+            "xp_faltante": m["xp_faltante"],
+            "media_geral": m["media_geral"],
+            "media_recente": m["media_recente"],
+            "xp_meta_diaria": m["xp_meta_diaria"],
+            "eta": {"p10": m["eta_p10"], "p50": m["eta_p50"], "p90": m["eta_p90"]},
+            "streak_count": m["streak_count"],
+            "current_streak_baixo": m["current_streak_baixo"],
+            "melhor_dia": {"xp": m["melhor_dia_xp"], "data": m["melhor_dia_data"]},
+            "tendencia": m["tendencia_status"],
+            "desvio_padrao": m["desvio_padrao"],
+            "score_consistencia": m["score_consistencia"],
+            "ritmo": m["ritmo"],
+        }
+
+    return _conditional(snapshot, "metrics", build)
+
+
+@api.route("/milestones")
+def milestones():
+    snapshot = _current_snapshot()
+    index = snapshot.metrics["milestone_index"]
+
+    def build():
+        return {
+            **_snapshot_info(snapshot),
+            "milestones": [
+                {"level": level, "date": date, "reached": reached}
+                for level, date, reached in index.history()
+            ],
+        }
+
+    return _conditional(snapshot, "milestones", build)
+
+
+# Máximo acumulado da XP por snapshot (monotônico mesmo com mortes): a data
+# em que um nível já atingido foi alcançado sai de um searchsorted
+_running_max: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_running_max_lock = threading.Lock()
+
+
+def _reached_on(snapshot: Snapshot, xp_target: float) -> Optional[pd.Timestamp]:
+    with _running_max_lock:
+        running = _running_max.get(snapshot.key)
+    if running is None:
+        exp = np.nan_to_num(snapshot.df["Experience"].to_numpy(dtype=np.float64, na_value=np.nan), nan=-np.inf)
+        running = np.maximum.accumulate(exp)
+        with _running_max_lock:
+            _running_max[snapshot.key] = running
+            while len(_running_max) > 8:
+                _running_max.popitem(last=False)
+    position = int(np.searchsorted(running, xp_target, side="left"))
+    return snapshot.df["create_at"].iloc[position] if position < len(running) else None
+
+
+@api.route("/eta")
+def eta():
+    snapshot = _current_snapshot()
+    m = snapshot.metrics
+    raw_target = request.args.get("target")
+    target = int(raw_target) if raw_target and raw_target.isdigit() else (None if raw_target else snapshot.level_target)
+    if target is None or not 1 <= target <= MAX_TARGET_LEVEL:
+        return _error(400, f"target deve ser um nível entre 1 e {MAX_TARGET_LEVEL}")
+
+    def build():
+        xp_target = cumulative_exp_closed(target)
+        xp_faltante = max(0.0, xp_target - float(m["xp_consolidada"]))
+        result = {**_snapshot_info(snapshot), "target": target, "xp_target": xp_target, "xp_faltante": xp_faltante}
+        if xp_faltante <= 0:
+            return {**result, "reached": True, "reached_on": _reached_on(snapshot, xp_target)}
+
+        # Estimativa pela média recente, como no dashboard, e faixa do Monte Carlo
+        media_recente = m["media_recente"]
+        dias = max(1, int(xp_faltante / media_recente)) if media_recente > 0 else None
+        sim = simulate_from_rollups(m["rollups"], xp_faltante, xp_start=m["xp_consolidada"])
+        return {
+            **result,
+            "reached": False,
+            "media_recente": media_recente,
+            "dias_media_recente": dias,
+            "eta_media_recente": date.today() + timedelta(days=min(dias, 18250)) if dias else None,
+            "eta": None if sim is None else {
+                f"p{p}": {"date": sim.date_for(p), "days": sim.days[i]} for i, p in enumerate(PERCENTILES)
+            },
+            "prob_within_horizon": None if sim is None else sim.prob_within_horizon,
+        }
+
+    # As datas previstas partem de hoje: a resposta muda também na virada do dia
+    return _conditional(snapshot, f"eta:{target}:{date.today()}", build)
+
+
+@api.route("/history")
+def history():
+    """
+    Leituras de XP do personagem. `days` (últimos N dias) ou `start`/`end`
+    (AAAA-MM-DD, inclusive) filtram no armazenamento local, sem baixar o
+    histórico inteiro.
+    """
+    snapshot = _current_snapshot()
+    try:
+        start = date.fromisoformat(request.args["start"]) if request.args.get("start") else None
+        end = date.fromisoformat(request.args["end"]) if request.args.get("end") else None
+    except ValueError:
+        return _error(400, "start e end devem estar no formato AAAA-MM-DD")
+    raw_days = request.args.get("days")
+    if raw_days:
+        if not raw_days.isdigit() or int(raw_days) < 1:
+            return _error(400, "days deve ser um inteiro positivo")
+        start = date.today() - timedelta(days=int(raw_days) - 1)
+
+    def build():
+        df = STORAGE.query(snapshot.character, start, end)
+        if df is None:
+            # Nada armazenado localmente (ex.: SNAPSHOT_DIR vazio): recorta o snapshot em memória
+            df = slice_dates(snapshot.df, start, end)
+        return {
+            **_snapshot_info(snapshot),
+            "backend": STORAGE.name,
+            "start": start,
+            "end": end,
+            "history": [
+                {"date": d, "experience": xp, "daily_exp": daily}
+                for d, xp, daily in zip(df["create_at"], df["Experience"], df["daily_exp"])
+            ],
+        }
+
+    return _conditional(snapshot, f"history:{start}:{end}", build)
@@ -1,20 +1,32 @@
 # app.py
 import os
+import json
 import logging
-from flask import jsonify
+import hashlib
+from flask import jsonify, request, Response
+from flask_compress import Compress
+from plotly.utils import PlotlyJSONEncoder
 
 import dash
-from dash import html, dcc, callback, Output, Input
+from dash import html, dcc, callback, clientside_callback, ClientsideFunction, Output, Input, State, no_update
 import dash_bootstrap_components as dbc
 
-from data_loader import load_sheet_data
-from metrics import calculate_all_metrics
+from api import api
+from figure_cache import FIGURE_CACHE
+from snapshot import REFRESHER, SSE_STREAMS, get_snapshot, snapshot_age, snapshot_event, snapshot_events
+from downsampling import parse_x_range
+from instrumentation import (
+    REGISTRY, PROMETHEUS_CONTENT_TYPE, ERRORS, CALLBACK_BYTES, Counter, Gauge,
+    begin_trace, end_trace, mark_rendered, stage
+)
+from characters import CHARACTERS, get_character
 from figures import (
     create_roadmap_figure,
     create_moving_avg_figure,
     create_heatmap_figure,
     create_weekday_bar_figure,
     create_eta_scenarios_figure,
+    create_eta_fan_figure,
     create_adherence_figure,
     create_delivery_curve_figure,
     # --- NOVOS GRÁFICOS ---
@@ -29,7 +41,9 @@ from layout import (
     create_advanced_metrics,
     create_milestone_list,
     create_health_effort_row,
-    create_curves_row
+    create_curves_row,
+    create_panel_slot,
+    create_date_range_selector
 )
 
 # Configuração de logging
@@ -37,142 +51,421 @@ logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger("tibiatracker")
 
 # Inicialização do app Dash
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG])
+# Os gráficos com zoom são criados pelos callbacks dos painéis, fora do layout inicial
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG], suppress_callback_exceptions=True)
 server = app.server
 
+
+# Bytes enviados de cada resposta de callback, já comprimida (este hook roda
+# depois do Compress; o tamanho antes da compressão é contado em _end_callback_trace)
+@server.after_request
+def _count_sent_bytes(response):
+    if request.path.endswith("/_dash-update-component") and not response.direct_passthrough:
+        CALLBACK_BYTES.inc(response.content_length or 0, stage="sent")
+    return response
+
+
+# Compressão das respostas (layout, callbacks e assets): brotli, com gzip para
+# navegadores que não o aceitam
+server.config["COMPRESS_ALGORITHM"] = os.getenv("COMPRESS_ALGORITHM", "br,gzip")
+server.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+Compress(server)
+
+# Atualização dos dados em segundo plano (fora do caminho das requisições)
+REFRESHER.start()
+REFRESH_FALLBACK_MINUTES = float(os.getenv("REFRESH_FALLBACK_MINUTES", "60"))
+# Intervalo de consulta das abas que ficaram sem SSE (limite de streams atingido)
+REFRESH_POLL_MINUTES = float(os.getenv("REFRESH_POLL_MINUTES", "15"))
+
 # Health check para Render
 @server.route("/health")
 def health():
-    return jsonify(status="ok")
+    return jsonify(status="ok", snapshot=REFRESHER.status(), figure_cache=FIGURE_CACHE.stats())
+
+
+# Métricas no formato do Prometheus
+REGISTRY.register(Gauge(
+    "tibiatracker_figure_cache", "Estatísticas do cache de figuras", ["stat"],
+    callback=lambda: {(k,): v for k, v in FIGURE_CACHE.stats().items() if v is not None}
+))
+REGISTRY.register(Gauge(
+    "tibiatracker_snapshot_age_seconds", "Idade do snapshot atual de cada personagem", ["character"],
+    callback=lambda: {(s.character.name,): snapshot_age(s) for s in REFRESHER.registry.current()}
+))
+REGISTRY.register(Gauge(
+    "tibiatracker_sse_streams", "Streams SSE abertos neste processo e o limite", ["stat"],
+    callback=lambda: {("open",): SSE_STREAMS.open, ("limit",): SSE_STREAMS.limit}
+))
+SSE_REJECTED = REGISTRY.register(Counter(
+    "tibiatracker_sse_rejected_total", "Conexões SSE recusadas por falta de vaga (a aba passa a consultar)"
+))
+
+
+# API JSON somente leitura (métricas, marcos e ETA), com GET condicional
+server.register_blueprint(api)
+
+
+# Avisos de snapshot publicado (server-sent events): abas abertas e ociosas só
+# mantêm a conexão, sem consultar o servidor. Cada stream prende uma thread do
+# worker; acima de SSE_MAX_STREAMS a aba recebe 503 e volta ao intervalo
+@server.route("/events")
+def events():
+    if not SSE_STREAMS.acquire():
+        SSE_REJECTED.inc()
+        return Response("Limite de conexões SSE atingido", status=503, headers={"Retry-After": "300"})
+    response = Response(
+        snapshot_events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Chamado quando o gunicorn fecha a resposta (inclusive com a aba já fechada)
+    response.call_on_close(SSE_STREAMS.release)
+    return response
+
+
+@server.route("/metrics")
+def prometheus_metrics():
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# Trace por requisição dos callbacks (etapas e serialização do layout)
+@server.before_request
+def _begin_callback_trace():
+    if request.path.endswith("/_dash-update-component"):
+        begin_trace("Callback")
+
+
+@server.after_request
+def _end_callback_trace(response):
+    if request.path.endswith("/_dash-update-component"):
+        end_trace()
+        if not response.direct_passthrough:
+            CALLBACK_BYTES.inc(response.content_length or 0, stage="raw")
+    return response
 
-# Layout base com intervalo de atualização
+
+def _card(header: str, panel: str, lazy: bool = True, **card_kwargs) -> dbc.Card:
+    return dbc.Card([dbc.CardHeader(header), dbc.CardBody(create_panel_slot(panel, lazy=lazy))], **card_kwargs)
+
+
+# Layout base: estrutura estática; cada painel é preenchido pelo seu callback
 app.layout = dbc.Container([
-    dcc.Interval(id="refresh-interval", interval=15 * 60 * 1000, n_intervals=0),  # 15 minutos
-    html.Div(id="content")
+    # Atualizações chegam por SSE (/events); o intervalo é só uma garantia para
+    # conexões que caíram sem o navegador perceber, ou a consulta periódica
+    # quando o servidor recusa o stream (sse-status "closed")
+    dcc.Interval(id="refresh-interval", interval=REFRESH_FALLBACK_MINUTES * 60 * 1000, n_intervals=0),
+    dcc.Store(id="sse-status"),
+    dcc.Store(id="refresh-config", data={
+        "push_ms": REFRESH_FALLBACK_MINUTES * 60 * 1000, "poll_ms": REFRESH_POLL_MINUTES * 60 * 1000
+    }),
+    dcc.Interval(id="age-interval", interval=60 * 1000, n_intervals=0),  # só no navegador
+    dcc.Store(id="snapshot-store"),
+    dcc.Store(id="snapshot-event"),
+    dcc.Store(id="snapshot-signal"),
+    dcc.Store(id="snapshot-checked"),
+    html.Div(id="load-error"),
+
+    html.H1(CHARACTERS[0].display_title, id="dashboard-title", className="text-center mt-4 mb-1 text-warning"),
+    dbc.Row(dbc.Col(dcc.Dropdown(
+        id="character-select",
+        options=[{"label": c.name, "value": c.name} for c in CHARACTERS],
+        value=CHARACTERS[0].name,
+        clearable=False,
+        className="text-dark"
+    ), xs=12, md=4), justify="center", className="mb-2", style=None if len(CHARACTERS) > 1 else {"display": "none"}),
+    html.Div(id="snapshot-age", className="text-center text-muted mb-4"),
+
+    # Indicadores principais
+    create_panel_slot("indicators"),
+
+    # Filtro de período (no navegador) e agregados do período
+    create_date_range_selector(),
+
+    # Roadmap + Progresso com Marcos
+    dbc.Row([dbc.Col(_card("ROADMAP DE PROGRESSO", "roadmap", lazy=False))], className="mb-4"),
+
+    dbc.Row([
+        dbc.Col(_card("Intensidade de Hunts (Heatmap Semanal)", "heatmap")),
+    ], className="mb-4"),
+
+    # XP Diário + Eficiência
+    dbc.Row([
+        dbc.Col(_card("XP DIÁRIO + MÉDIAS MÓVEIS", "moving"), width=12, md=7),
+        dbc.Col(_card("Eficiência Diária (% da Meta)", "efficiency"), width=12, md=5),
+    ], className="mb-4"),
+
+    # Calendário + Distribuição
+    dbc.Row([
+        # dbc.Col(_card("Calendário de Atividade", "calendar"), width=12, md=7),
+        dbc.Col(_card("Distribuição de XP Diária", "distribution"), width=12, md=12),
+    ], className="mb-4"),
+
+    # Tendência + Heatmap
+    dbc.Row([
+        dbc.Col(_card("Tendência de Desempenho", "trend"), width=12, md=6),
+        dbc.Col(_card("Progresso com Marcos-Chave", "timeline"), width=12, md=6),
+    ], className="mb-4"),
+
+    # Curvas + Dia da Semana
+    create_panel_slot("curves", lazy=True),
+    _card("Média XP por Dia da Semana", "weekday", className="mb-4"),
+
+    # Cenários ETA + Saúde/Esfôrço
+    dbc.Row(dbc.Col(_card("ANÁLISE DE CENÁRIOS (ETA)", "eta"), width=12), className="mb-4"),
+    create_panel_slot("health", lazy=True),
+
+    # Histórico de Marcos
+    _card("HISTÓRICO DE MARCOS ATINGIDOS", "milestones", className="mb-4")
 ], fluid=True)
 
 
-@callback(Output("content", "children"), Input("refresh-interval", "n_intervals"))
-def render_dashboard(_):
-    try:
-        # Carregar e processar dados
-        df = load_sheet_data()
-        metrics = calculate_all_metrics(df, level_target=1000)
-        enriched_df = metrics["df_enriched"]
+@callback(
+    Output("snapshot-store", "data"),
+    Output("load-error", "children"),
+    Output("snapshot-checked", "data"),
+    Output("dashboard-title", "children"),
+    Input("refresh-interval", "n_intervals"),
+    Input("snapshot-signal", "data"),
+    Input("character-select", "value"),
+    State("snapshot-store", "data")
+)
+def load_snapshot(_, __, character_name, current):
+    """
+    Publica no navegador só a chave do snapshot atual, mantido pelo REFRESHER.
+    Chamado na carga, na troca de personagem e quando o SSE avisa de uma chave
+    nova; se a chave não mudou, os painéis não são renderizados de novo.
+    """
+    character = get_character(character_name)
+    snapshot = REFRESHER.wait_for_first(timeout=60, character=character.name)
+    alert = None
+    error = REFRESHER.last_error(character.name)
+    if error and snapshot is not None:
+        # Falha na leitura: o dashboard continua com os últimos dados válidos
+        origem = "a última leitura salva" if snapshot.stale else f"os dados de {snapshot.created_at:%d/%m %H:%M}"
+        alert = dbc.Alert(
+            f"⚠️ Exibindo {origem}; a atualização falhou: {error}",
+            color="warning", className="mt-3 text-center"
+        )
+    elif error:
+        alert = dbc.Alert(f"⚠️ Erro ao carregar os dados: {error}", color="danger", className="mt-5 text-center")
+    if snapshot is None:
+        return no_update, alert, None, character.display_title
+    age = snapshot_event(snapshot)["created_at_ms"]
+    if current and current.get("key") == snapshot.key and current.get("character") == character.name:
+        return no_update, alert, age, no_update
+    store = {"key": snapshot.key, "character": character.name, "created_at": snapshot.created_at.isoformat()}
+    return store, alert, age, character.display_title
+
+
+clientside_callback(
+    ClientsideFunction(namespace="snapshot_events", function_name="onEvent"),
+    Output("snapshot-signal", "data"),
+    Output("snapshot-checked", "data", allow_duplicate=True),
+    Input("snapshot-event", "data"),
+    State("snapshot-store", "data"),
+    State("character-select", "value"),
+    prevent_initial_call=True
+)
 
-        # === Layout: Indicadores ===
-        top_row = create_top_indicators(
+clientside_callback(
+    ClientsideFunction(namespace="snapshot_events", function_name="refreshInterval"),
+    Output("refresh-interval", "interval"),
+    Input("sse-status", "data"),
+    State("refresh-config", "data"),
+    prevent_initial_call=True
+)
+
+clientside_callback(
+    ClientsideFunction(namespace="snapshot_events", function_name="formatAge"),
+    Output("snapshot-age", "children"),
+    Input("age-interval", "n_intervals"),
+    Input("snapshot-checked", "data")
+)
+
+
+def _render_indicators(metrics, enriched_df):
+    return [
+        create_top_indicators(
             level_real=metrics["level_real"],
             eta_str=metrics["eta_str"],
             streak_count=metrics["streak_count"],
             melhor_dia_xp=metrics["melhor_dia_xp"],
             melhor_dia_data=metrics["melhor_dia_data"],
             tendencia_status=metrics["tendencia_status"],
-            cor_tendencia=metrics["cor_tendencia"]
-        )
-
-        metrics_row = create_advanced_metrics(
+            cor_tendencia=metrics["cor_tendencia"],
+            eta_faixa=f"P10 {metrics['eta_p10']} · P90 {metrics['eta_p90']}" if metrics["eta_simulation"] else None
+        ),
+        create_advanced_metrics(
             desvio_padrao=metrics["desvio_padrao"],
             media_recente=metrics["media_recente"],
             score_consistencia=metrics["score_consistencia"],
             streak_baixo_texto=metrics["streak_baixo_texto"],
-            cor_streak_baixo=metrics["cor_streak_baixo"]
+            cor_streak_baixo=metrics["cor_streak_baixo"],
+            ritmo=" · ".join(f"{janela} {r['media'] / 1e6:.1f}M" for janela, r in metrics["ritmo"].items())
         )
+    ]
 
-        # === Gráficos principais ===
-        fig_roadmap = create_roadmap_figure(metrics["level_real"])
-        fig_moving = create_moving_avg_figure(enriched_df)
-        fig_heatmap = create_heatmap_figure(enriched_df)
-        fig_weekday = create_weekday_bar_figure(enriched_df)
-        fig_eta = create_eta_scenarios_figure(
-            metrics["xp_faltante"],
-            metrics["media_geral"],
-            metrics["media_recente"],
-            metrics["melhor_dia_xp"]
-        )
-        fig_adherence = create_adherence_figure(enriched_df, metrics["xp_meta_diaria"])
-        fig_delivery = create_delivery_curve_figure(enriched_df)
-
-        # === NOVOS GRÁFICOS PROFISSIONAIS ===
-        fig_timeline = create_progress_timeline(enriched_df)
-        fig_efficiency = create_daily_efficiency(enriched_df, metrics["xp_meta_diaria"])
-        fig_calendar = create_activity_calendar(enriched_df)
-        fig_trend = create_performance_trend(enriched_df)
-        fig_distribution = create_xp_distribution(enriched_df)
-
-        # === Componentes compostos ===
-        milestone_list = create_milestone_list(metrics["historico_milestones"])
-        health_effort_row = create_health_effort_row(
-            metrics["texto_delta"],
-            metrics["cor_delta"],
-            metrics["xp_faltante"],
-            metrics["melhor_dia_xp"]
-        )
-        curves_row = create_curves_row(fig_adherence, fig_delivery)
-
-        # === Montagem final do layout ===
-        return dbc.Container([
-            html.H1("PROJETO ELDER DRUID 1000", className="text-center my-4 text-warning"),
-
-            # Indicadores principais
-            top_row,
-            metrics_row,
-
-            # Roadmap + Progresso com Marcos
-            dbc.Row([
-                dbc.Col(dbc.Card([dbc.CardHeader("ROADMAP DE PROGRESSO"), dbc.CardBody(dcc.Graph(figure=fig_roadmap, config={'displayModeBar': False}))]))],
-            className="mb-4"),
-
-            dbc.Row([
-                dbc.Col(dbc.Card([dbc.CardHeader("Intensidade de Hunts (Heatmap Semanal)"), dbc.CardBody(dcc.Graph(figure=fig_heatmap))])),
-            ], className="mb-4"),
-
-            # XP Diário + Eficiência
-            dbc.Row([
-                dbc.Col(dbc.Card([dbc.CardHeader("XP DIÁRIO + MÉDIAS MÓVEIS"), dbc.CardBody(dcc.Graph(figure=fig_moving))]), width=12, md=7),
-                dbc.Col(dbc.Card([dbc.CardHeader("Eficiência Diária (% da Meta)"), dbc.CardBody(dcc.Graph(figure=fig_efficiency))]), width=12, md=5),
-            ], className="mb-4"),
-
-            # Calendário + Distribuição
-            dbc.Row([
-                # dbc.Col(dbc.Card([dbc.CardHeader("Calendário de Atividade"), dbc.CardBody(dcc.Graph(figure=fig_calendar))]), width=12, md=7),
-                dbc.Col(dbc.Card([dbc.CardHeader("Distribuição de XP Diária"), dbc.CardBody(dcc.Graph(figure=fig_distribution))]), width=12, md=12),
-            ], className="mb-4"),
-
-            # Tendência + Heatmap
-            dbc.Row([
-                dbc.Col(dbc.Card([dbc.CardHeader("Tendência de Desempenho"), dbc.CardBody(dcc.Graph(figure=fig_trend))]), width=12, md=6),
-                dbc.Col(dbc.Card([dbc.CardHeader("Progresso com Marcos-Chave"), dbc.CardBody(dcc.Graph(figure=fig_timeline))]), width=12, md=6),
-            ], className="mb-4"),
-
-            # Curvas + Dia da Semana
-            curves_row,
-            dbc.Card([dbc.CardHeader("Média XP por Dia da Semana"), dbc.CardBody(dcc.Graph(figure=fig_weekday))], className="mb-4"),
-
-            # Cenários ETA + Saúde/Esfôrço
-            dbc.Row(
-                dbc.Col(
-                    dbc.Card([
-                        dbc.CardHeader("ANÁLISE DE CENÁRIOS (ETA)"),
-                        dbc.CardBody(dcc.Graph(figure=fig_eta))
-                    ]),
-                    width=12
-                ),
-                className="mb-4"
-            ),
-            health_effort_row,
-
-            # Histórico de Marcos
-            dbc.Card([dbc.CardHeader("HISTÓRICO DE MARCOS ATINGIDOS"), dbc.CardBody(milestone_list)], className="mb-4")
-        ], fluid=True)
-
-    except Exception as e:
-        logger.exception("Erro ao renderizar o dashboard")
-        return dbc.Container([
-            dbc.Alert(f"⚠️ Erro ao carregar os dados: {str(e)}", color="danger", className="mt-5 text-center")
-        ], fluid=True)
+
+def _graph(builder, *args, **graph_kwargs):
+    """dcc.Graph com a figura vinda do cache por fingerprint."""
+    return dcc.Graph(figure=FIGURE_CACHE.figure(builder, *args), **graph_kwargs)
+
+
+# Cada painel: função (métricas, df enriquecido) -> componentes
+PANELS = {
+    "indicators": _render_indicators,
+    "roadmap": lambda m, df: _graph(create_roadmap_figure, m["level_real"], m["level_target"], config={'displayModeBar': False}),
+    "heatmap": lambda m, df: _graph(create_heatmap_figure, df, m["rollups"]),
+    "moving": lambda m, df: _graph(create_moving_avg_figure, df, m["rolling_stats"], id="graph-moving"),
+    "efficiency": lambda m, df: _graph(create_daily_efficiency, df, m["xp_meta_diaria"], id="graph-efficiency"),
+    # "calendar": lambda m, df: _graph(create_activity_calendar, df, m["rollups"]),
+    "distribution": lambda m, df: _graph(create_xp_distribution, df),
+    "trend": lambda m, df: _graph(create_performance_trend, df),
+    "timeline": lambda m, df: _graph(create_progress_timeline, df, m["milestone_index"], id="graph-timeline"),
+    "curves": lambda m, df: create_curves_row(
+        FIGURE_CACHE.figure(create_adherence_figure, df, m["xp_meta_diaria"]),
+        FIGURE_CACHE.figure(create_delivery_curve_figure, df)
+    ),
+    "weekday": lambda m, df: _graph(create_weekday_bar_figure, df, m["rollups"]),
+    "eta": lambda m, df: dbc.Row([
+        dbc.Col(_graph(
+            create_eta_scenarios_figure,
+            m["xp_faltante"],
+            m["media_geral"],
+            m["media_recente"],
+            m["melhor_dia_xp"]
+        ), width=12, md=5),
+        dbc.Col(_graph(create_eta_fan_figure, m["eta_simulation"]), width=12, md=7),
+    ]),
+    "health": lambda m, df: create_health_effort_row(
+        m["texto_delta"],
+        m["cor_delta"],
+        m["xp_faltante"],
+        m["melhor_dia_xp"]
+    ),
+    "milestones": lambda m, df: create_milestone_list(m["historico_milestones"]),
+}
+
+
+def _digest(children) -> str:
+    return hashlib.blake2b(json.dumps(children, cls=PlotlyJSONEncoder).encode(), digest_size=16).hexdigest()
+
+
+def _register_panel(name, render):
+    @callback(
+        Output(f"panel-{name}", "children"),
+        Output(f"rendered-{name}", "data"),
+        Input("snapshot-store", "data"),
+        Input(f"visible-{name}", "data"),
+        State(f"rendered-{name}", "data"),
+        prevent_initial_call=True
+    )
+    def render_panel(store, visible, rendered):
+        if not store or not visible:
+            return no_update, no_update
+        try:
+            snapshot = get_snapshot(store["key"], store.get("character"))
+            metrics = snapshot.metrics
+            with stage(f"panel.{name}"):
+                children = render(metrics, metrics["df_enriched"])
+            # Snapshot novo, mas painel idêntico ao que o navegador já mostra: nada a enviar
+            digest = _digest(children)
+            mark_rendered(f"Painel {name}")
+            if digest == rendered:
+                return no_update, no_update
+            return children, digest
+        except Exception as e:
+            ERRORS.inc(source="panel")
+            logger.exception(f"Erro ao renderizar o painel {name}")
+            return dbc.Alert(f"⚠️ Erro ao renderizar o painel: {str(e)}", color="danger"), None
+
+    render_panel.__name__ = f"render_{name}"
+    return render_panel
+
+
+for _name, _render in PANELS.items():
+    _register_panel(_name, _render)
+
+
+# Séries temporais reduzidas (downsampling): ao dar zoom, a figura é refeita
+# só com o intervalo visível, em resolução maior
+ZOOMABLE = {
+    "moving": lambda m, df, x_range: create_moving_avg_figure(df, m["rolling_stats"], x_range=x_range),
+    "efficiency": lambda m, df, x_range: create_daily_efficiency(df, m["xp_meta_diaria"], x_range=x_range),
+    "timeline": lambda m, df, x_range: create_progress_timeline(df, m["milestone_index"], x_range=x_range),
+    "adherence": lambda m, df, x_range: create_adherence_figure(df, m["xp_meta_diaria"], x_range=x_range),
+    "delivery": lambda m, df, x_range: create_delivery_curve_figure(df, x_range=x_range),
+}
+
+
+def _register_zoom(name, build):
+    @callback(
+        Output(f"graph-{name}", "figure"),
+        Input(f"graph-{name}", "relayoutData"),
+        State("snapshot-store", "data"),
+        prevent_initial_call=True
+    )
+    def zoom_graph(relayout, store):
+        if not store or not relayout or not any(k.startswith("xaxis.") for k in relayout):
+            return no_update
+        snapshot = get_snapshot(store["key"], store.get("character"))
+        metrics = snapshot.metrics
+        # Autoscale (x_range None) volta à série completa, reduzida
+        with stage(f"zoom.{name}"):
+            fig = build(metrics, metrics["df_enriched"], parse_x_range(relayout))
+        mark_rendered(f"Zoom {name}")
+        return fig
+
+    zoom_graph.__name__ = f"zoom_{name}"
+    return zoom_graph
+
+
+for _name, _build in ZOOMABLE.items():
+    _register_zoom(_name, _build)
+
+
+# Filtro de período: a série diária vai uma vez por snapshot para o navegador,
+# que filtra eixos e agregados localmente (assets/date_range.js)
+@callback(
+    Output("series-store", "data"),
+    Input("snapshot-store", "data"),
+    prevent_initial_call=True
+)
+def load_series(store):
+    if not store:
+        return no_update
+    metrics = get_snapshot(store["key"], store.get("character")).metrics
+    daily = metrics["rollups"].daily["sum"]
+    return {
+        "dates": daily.index.strftime("%Y-%m-%d").tolist(),
+        "xp": daily.round().astype("int64").tolist(),
+        "xp_faltante": float(metrics["xp_faltante"]),
+    }
+
+
+clientside_callback(
+    ClientsideFunction(namespace="date_range", function_name="summarize"),
+    Output("range-total", "children"),
+    Output("range-mean", "children"),
+    Output("range-active", "children"),
+    Output("range-best", "children"),
+    Output("range-eta", "children"),
+    Input("date-range", "value"),
+    Input("series-store", "data")
+)
+
+# Cada gráfico temporal recebe o período quando é renderizado e a cada troca
+for _name in ZOOMABLE:
+    clientside_callback(
+        ClientsideFunction(namespace="date_range", function_name="applyRange"),
+        Output(f"graph-{_name}", "figure", allow_duplicate=True),
+        Input("date-range", "value"),
+        State("series-store", "data"),
+        State(f"graph-{_name}", "figure"),
+        prevent_initial_call="initial_duplicate"
+    )
 
 
 # Execução local
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,140 @@
+// assets/date_range.js
+// Filtro de período (últimos 30/90/365 dias ou tudo) feito no navegador: ajusta
+// o eixo X dos gráficos de série temporal e recalcula os agregados do período a
+// partir da série diária já enviada (series-store), sem ida ao servidor. Os
+// últimos FULL_RESOLUTION_DAYS dias das figuras têm orçamento próprio de pontos
+// no servidor (downsampling.downsample): com uma leitura por dia, 30/90/365
+// dias aparecem inteiros; séries mais densas vêm reduzidas, e o zoom no
+// gráfico busca o intervalo em resolução maior.
+(function () {
+  const DAY = 86400000;
+  const TYPED = {
+    f8: Float64Array, f4: Float32Array, i4: Int32Array, u4: Uint32Array,
+    i2: Int16Array, u2: Uint16Array, i1: Int8Array, u1: Uint8Array,
+  };
+
+  // Arrays numéricos do Plotly podem vir codificados em base64 ({dtype, bdata})
+  function values(arr) {
+    if (!arr) return [];
+    if (Array.isArray(arr)) return arr;
+    if (arr.bdata && TYPED[arr.dtype]) {
+      const bin = atob(arr.bdata);
+      const bytes = new Uint8Array(bin.length);
+      for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+      return Array.from(new TYPED[arr.dtype](bytes.buffer));
+    }
+    return [];
+  }
+
+  function isoDay(ms) {
+    return new Date(ms).toISOString().slice(0, 10);
+  }
+
+  // Último dia desenhado na figura (o eixo X das séries está em ordem)
+  function lastFigureDay(figure) {
+    let last = null;
+    ((figure && figure.data) || []).forEach((trace) => {
+      const xs = values(trace.x);
+      const x = xs.length ? String(xs[xs.length - 1]).slice(0, 10) : null;
+      if (x && (last === null || x > last)) last = x;
+    });
+    return last;
+  }
+
+  // [início, fim] do período em "AAAA-MM-DD", terminando no último dia com dados.
+  // Um painel lazy pode aparecer antes do series-store chegar: aí o fim vem da figura
+  function windowBounds(series, days, figure) {
+    if (!days || days === "all") return null;
+    const last = series && series.dates.length ? series.dates[series.dates.length - 1] : lastFigureDay(figure);
+    if (!last) return null;
+    const end = Date.parse(last);
+    return [isoDay(end - (Number(days) - 1) * DAY), isoDay(end)];
+  }
+
+  // Faixa Y dos pontos visíveis (o autorange do Plotly considera a série toda)
+  function visibleYRange(figure, start, end) {
+    let lo = Infinity;
+    let hi = -Infinity;
+    (figure.data || []).forEach((trace) => {
+      const xs = values(trace.x);
+      const ys = values(trace.y);
+      if (trace.fill === "tozeroy") lo = Math.min(lo, 0);
+      for (let i = 0; i < xs.length; i++) {
+        const x = String(xs[i]).slice(0, 10);
+        const y = ys[i];
+        if (x >= start && x <= end && y !== null && isFinite(y)) {
+          lo = Math.min(lo, y);
+          hi = Math.max(hi, y);
+        }
+      }
+    });
+    if (!isFinite(lo) || !isFinite(hi)) return null;
+    const pad = (hi - lo) * 0.05 || Math.abs(hi) * 0.05 || 1;
+    return [lo - pad, hi + pad];
+  }
+
+  function formatXp(xp) {
+    return `${(xp / 1e6).toFixed(1)}M`;
+  }
+
+  window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    date_range: {
+      // Eixos do gráfico para o período; a uirevision nova faz o Plotly aplicar
+      // o intervalo mesmo depois de um zoom manual. Também roda quando o painel
+      // lazy é renderizado: o Dash chama callbacks cujo Output acaba de entrar no
+      // layout (prevent_initial_call="initial_duplicate" não impede essa chamada)
+      applyRange: function (days, series, figure) {
+        if (!figure) return window.dash_clientside.no_update;
+        const bounds = windowBounds(series, days, figure);
+        const layout = Object.assign({}, figure.layout, { uirevision: `periodo-${days}` });
+        if (!bounds) {
+          layout.xaxis = Object.assign({}, layout.xaxis, { autorange: true });
+          layout.yaxis = Object.assign({}, layout.yaxis, { autorange: true });
+        } else {
+          const yRange = visibleYRange(figure, bounds[0], bounds[1]);
+          const endNext = isoDay(Date.parse(bounds[1]) + DAY);
+          layout.xaxis = Object.assign({}, layout.xaxis, { range: [bounds[0], endNext], autorange: false });
+          layout.yaxis = Object.assign({}, layout.yaxis, yRange ? { range: yRange, autorange: false } : { autorange: true });
+        }
+        return Object.assign({}, figure, { layout: layout });
+      },
+
+      // Agregados do período: XP total, média por dia, dias ativos, melhor dia e
+      // ETA no ritmo do período
+      summarize: function (days, series) {
+        if (!series || !series.dates.length) return ["–", "–", "–", "–", "–"];
+        const bounds = windowBounds(series, days) || [series.dates[0], series.dates[series.dates.length - 1]];
+        let total = 0;
+        let active = 0;
+        let best = 0;
+        let bestDate = "–";
+        series.dates.forEach((d, i) => {
+          if (d < bounds[0] || d > bounds[1]) return;
+          const xp = series.xp[i];
+          total += xp;
+          if (xp > 0) active += 1;
+          if (xp > best) {
+            best = xp;
+            bestDate = d.split("-").reverse().join("/");
+          }
+        });
+        const span = Math.round((Date.parse(bounds[1]) - Date.parse(bounds[0])) / DAY) + 1;
+        const perDay = total / span;
+        let eta = "N/A";
+        if (series.xp_faltante <= 0) {
+          eta = "Atingido";
+        } else if (perDay > 0) {
+          const remaining = Math.ceil(series.xp_faltante / perDay);
+          eta = remaining > 18250 ? "> 50 anos" : new Date(Date.now() + remaining * DAY).toLocaleDateString("pt-BR");
+        }
+        return [
+          formatXp(total),
+          `${formatXp(perDay)}/dia`,
+          `${active} de ${span} (${Math.round((active / span) * 100)}%)`,
+          best > 0 ? `${formatXp(best)} (${bestDate})` : "–",
+          eta,
+        ];
+      },
+    },
+  });
+})();
@@ -0,0 +1,38 @@
+// assets/lazy_panels.js
+// Marca como visíveis os painéis `.lazy-panel` quando entram na tela, disparando
+// o callback de renderização de cada um (ver layout.create_panel_slot).
+(function () {
+  const observed = new WeakSet();
+
+  function markVisible(el) {
+    const name = el.dataset.panel;
+    if (name && window.dash_clientside && window.dash_clientside.set_props) {
+      window.dash_clientside.set_props(`visible-${name}`, { data: true });
+    }
+  }
+
+  const observer = "IntersectionObserver" in window
+    ? new IntersectionObserver((entries) => {
+        entries.forEach((entry) => {
+          if (entry.isIntersecting) {
+            observer.unobserve(entry.target);
+            markVisible(entry.target);
+          }
+        });
+      }, { rootMargin: "200px" })
+    : null;
+
+  function scan() {
+    document.querySelectorAll(".lazy-panel").forEach((el) => {
+      if (observed.has(el)) return;
+      observed.add(el);
+      if (observer) {
+        observer.observe(el);
+      } else {
+        markVisible(el);
+      }
+    });
+  }
+
+  new MutationObserver(scan).observe(document.documentElement, { childList: true, subtree: true });
+})();
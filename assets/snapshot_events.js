@@ -0,0 +1,85 @@
+// assets/snapshot_events.js
+// Recebe do servidor (SSE em /events) um aviso a cada snapshot publicado. Os
+// callbacks abaixo só pedem os painéis ao servidor quando a chave do snapshot
+// do personagem selecionado muda; a idade dos dados é atualizada no navegador.
+// Se o servidor recusa o stream (limite de conexões por worker, 503), a aba
+// passa a consultar pelo intervalo e tenta o SSE de novo alguns minutos depois.
+(function () {
+  const RETRY_MS = 5 * 60 * 1000;
+  function pathPrefix() {
+    const config = document.getElementById("_dash-config");
+    try {
+      return JSON.parse(config.textContent).requests_pathname_prefix || "/";
+    } catch (e) {
+      return "/";
+    }
+  }
+
+  // Antes do Dash montar o layout set_props ainda não existe: tenta de novo
+  function setStatus(status) {
+    if (!window.dash_clientside || !window.dash_clientside.set_props) {
+      setTimeout(() => setStatus(status), 500);
+      return;
+    }
+    window.dash_clientside.set_props("sse-status", { data: status });
+  }
+
+  function connect() {
+    if (!("EventSource" in window)) {
+      setStatus("closed");
+      return;
+    }
+    const source = new EventSource(`${pathPrefix()}events`);
+    source.onopen = () => setStatus("open");
+    source.onerror = () => {
+      // CONNECTING: queda de rede, o navegador reconecta sozinho. CLOSED: o
+      // servidor recusou (503) e o EventSource desiste
+      if (source.readyState !== EventSource.CLOSED) return;
+      setStatus("closed");
+      setTimeout(connect, RETRY_MS * (1 + Math.random()));
+    };
+    source.addEventListener("snapshot", (e) => {
+      // Antes do Dash montar o layout não há o que atualizar (a carga inicial já busca o snapshot)
+      if (!window.dash_clientside || !window.dash_clientside.set_props) return;
+      try {
+        window.dash_clientside.set_props("snapshot-event", { data: JSON.parse(e.data) });
+      } catch (err) {
+        console.warn("Evento de snapshot ignorado", err);
+      }
+    });
+  }
+
+  function formatAge(ms) {
+    const minutos = Math.max(0, Math.floor((Date.now() - ms) / 60000));
+    if (minutos < 1) return "Dados atualizados agora";
+    if (minutos < 60) return `Dados atualizados há ${minutos} min`;
+    return `Dados atualizados há ${Math.floor(minutos / 60)}h${String(minutos % 60).padStart(2, "0")}`;
+  }
+
+  window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    snapshot_events: {
+      // Evento do personagem selecionado: chave nova dispara a carga no servidor
+      onEvent: function (event, store, character) {
+        const noUpdate = window.dash_clientside.no_update;
+        if (!event || event.character !== character) return [noUpdate, noUpdate];
+        const changed = !store || store.key !== event.key;
+        return [changed ? event.key : noUpdate, event.created_at_ms];
+      },
+
+      // Sem SSE, consulta no intervalo curto; com o stream aberto, só a garantia
+      refreshInterval: function (status, config) {
+        return status === "closed" ? config.poll_ms : config.push_ms;
+      },
+
+      formatAge: function (_, createdAtMs) {
+        return createdAtMs ? formatAge(createdAtMs) : null;
+      },
+    },
+  });
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", connect);
+  } else {
+    connect();
+  }
+})();
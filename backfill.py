@@ -0,0 +1,206 @@
+# backfill.py
+import os
+import sys
+import time
+import logging
+import argparse
+import resource
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from characters import Character, CHARACTERS_BY_NAME
+from data_loader import DATE_FORMAT, REQUIRED_COLUMNS, CATEGORY_COLUMNS, parse_sheet_columns, summarize_errors
+from storage import STORAGE_PATH, SQLiteBackend
+
+logger = logging.getLogger(__name__)
+
+# Linhas lidas por bloco: a memória usada depende deste valor, não do tamanho do arquivo
+BACKFILL_CHUNK_ROWS = int(os.getenv("BACKFILL_CHUNK_ROWS", "50000"))
+SOURCE = "backfill"
+
+
+@dataclass
+class BackfillStats:
+    rows_read: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    already_stored: int = 0
+    written: int = 0
+    xp_gained: float = 0.0
+    bytes_read: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        rate = self.rows_read / self.seconds if self.seconds > 0 else float("inf")
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB no Linux
+        return (
+            f"{self.rows_read:,} linhas lidas em {self.seconds:.1f}s ({rate:,.0f} linhas/s"
+            + (f", {self.bytes_read / 2 ** 20 / self.seconds:,.1f} MiB/s" if self.bytes_read and self.seconds else "")
+            + "); "
+            f"{self.written:,} gravadas, {self.duplicates:,} duplicadas, "
+            f"{self.already_stored:,} já no banco, {self.invalid:,} inválidas; "
+            f"XP somada {self.xp_gained / 1e6:,.1f}M; pico de memória {peak_mb:,.0f} MiB"
+        )
+
+
+# === Etapas do pipeline (geradores: um bloco por vez em memória) ===
+
+def read_chunks(paths: Iterable[str], chunk_rows: int = BACKFILL_CHUNK_ROWS,
+                column_map: Optional[Dict[str, str]] = None,
+                stats: Optional[BackfillStats] = None) -> Iterator[Tuple[str, int, pd.DataFrame]]:
+    """
+    Lê os CSVs em blocos de `chunk_rows` linhas, tudo como texto, com as
+    colunas renomeadas para o esquema da planilha (`column_map`: destino ->
+    coluna no arquivo). Produz (arquivo, número da primeira linha, bloco).
+    """
+    rename = {src: dest for dest, src in (column_map or {}).items()}
+    wanted = set(REQUIRED_COLUMNS + CATEGORY_COLUMNS)
+    for path in paths:
+        line = 2  # linha 1 = cabeçalho
+        reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows,
+                             usecols=lambda c: rename.get(c, c) in wanted)
+        with reader:
+            for chunk in reader:
+                chunk = chunk.rename(columns=rename)
+                if stats is not None:
+                    stats.rows_read += len(chunk)
+                yield path, line, chunk
+                line += len(chunk)
+        if stats is not None:
+            stats.bytes_read += os.path.getsize(path)
+
+
+def normalize(chunks: Iterable[Tuple[str, int, pd.DataFrame]], character: Optional[str] = None,
+              date_format: str = DATE_FORMAT, stats: Optional[BackfillStats] = None) -> Iterator[pd.DataFrame]:
+    """
+    Aplica o mesmo esquema da ingestão da planilha (`parse_sheet_columns`:
+    data no formato exato, XP inteira, linhas inválidas descartadas) e
+    identifica o personagem: `character` ou a coluna Name de cada linha.
+    """
+    for path, first_row, chunk in chunks:
+        missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+        if missing or (character is None and "Name" not in chunk.columns):
+            raise ValueError(f"{path}: colunas ausentes: {', '.join(missing or ['Name'])} "
+                             "(use --column ou --character)")
+        df, errors = parse_sheet_columns({c: chunk[c].tolist() for c in chunk.columns},
+                                         first_row=first_row, date_format=date_format)
+        if errors:
+            logger.warning(f"{path}: {summarize_errors(errors)}")
+        if character is not None:
+            df["character"] = character
+        else:
+            df["character"] = df["Name"].astype(str)
+            unnamed = df["character"] == ""
+            if unnamed.any():
+                logger.warning(f"{path}: {int(unnamed.sum())} linhas sem Name descartadas")
+                df = df[~unnamed]
+        if stats is not None:
+            stats.invalid += len(chunk) - len(df)
+        yield df
+
+
+def dedupe(frames: Iterable[pd.DataFrame], stats: Optional[BackfillStats] = None) -> Iterator[pd.DataFrame]:
+    """
+    Uma leitura por (personagem, dia): fica a primeira. Entre blocos, só o
+    último dia e a última XP de cada personagem são lembrados, o que basta
+    para a entrada em ordem cronológica (o resto o banco ignora ao gravar).
+
+    Calcula também o `daily_exp` como na planilha, continuando do bloco
+    anterior em vez de recomeçar do zero.
+    """
+    carry: Dict[str, Tuple[pd.Timestamp, int]] = {}
+    for df in frames:
+        if df.empty:
+            continue
+        df = df.assign(day=df["create_at"].dt.normalize())
+        keep = ~df.duplicated(["character", "day"])
+        last_day = df["character"].map({c: d for c, (d, _) in carry.items()})
+        keep &= ~(df["day"] == last_day)
+        if stats is not None:
+            stats.duplicates += int((~keep).sum())
+        df = df[keep]
+        if df.empty:
+            continue
+
+        exp = df["Experience"].astype(np.float64)
+        daily = exp.groupby(df["character"], sort=False).diff()
+        first = daily.isna()
+        prev = df.loc[first, "character"].map({c: xp for c, (_, xp) in carry.items()})
+        daily[first] = (exp[first] - prev).fillna(0)
+        df = df.assign(daily_exp=daily.clip(lower=0)).drop(columns="day")
+
+        last = df.groupby("character", sort=False).tail(1)
+        for name, created, xp in zip(last["character"], last["create_at"], last["Experience"]):
+            carry[name] = (created.normalize(), int(xp))
+        yield df
+
+
+def write_batches(frames: Iterable[pd.DataFrame], store: SQLiteBackend,
+                  stats: Optional[BackfillStats] = None) -> Iterator[int]:
+    """Grava cada bloco no banco (uma transação por personagem), sem sobrescrever o que já existe."""
+    for df in frames:
+        for name, group in df.groupby("character", sort=False):
+            character = CHARACTERS_BY_NAME.get(name) or Character(name=name, worksheet=name)
+            written = store.write(character, group, SOURCE, replace=False, seq=np.zeros(len(group), dtype=np.int64))
+            if stats is not None:
+                stats.written += written
+                stats.already_stored += len(group) - written
+                stats.xp_gained += float(group["daily_exp"].sum())
+            yield written
+
+
+def backfill(paths: List[str], store: Optional[SQLiteBackend] = None, character: Optional[str] = None,
+             column_map: Optional[Dict[str, str]] = None, date_format: str = DATE_FORMAT,
+             chunk_rows: int = BACKFILL_CHUNK_ROWS, progress_every: int = 10) -> BackfillStats:
+    """
+    Importa históricos em CSV para o banco local, bloco a bloco: leitura ->
+    normalização -> deduplicação -> gravação. A memória não cresce com o
+    tamanho dos arquivos.
+    """
+    store = store or SQLiteBackend(STORAGE_PATH)
+    stats = BackfillStats()
+    start = time.perf_counter()
+    chunks = read_chunks(paths, chunk_rows, column_map, stats)
+    pipeline = write_batches(dedupe(normalize(chunks, character, date_format, stats), stats), store, stats)
+    for i, _ in enumerate(pipeline, 1):
+        if progress_every and i % progress_every == 0:
+            stats.seconds = time.perf_counter() - start
+            logger.info(f"Backfill em andamento: {stats.summary()}")
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def _parse_column(value: str) -> Tuple[str, str]:
+    dest, sep, src = value.partition("=")
+    if not sep or dest not in REQUIRED_COLUMNS + CATEGORY_COLUMNS:
+        raise argparse.ArgumentTypeError(
+            f"use DESTINO=ORIGEM, com DESTINO em {', '.join(REQUIRED_COLUMNS + CATEGORY_COLUMNS)}"
+        )
+    return dest, src
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa históricos de XP em CSV para o banco local (SQLite).")
+    parser.add_argument("paths", nargs="+", help="arquivos CSV (também .gz/.zip), em ordem cronológica")
+    parser.add_argument("--character", help="personagem de todas as linhas (padrão: coluna Name)")
+    parser.add_argument("--column", action="append", type=_parse_column, default=[],
+                        help="coluna com outro nome no arquivo, ex.: Experience=value (repetível)")
+    parser.add_argument("--date-format", default=DATE_FORMAT, help=f"formato das datas (padrão: {DATE_FORMAT})")
+    parser.add_argument("--chunk-rows", type=int, default=BACKFILL_CHUNK_ROWS, help="linhas por bloco")
+    parser.add_argument("--store", default=STORAGE_PATH, help=f"banco SQLite (padrão: {STORAGE_PATH})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    store = SQLiteBackend(args.store)
+    stats = backfill(args.paths, store, character=args.character, column_map=dict(args.column),
+                     date_format=args.date_format, chunk_rows=args.chunk_rows)
+    store.close()
+    print(f"Backfill concluído: {stats.summary()}")
+    sys.exit(1 if stats.rows_read and not stats.written and not stats.already_stored else 0)
+
+
+if __name__ == "__main__":
+    main()
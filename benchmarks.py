@@ -0,0 +1,583 @@
+# benchmarks.py
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from datetime import datetime, date
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from xp_calculator import cumulative_exp_closed, levels_for_exp
+
+HEADER = ["create_at", "Name", "Vocation", "Level", "Experience"]
+SIZES = [1_000, 100_000, 1_000_000]
+RESULTS_DIR = os.getenv("BENCHMARK_DIR", ".benchmarks")
+# Limite de dias do histórico: acima disso há várias leituras por dia
+# (datas muito longas estouram o intervalo de pd.Timestamp)
+MAX_DAYS = 40 * 365
+
+
+# === Gerador de histórico sintético ===
+
+def generate_history(rows: int, name: str = "Elder Druid", vocation: str = "Elder Druid",
+                     start_level: int = 300, start: date = date(2020, 1, 1), seed: int = 0,
+                     gap_prob: float = 0.1, death_prob: float = 0.02) -> List[List[str]]:
+    """
+    Linhas cruas no formato da planilha (tudo texto, como o Sheets devolve).
+
+    A XP diária segue uma distribuição de cauda longa, com dias sem hunt,
+    lacunas de vários dias sem registro (`gap_prob`) e mortes (`death_prob`),
+    que fazem a XP cair.
+    """
+    rng = np.random.default_rng(seed)
+    per_day = max(1, -(-rows // MAX_DAYS))
+
+    # Dias entre leituras: 0 quando há mais de uma leitura por dia, 1 normalmente,
+    # e lacunas geométricas de vez em quando
+    step = np.where(np.arange(rows) % per_day == 0, 1, 0)
+    gaps = rng.random(rows) < gap_prob / per_day
+    step[gaps] += rng.geometric(0.3, gaps.sum())
+    step[0] = 0
+    dates = pd.Timestamp(start) + pd.to_timedelta(np.cumsum(step), unit="D")
+
+    gains = rng.lognormal(mean=16.3, sigma=0.8, size=rows) / per_day
+    gains[rng.random(rows) < 0.15] = 0
+    gains[0] = 0
+    # Morte: perde uma fração da XP total. Com x_i = (x_{i-1} + g_i) * f_i,
+    # x_i / P_i = x_0 + soma(g_j / P_{j-1}), onde P é o produto acumulado de f
+    factor = np.ones(rows)
+    deaths = rng.random(rows) < death_prob
+    factor[deaths] = 1 - rng.uniform(0.005, 0.02, deaths.sum())
+    prod = np.cumprod(factor)
+    prev_prod = np.concatenate(([1.0], prod[:-1]))
+    experience = (prod * (cumulative_exp_closed(start_level) + np.cumsum(gains / prev_prod))).astype(np.int64)
+    levels, _, _ = levels_for_exp(experience)
+
+    date_str = dates.strftime("%d-%m-%Y")
+    return [
+        [d, name, vocation, str(int(lv)), str(xp)]
+        for d, lv, xp in zip(date_str, levels, experience)
+    ]
+
+
+def generate_characters(rows: int, count: int = 3, seed: int = 0) -> Dict[str, List[List[str]]]:
+    """Históricos independentes para `count` personagens, {aba: linhas}."""
+    vocations = ["Elder Druid", "Master Sorcerer", "Royal Paladin", "Elite Knight"]
+    return {
+        f"CHAR{i}": generate_history(
+            rows, name=f"Char {i}", vocation=vocations[i % len(vocations)],
+            start_level=150 + 100 * i, seed=seed + i
+        )
+        for i in range(count)
+    }
+
+
+class StubWorksheet:
+    """
+    Substitui o gspread.Worksheet nas medições: devolve as linhas geradas sem
+    rede, como o Sheets devolveria (números sem formatação viram int).
+    """
+    title = "benchmark"
+
+    def __init__(self, rows: List[List[str]]):
+        self.rows = rows
+        self.columns = [list(c) for c in zip(*rows)] if rows else [[] for _ in HEADER]
+        for i in (HEADER.index("Level"), HEADER.index("Experience")):
+            self.columns[i] = [int(v) for v in self.columns[i]]
+
+    def get_all_values(self) -> List[List[str]]:
+        return [HEADER] + self.rows
+
+    def get_all_records(self) -> List[Dict[str, Any]]:
+        from gspread.utils import numericise_all, to_records
+        return to_records(HEADER, [numericise_all(r) for r in self.rows])
+
+    def row_values(self, row: int, **_) -> List[str]:
+        return list(HEADER)
+
+    def batch_get(self, ranges: List[str], **_) -> List[List[List[Any]]]:
+        # Só os intervalos de coluna inteira usados pela ingestão colunar ("B2:B")
+        return [[self.columns[ord(r[0]) - ord("A")]] for r in ranges]
+
+
+# === API do Sheets local ===
+
+class LocalSheetsAPI:
+    """
+    Servidor HTTP local que imita a API do Sheets (metadados, values e
+    values:batchGet) e o endpoint de token OAuth, para medir o cliente real
+    sem rede. Cada requisição atrasa `latency_ms` e cada conexão nova
+    `handshake_ms` (o custo de TCP + TLS em produção).
+    """
+
+    def __init__(self, worksheets: Dict[str, List[List[str]]], latency_ms: float = 20,
+                 handshake_ms: float = 60, token_expires_in: int = 3600):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        import threading
+
+        self.sheets = {title: StubWorksheet(rows) for title, rows in worksheets.items()}
+        self.latency = latency_ms / 1000
+        self.handshake = handshake_ms / 1000
+        self.token_expires_in = token_expires_in
+        self.counts = {"connections": 0, "requests": 0, "tokens": 0}
+        self._count_lock = threading.Lock()
+        self._credentials_json: Optional[str] = None
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                api._count("connections")
+                time.sleep(api.handshake)
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                api._count("requests")
+                time.sleep(api.latency)
+                if self.path != "/token":
+                    return self._reply(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+                api._count("tokens")
+                self._reply(200, {"access_token": f"token-{api.counts['tokens']}", "token_type": "Bearer",
+                                  "expires_in": api.token_expires_in})
+
+            def do_GET(self):
+                api._count("requests")
+                time.sleep(api.latency)
+                status, body = api.handle_get(self.path)
+                self._reply(status, body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _count(self, key: str) -> None:
+        with self._count_lock:
+            self.counts[key] += 1
+
+    def handle_get(self, path: str):
+        from urllib.parse import parse_qs, unquote, urlsplit
+        parts = urlsplit(path)
+        query = parse_qs(parts.query)
+        segments = parts.path.split("/")  # ["", "v4", "spreadsheets", id, "values", ...]
+        if segments[1:3] != ["v4", "spreadsheets"] or len(segments) < 4:
+            return 404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}}
+        sheet_id = segments[3]
+        if len(segments) == 4:
+            return 200, {
+                "spreadsheetId": sheet_id,
+                "properties": {"title": "benchmark"},
+                "sheets": [
+                    {"properties": {"sheetId": i, "title": title, "index": i,
+                                    "gridProperties": {"rowCount": len(ws.rows) + 1, "columnCount": len(HEADER)}}}
+                    for i, (title, ws) in enumerate(self.sheets.items())
+                ],
+            }
+        columns = query.get("majorDimension", ["ROWS"])[0] == "COLUMNS"
+        batch = segments[4:] == ["values:batchGet"]
+        if batch:
+            ranges = query.get("ranges", [])
+        elif len(segments) == 6 and segments[4] == "values":
+            ranges = [unquote(segments[5])]
+        else:
+            return 404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}}
+        try:
+            value_ranges = [self._value_range(r, columns) for r in ranges]
+        except KeyError as e:
+            return 400, {"error": {"code": 400, "message": f"Unable to parse range: {e}", "status": "INVALID_ARGUMENT"}}
+        if batch:
+            return 200, {"spreadsheetId": sheet_id, "valueRanges": value_ranges}
+        return 200, value_ranges[0]
+
+    def _value_range(self, a1: str, columns: bool) -> Dict[str, Any]:
+        """Intervalos usados pela ingestão: linha inteira ("1:1", "A1:1") ou coluna a partir de uma linha ("B2:B")."""
+        import re
+        title, _, cells = a1.rpartition("!")
+        ws = self.sheets[title.strip("'")]
+        table = [HEADER] + [[c[i] for c in ws.columns] for i in range(len(ws.rows))]
+        row_range = re.fullmatch(r"A?(\d+):(\d+)", cells)
+        if row_range:
+            values = table[int(row_range.group(1)) - 1:int(row_range.group(2))]
+            if columns:
+                values = [list(col) for col in zip(*values)]
+        else:
+            col_range = re.fullmatch(r"([A-Z])(\d+):[A-Z]", cells)
+            if not col_range:
+                raise KeyError(a1)
+            column = ord(col_range.group(1)) - ord("A")
+            values = [[row[column] for row in table[int(col_range.group(2)) - 1:]]]
+            if not columns:
+                values = [[v] for v in values[0]]
+        return {"range": a1, "majorDimension": "COLUMNS" if columns else "ROWS", "values": values}
+
+    def credentials(self, scopes: Optional[List[str]] = None):
+        """
+        Credenciais de conta de serviço (chave descartável, gerada uma vez) com
+        token emitido por este servidor. Como o GOOGLE_CREDENTIALS, o JSON é
+        lido de novo a cada chamada.
+        """
+        from google.oauth2.service_account import Credentials
+        if self._credentials_json is None:
+            from cryptography.hazmat.primitives import serialization
+            from cryptography.hazmat.primitives.asymmetric import rsa
+            key = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            ).decode()
+            self._credentials_json = json.dumps({
+                "type": "service_account", "project_id": "benchmark", "private_key_id": "benchmark",
+                "private_key": key, "client_email": "benchmark@benchmark.iam.gserviceaccount.com",
+                "token_uri": f"{self.url}/token",
+            })
+        return Credentials.from_service_account_info(
+            json.loads(self._credentials_json), scopes=scopes or ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+        )
+
+    def __enter__(self) -> "LocalSheetsAPI":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# === Medição ===
+
+def _timeit(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": float(np.median(times))}
+
+
+def _payload_bytes(obj: Any) -> Dict[str, int]:
+    """Tamanho do payload sem compressão e comprimido como o servidor envia (gzip 6, brotli 4)."""
+    import gzip
+    import brotli
+    import plotly
+    raw = json.dumps(obj, cls=plotly.utils.PlotlyJSONEncoder).encode("utf-8")
+    return {
+        "bytes": len(raw),
+        "gzip_bytes": len(gzip.compress(raw, compresslevel=6)),
+        "br_bytes": len(brotli.compress(raw, quality=4)),
+    }
+
+
+def _figure_cases(m: Dict[str, Any], df: pd.DataFrame) -> Dict[str, Callable[[], Any]]:
+    import figures as f
+    return {
+        "create_roadmap_figure": lambda: f.create_roadmap_figure(m["level_real"], m["level_target"]),
+        "create_moving_avg_figure": lambda: f.create_moving_avg_figure(df),
+        "create_heatmap_figure": lambda: f.create_heatmap_figure(df, m["rollups"]),
+        "create_weekday_bar_figure": lambda: f.create_weekday_bar_figure(df, m["rollups"]),
+        "create_eta_scenarios_figure": lambda: f.create_eta_scenarios_figure(
+            m["xp_faltante"], m["media_geral"], m["media_recente"], m["melhor_dia_xp"]),
+        "create_adherence_figure": lambda: f.create_adherence_figure(df, m["xp_meta_diaria"]),
+        "create_delivery_curve_figure": lambda: f.create_delivery_curve_figure(df),
+        "create_progress_timeline": lambda: f.create_progress_timeline(df, m["milestone_index"]),
+        "create_daily_efficiency": lambda: f.create_daily_efficiency(df, m["xp_meta_diaria"]),
+        "create_activity_calendar": lambda: f.create_activity_calendar(df, m["rollups"]),
+        "create_performance_trend": lambda: f.create_performance_trend(df),
+        "create_xp_distribution": lambda: f.create_xp_distribution(df),
+    }
+
+
+def _render_dashboard(m: Dict[str, Any]) -> Any:
+    """Renderiza todos os painéis do dashboard, como os callbacks fazem, sem cache de figuras."""
+    from app import PANELS
+    from figure_cache import FIGURE_CACHE
+    FIGURE_CACHE.clear()
+    return {name: render(m, m["df_enriched"]) for name, render in PANELS.items()}
+
+
+def _bench_storage(worksheet: StubWorksheet, repeat: int) -> Dict[str, Any]:
+    """
+    Consulta dos últimos 90 dias: baixando a aba inteira e recortando no pandas
+    (o que a planilha permite) e direto no SQLite, pelo índice (personagem, data).
+    """
+    import tempfile
+    from characters import Character
+    from data_loader import _sync_full
+    from storage import SQLiteBackend, slice_dates
+
+    class _StubSource:
+        name = "sheets"
+
+        def read(self, character, start=None, end=None):
+            return slice_dates(_sync_full(worksheet)[0], start, end)
+
+    character = Character(name="benchmark", worksheet="benchmark")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteBackend(os.path.join(tmp, "benchmark.sqlite3"), source=_StubSource())
+        result: Dict[str, Any] = {"sync": _timeit(lambda: store.sync(character, full=True), 1)}
+        end = store.query(character)["create_at"].max()
+        start = end - pd.Timedelta(days=89)
+        result["sheets_90d"] = _timeit(lambda: store.source.read(character, start, end), repeat)
+        result["sqlite_90d"] = _timeit(lambda: store.query(character, start, end), repeat)
+        result["sqlite_full"] = _timeit(lambda: store.query(character), repeat)
+        store.close()
+    return result
+
+
+def bench_size(rows: int, repeat: int, characters: int = 1) -> Dict[str, Any]:
+    from data_loader import _sync_full, parse_sheet_records
+    from metrics import calculate_all_metrics
+
+    sheets = generate_characters(rows, count=characters)
+    result: Dict[str, Any] = {"rows": rows, "characters": characters}
+
+    worksheets = [StubWorksheet(r) for r in sheets.values()]
+    total_rows = rows * characters
+    result["parse"] = _timeit(lambda: [_sync_full(ws) for ws in worksheets], repeat)
+    # Caminho antigo, por registro, para comparação
+    result["parse_records"] = _timeit(
+        lambda: [parse_sheet_records(ws.get_all_records()) for ws in worksheets], repeat
+    )
+    for key in ("parse", "parse_records"):
+        result[key]["rows_per_second"] = total_rows / result[key]["min"]
+    result["storage"] = _bench_storage(worksheets[0], repeat)
+    frames = [_sync_full(ws)[0] for ws in worksheets]
+    df = frames[0]
+
+    result["calculate_all_metrics"] = _timeit(lambda: [calculate_all_metrics(d) for d in frames], repeat)
+    m = calculate_all_metrics(df)
+    enriched = m["df_enriched"]
+
+    result["figures"] = {}
+    for name, build in _figure_cases(m, enriched).items():
+        try:
+            timing = _timeit(build, repeat)
+            timing["bytes"] = len(build().to_json().encode("utf-8"))
+        except Exception as e:
+            timing = {"error": f"{type(e).__name__}: {e}"}
+        result["figures"][name] = timing
+
+    result["render_dashboard"] = _timeit(lambda: _render_dashboard(m), repeat)
+    result["render_dashboard"].update(_payload_bytes(_render_dashboard(m)))
+    return result
+
+
+def bench_sheets_client(rows: int = 1_000, repeat: int = 5, latency_ms: float = 20,
+                        handshake_ms: float = 60) -> Dict[str, Any]:
+    """
+    Latência de uma leitura completa da aba pela API local: com um cliente
+    novo a cada leitura (credenciais, token, conexões e abertura da planilha
+    refeitos, como antes do SheetsClientManager) e com o cliente reaproveitado.
+    """
+    from data_loader import _sync_full
+    from sheets_client import SheetsClientManager
+
+    result: Dict[str, Any] = {"rows": rows, "latency_ms": latency_ms, "handshake_ms": handshake_ms}
+    with LocalSheetsAPI({"EXP/DIA": generate_history(rows)}, latency_ms, handshake_ms) as api:
+        def fetch(manager: SheetsClientManager) -> None:
+            _sync_full(manager.worksheet("benchmark", "EXP/DIA"))
+
+        def fresh() -> None:
+            manager = SheetsClientManager(api.credentials, api_url=api.url)
+            try:
+                fetch(manager)
+            finally:
+                manager.close()
+
+        pooled = SheetsClientManager(api.credentials, api_url=api.url)
+        fetch(pooled)  # primeira leitura: autentica e abre a aba
+        for name, func in (("fresh", fresh), ("pooled", lambda: fetch(pooled))):
+            before = dict(api.counts)
+            result[name] = _timeit(func, repeat)
+            result[name].update({k: (api.counts[k] - before[k]) / repeat for k in before})
+        pooled.close()
+    return result
+
+
+# Roda em um processo novo: tempo de importar o app, da primeira resposta (a
+# página) e até o primeiro snapshot disponível para os callbacks
+_COLD_START_PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.server.test_client().get("/")
+first_byte = time.perf_counter()
+snapshot = app.REFRESHER.wait_for_first(timeout=120)
+print(json.dumps({"import": imported - start, "first_byte": first_byte - start,
+                  "first_data": time.perf_counter() - start, "loaded": snapshot is not None}))
+"""
+
+
+def bench_cold_start(rows: int = 10_000, repeat: int = 3, latency_ms: float = 20,
+                     handshake_ms: float = 60) -> Dict[str, Any]:
+    """
+    Boot do app em processos novos contra a API do Sheets local: esperando a
+    leitura da planilha (BOOT_FROM_SNAPSHOT=0) e partindo da leitura salva em
+    disco (BOOT_FROM_SNAPSHOT=1), com a atualização em segundo plano.
+    """
+    import tempfile
+
+    result: Dict[str, Any] = {"rows": rows, "latency_ms": latency_ms, "handshake_ms": handshake_ms}
+    with LocalSheetsAPI({"CHAR0": generate_history(rows)}, latency_ms, handshake_ms) as api, \
+            tempfile.TemporaryDirectory() as snapshot_dir:
+        api.credentials()
+        env = dict(
+            os.environ, CHARACTERS=json.dumps([{"name": "Char 0", "worksheet": "CHAR0"}]),
+            GOOGLE_CREDENTIALS=api._credentials_json, SHEETS_API_URL=api.url, SNAPSHOT_DIR=snapshot_dir,
+            LOG_LEVEL="WARNING",
+        )
+        # A primeira rodada lê a planilha e grava o snapshot em disco usado no boot rápido
+        for mode, flag in (("sheets", "0"), ("snapshot", "1")):
+            runs = []
+            for _ in range(repeat):
+                out = subprocess.run([sys.executable, "-c", _COLD_START_PROBE], env=dict(env, BOOT_FROM_SNAPSHOT=flag),
+                                     cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+                if out.returncode != 0:
+                    raise RuntimeError(f"Boot falhou ({mode}): {out.stderr.strip()[-500:]}")
+                runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            result[mode] = {k: float(np.median([r[k] for r in runs])) for k in ("import", "first_byte", "first_data")}
+            result[mode]["loaded"] = all(r["loaded"] for r in runs)
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes: List[int], repeat: int = 3, characters: int = 1,
+                   sheets_latency_ms: float = 20, sheets_handshake_ms: float = 60) -> Dict[str, Any]:
+    # O app sobe o REFRESHER ao ser importado; parado antes, ele não chega a tocar na planilha
+    import snapshot
+    import throttling
+    snapshot.REFRESHER.stop()
+    # Sem limite de taxa: as leituras são do StubWorksheet, não da API
+    throttling.SHEETS_BUCKET = throttling.TokenBucket(rate=1e12, capacity=10 ** 12)
+
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "repeat": repeat,
+        "results": [bench_size(rows, repeat if rows < 1_000_000 else 1, characters) for rows in sizes],
+        "sheets_client": bench_sheets_client(latency_ms=sheets_latency_ms, handshake_ms=sheets_handshake_ms),
+        "cold_start": bench_cold_start(latency_ms=sheets_latency_ms, handshake_ms=sheets_handshake_ms),
+    }
+
+
+# === Comparação entre commits ===
+
+def _flatten(report: Dict[str, Any]) -> Dict[str, float]:
+    flat = {}
+    for r in report["results"]:
+        for stage in ("parse", "parse_records", "calculate_all_metrics", "render_dashboard"):
+            if stage in r:
+                flat[f"{r['rows']}/{stage}"] = r[stage]["min"]
+        for name, timing in r.get("storage", {}).items():
+            flat[f"{r['rows']}/storage/{name}"] = timing["min"]
+        for name, timing in r["figures"].items():
+            if "min" in timing:
+                flat[f"{r['rows']}/{name}"] = timing["min"]
+    for mode in ("fresh", "pooled"):
+        if mode in report.get("sheets_client", {}):
+            flat[f"sheets_client/{mode}"] = report["sheets_client"][mode]["median"]
+    for mode in ("sheets", "snapshot"):
+        for key, seconds in report.get("cold_start", {}).get(mode, {}).items():
+            if key != "loaded":
+                flat[f"cold_start/{mode}/{key}"] = seconds
+    return flat
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    current = _flatten(report)
+    previous = _flatten(baseline) if baseline else {}
+    title = f"commit {report['commit']}"
+    if baseline:
+        title += f" vs {baseline['commit']}"
+    print(title)
+    for key, seconds in current.items():
+        line = f"  {key:<45} {seconds * 1000:10.1f} ms"
+        if key in previous and previous[key]:
+            line += f"  ({(seconds / previous[key] - 1) * 100:+.1f}%)"
+        print(line)
+    for r in report["results"]:
+        print(f"  {r['rows']}/ingestão: colunar {r['parse']['rows_per_second']:,.0f} linhas/s, "
+              f"por registro {r['parse_records']['rows_per_second']:,.0f} linhas/s")
+        for name, timing in r["figures"].items():
+            if "error" in timing:
+                print(f"  {r['rows']}/{name:<39} erro: {timing['error']}")
+        payload = r["render_dashboard"]
+        line = f"  {r['rows']}/payload do dashboard: {payload['bytes'] / 1024:.0f} KiB"
+        if "gzip_bytes" in payload:
+            line += f", gzip {payload['gzip_bytes'] / 1024:.0f} KiB, brotli {payload['br_bytes'] / 1024:.0f} KiB"
+        print(line)
+    client = report.get("sheets_client")
+    if client:
+        print(f"  cliente do Sheets ({client['rows']} linhas, {client['latency_ms']:.0f} ms por requisição, "
+              f"{client['handshake_ms']:.0f} ms por conexão nova):")
+        for mode, label in (("fresh", "novo a cada leitura"), ("pooled", "reaproveitado")):
+            c = client[mode]
+            print(f"    {label:<20} {c['median'] * 1000:8.1f} ms  ({c['requests']:.1f} requisições, "
+                  f"{c['connections']:.1f} conexões, {c['tokens']:.1f} tokens por leitura)")
+    cold = report.get("cold_start")
+    if cold:
+        print(f"  boot ({cold['rows']} linhas): import, primeira resposta e primeiros dados")
+        for mode, label in (("sheets", "lendo a planilha"), ("snapshot", "snapshot em disco")):
+            c = cold[mode]
+            print(f"    {label:<20} {c['import'] * 1000:8.0f} ms {c['first_byte'] * 1000:8.0f} ms "
+                  f"{c['first_data'] * 1000:8.0f} ms" + ("" if c["loaded"] else "  (sem dados)"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, métricas e figuras com dados sintéticos.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="quantidade de linhas por personagem")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por medição (1M linhas roda uma vez)")
+    parser.add_argument("--characters", type=int, default=1, help="personagens na medição de carga e métricas")
+    parser.add_argument("--sheets-latency-ms", type=float, default=20,
+                        help="atraso por requisição da API do Sheets local")
+    parser.add_argument("--sheets-handshake-ms", type=float, default=60,
+                        help="atraso por conexão nova (TCP + TLS) da API do Sheets local")
+    parser.add_argument("--compare", help="JSON de um resultado anterior para comparar")
+    parser.add_argument("--output", help=f"arquivo de saída (padrão: {RESULTS_DIR}/<commit>.json)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.repeat, args.characters,
+                            args.sheets_latency_ms, args.sheets_handshake_ms)
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"Resultados salvos em {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# characters.py
+import os
+import re
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Character:
+    """Personagem acompanhado: aba da planilha, nível alvo, título e highscore onde aparece."""
+    name: str
+    worksheet: str
+    level_target: int = 1000
+    title: Optional[str] = None
+    world: Optional[str] = None
+    vocation: str = "all"
+
+    @property
+    def slug(self) -> str:
+        return re.sub(r"[^A-Za-z0-9_-]+", "_", self.name).strip("_").lower()
+
+    @property
+    def display_title(self) -> str:
+        return self.title or f"PROJETO {self.name.upper()} {self.level_target}"
+
+
+def load_characters() -> List[Character]:
+    """
+    Lê a lista de personagens de CHARACTERS (JSON) ou do arquivo CHARACTERS_FILE.
+    Sem configuração, usa o personagem único de GOOGLE_WORKSHEET_NAME.
+    """
+    raw = os.getenv("CHARACTERS")
+    path = os.getenv("CHARACTERS_FILE", "characters.json")
+    if not raw and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            raw = f.read()
+
+    if raw:
+        entries = json.loads(raw)
+        characters = [
+            Character(
+                name=e["name"],
+                worksheet=e.get("worksheet", e["name"]),
+                level_target=int(e.get("level_target", 1000)),
+                title=e.get("title"),
+                world=e.get("world", os.getenv("TIBIA_WORLD")),
+                vocation=e.get("vocation", "all")
+            )
+            for e in entries
+        ]
+        if not characters:
+            raise ValueError("CHARACTERS não contém nenhum personagem")
+        return characters
+
+    return [Character(
+        name=os.getenv("CHARACTER_NAME", "Elder Druid"),
+        worksheet=os.getenv("GOOGLE_WORKSHEET_NAME", "EXP/DIA"),
+        level_target=1000,
+        title="PROJETO ELDER DRUID 1000",
+        world=os.getenv("TIBIA_WORLD"),
+        vocation="druid"
+    )]
+
+
+CHARACTERS = load_characters()
+CHARACTERS_BY_NAME = {c.name: c for c in CHARACTERS}
+
+
+def get_character(name: Optional[str]) -> Character:
+    """Personagem pelo nome; o primeiro da lista se o nome for vazio ou desconhecido."""
+    return CHARACTERS_BY_NAME.get(name, CHARACTERS[0])
+
+
+# === Modo batch ===
+
+# Métricas devolvidas pelos processos do modo batch: só valores simples. As
+# demais chaves (DataFrame, índices, simulação) ficam no processo que as calculou
+BATCH_METRIC_KEYS = (
+    "level_target", "level_real", "xp_consolidada", "xp_faltante",
+    "media_geral", "media_recente", "xp_meta_diaria", "desvio_padrao", "score_consistencia",
+    "eta_str", "eta_p10", "eta_p50", "eta_p90", "dias_restantes",
+    "streak_count", "current_streak_baixo", "melhor_dia_xp", "melhor_dia_data",
+    "tendencia_status", "ritmo",
+)
+
+
+def _compute_metrics(args) -> Dict[str, Any]:
+    # Executado em outro processo: importa aqui para manter o pickle leve
+    from metrics import calculate_all_metrics
+    df, level_target = args
+    metrics = calculate_all_metrics(df, level_target=level_target)
+    return {k: metrics[k] for k in BATCH_METRIC_KEYS}
+
+
+def run_batch(characters: List[Character], max_threads: int = 8,
+              max_processes: Optional[int] = None, compare: bool = True) -> Dict[str, Any]:
+    """
+    Carrega e calcula as métricas de todos os personagens em paralelo:
+    leituras da planilha (I/O) em threads e métricas (CPU) em processos.
+    Com `compare=True`, também mede a execução sequencial para comparação;
+    os dois caminhos releem as abas inteiras (`full_resync`), senão o
+    sequencial pegaria o snapshot já aquecido e sincronizaria só as novas.
+    """
+    from data_loader import load_sheet_data
+    from metrics import calculate_all_metrics
+
+    def load(c: Character):
+        return load_sheet_data(worksheet_name=c.worksheet, full_resync=compare)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(max_threads, len(characters))) as pool:
+        frames = list(pool.map(load, characters))
+    fetch_seconds = time.perf_counter() - start
+    with ProcessPoolExecutor(max_workers=max_processes) as pool:
+        results = list(pool.map(_compute_metrics, [(df, c.level_target) for df, c in zip(frames, characters)]))
+    parallel_seconds = time.perf_counter() - start
+
+    report = {
+        "characters": {c.name: r for c, r in zip(characters, results)},
+        "fetch_seconds": fetch_seconds,
+        "metrics_seconds": parallel_seconds - fetch_seconds,
+        "parallel_seconds": parallel_seconds,
+    }
+
+    if compare:
+        start = time.perf_counter()
+        for c in characters:
+            calculate_all_metrics(load(c), level_target=c.level_target)
+        report["sequential_seconds"] = time.perf_counter() - start
+        report["speedup"] = report["sequential_seconds"] / parallel_seconds if parallel_seconds else None
+
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calcula as métricas de todos os personagens em lote.")
+    parser.add_argument("--threads", type=int, default=8, help="threads para leitura da planilha")
+    parser.add_argument("--processes", type=int, default=None, help="processos para as métricas")
+    parser.add_argument("--no-compare", action="store_true", help="não mede a execução sequencial")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    report = run_batch(CHARACTERS, args.threads, args.processes, compare=not args.no_compare)
+
+    for name, m in report["characters"].items():
+        print(f"{name}: level {m['level_real']} | ETA {m['eta_str']} | streak {m['streak_count']}d")
+    print(f"Paralelo: {report['parallel_seconds']:.2f}s "
+          f"(leitura {report['fetch_seconds']:.2f}s, métricas {report['metrics_seconds']:.2f}s)")
+    if "sequential_seconds" in report:
+        print(f"Sequencial: {report['sequential_seconds']:.2f}s | speedup {report['speedup']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# collector.py
+import os
+import asyncio
+import logging
+import argparse
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Any
+
+import aiohttp
+
+from characters import Character, CHARACTERS
+
+logger = logging.getLogger(__name__)
+
+TIBIADATA_BASE_URL = os.getenv("TIBIADATA_BASE_URL", "https://api.tibiadata.com/v4")
+CATEGORY = "experience"
+WRITE_SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+
+
+class HighscoreCollector:
+    """
+    Coleta diária de XP na API de highscores do TibiaData, substituindo o
+    `tibiatracker.js`.
+
+    Para cada (mundo, vocação) busca as páginas em paralelo com um único
+    `aiohttp.ClientSession` (conexões reaproveitadas), em janelas de
+    `concurrency` páginas agendadas conforme as anteriores terminam, e para
+    assim que todos os personagens do grupo forem encontrados ou aparecer uma
+    página vazia ou incompleta (fim do ranking). A busca usa um índice
+    nome -> personagem, então uma única varredura resolve vários personagens.
+    """
+
+    def __init__(self, base_url: str = TIBIADATA_BASE_URL, concurrency: int = 8,
+                 max_pages: int = 20, retries: int = 3, backoff: float = 0.5, timeout: float = 15):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pages_fetched = 0
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                          world: str, vocation: str, page: int) -> Optional[Dict[str, Any]]:
+        """Bloco `highscores` da página, ou None se ela não pôde ser lida (erro ou resposta inválida)."""
+        url = f"{self.base_url}/highscores/{world}/{CATEGORY}/{vocation}/{page}"
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    async with session.get(url) as response:
+                        if response.status == 429 or response.status >= 500:
+                            raise aiohttp.ClientResponseError(
+                                response.request_info, response.history, status=response.status
+                            )
+                        response.raise_for_status()
+                        data = await response.json(content_type=None)
+                        self.pages_fetched += 1
+            except ValueError as e:
+                # Corpo que não é JSON (página de erro com status 200): a página
+                # é ignorada, como no tibiatracker.js
+                logger.warning(f"Resposta inválida na página {page} de {world}/{vocation}: {e}")
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, "status", None)
+                retryable = status is None or status == 429 or status >= 500
+                if attempt == self.retries or not retryable:
+                    logger.warning(f"Falha ao buscar página {page} de {world}/{vocation}: {e}")
+                    return None
+                delay = self.backoff * 2 ** attempt * (1 + random.random())
+                await asyncio.sleep(delay)
+            else:
+                if not isinstance(data, dict):
+                    logger.warning(f"Resposta inválida na página {page} de {world}/{vocation}")
+                    return None
+                return data.get("highscores") or {}
+        return None
+
+    async def _sweep(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                     world: str, vocation: str, characters: List[Character]) -> Dict[str, Dict[str, Any]]:
+        """Varre as páginas de um grupo até encontrar todos os personagens."""
+        pending = {c.name.lower(): c for c in characters}
+        found: Dict[str, Dict[str, Any]] = {}
+
+        def scan(highscores: Dict[str, Any]) -> None:
+            for entry in highscores.get("highscore_list") or []:
+                character = pending.pop(str(entry.get("name", "")).lower(), None)
+                if character is not None:
+                    found[character.name] = entry
+
+        first = await self._fetch_page(session, semaphore, world, vocation, 1) or {}
+        scan(first)
+        total_pages = (first.get("highscore_page") or {}).get("total_pages") or self.max_pages
+        last_page = min(total_pages, self.max_pages)
+        page_size = len(first.get("highscore_list") or [])
+        if first and page_size == 0:
+            last_page = 1
+
+        # Janela deslizante de `concurrency` páginas a partir da mais antiga ainda
+        # em voo: enquanto uma página espera nova tentativa, as seguintes não
+        # avançam além da janela, então a parada antecipada vale de fato
+        in_flight: Dict[asyncio.Task, int] = {}
+        dropped: List[asyncio.Task] = []
+        next_page = 2
+        try:
+            while pending:
+                oldest = min(in_flight.values(), default=next_page)
+                while next_page <= last_page and next_page < oldest + self.concurrency:
+                    task = asyncio.create_task(self._fetch_page(session, semaphore, world, vocation, next_page))
+                    in_flight[task] = next_page
+                    next_page += 1
+                if not in_flight:
+                    break
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = in_flight.pop(task)
+                    highscores = task.result()
+                    if highscores is None:
+                        continue  # página ilegível: não indica o fim do ranking
+                    scan(highscores)
+                    entries = len(highscores.get("highscore_list") or [])
+                    page_size = max(page_size, entries)
+                    if entries == 0 or entries < page_size:
+                        # Fim do ranking: as páginas seguintes estão vazias
+                        last_page = min(last_page, page)
+                        for other, other_page in list(in_flight.items()):
+                            if other_page > last_page:
+                                dropped.append(other)
+                                del in_flight[other]
+        finally:
+            dropped.extend(in_flight)
+            for task in dropped:
+                task.cancel()
+            await asyncio.gather(*dropped, return_exceptions=True)
+
+        for name in pending.values():
+            logger.warning(f"Personagem {name.name} não encontrado nas páginas 1 a {last_page} de {world}/{vocation}")
+        return found
+
+    async def collect(self, characters: List[Character]) -> Dict[str, Dict[str, Any]]:
+        """Retorna {nome do personagem: entrada do highscore} para os encontrados."""
+        groups: Dict[Tuple[str, str], List[Character]] = defaultdict(list)
+        for c in characters:
+            if not c.world:
+                logger.warning(f"Personagem {c.name} sem mundo configurado (world ou TIBIA_WORLD)")
+                continue
+            groups[(c.world, c.vocation)].append(c)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            results = await asyncio.gather(*[
+                self._sweep(session, semaphore, world, vocation, group)
+                for (world, vocation), group in groups.items()
+            ])
+
+        found: Dict[str, Dict[str, Any]] = {}
+        for r in results:
+            found.update(r)
+        return found
+
+
+def build_rows(characters: List[Character], found: Dict[str, Dict[str, Any]],
+               now: Optional[datetime] = None) -> Dict[str, List[List[Any]]]:
+    """Linhas no formato da planilha (data, nome, vocação, level, XP), agrupadas por aba."""
+    offset = float(os.getenv("COLLECTOR_UTC_OFFSET", "-3"))
+    now = now or datetime.now(timezone(timedelta(hours=offset)))
+    date = now.strftime("%d-%m-%Y")
+    rows: Dict[str, List[List[Any]]] = defaultdict(list)
+    for c in characters:
+        entry = found.get(c.name)
+        if entry is not None:
+            rows[c.worksheet].append([date, entry["name"], entry["vocation"], entry["level"], entry["value"]])
+    return rows
+
+
+def append_rows(rows: Dict[str, List[List[Any]]]) -> None:
+    """Grava as linhas com um único append por aba."""
+    import gspread
+    from sheets_client import load_google_credentials
+
+    client = gspread.authorize(load_google_credentials(WRITE_SCOPES))
+    sheet_id = os.getenv("GOOGLE_SPREADSHEET_ID") or "1sFde6uvz0UdR1Vd1KJ7kflxqZd_-ydJuphesMMOLyMA"
+    spreadsheet = client.open_by_key(sheet_id)
+    for worksheet, values in rows.items():
+        spreadsheet.worksheet(worksheet).append_rows(values, value_input_option="USER_ENTERED")
+        logger.info(f"{len(values)} linhas adicionadas em {worksheet}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Coleta a XP diária dos personagens no TibiaData.")
+    parser.add_argument("--concurrency", type=int, default=8, help="requisições simultâneas")
+    parser.add_argument("--max-pages", type=int, default=20, help="páginas de highscore por mundo/vocação")
+    parser.add_argument("--dry-run", action="store_true", help="só mostra as linhas, sem gravar na planilha")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    collector = HighscoreCollector(concurrency=args.concurrency, max_pages=args.max_pages)
+    found = asyncio.run(collector.collect(CHARACTERS))
+    rows = build_rows(CHARACTERS, found)
+    logger.info(f"{len(found)}/{len(CHARACTERS)} personagens encontrados em {collector.pages_fetched} páginas")
+
+    if args.dry_run:
+        for worksheet, values in rows.items():
+            for row in values:
+                print(worksheet, row)
+    elif rows:
+        append_rows(rows)
+
+
+if __name__ == "__main__":
+    main()
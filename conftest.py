@@ -0,0 +1,3 @@
+# conftest.py
+# Na raiz do repositório: o pytest põe este diretório no sys.path, então os
+# testes importam os módulos do projeto também com o comando `pytest`
@@ -1,52 +1,471 @@
 # data_loader.py
 import os
+import re
 import json
+import time
 import logging
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple
 
+import numpy as np
 import pandas as pd
-from google.oauth2.service_account import Credentials
-import gspread
+
+from instrumentation import stage, INVALID_ROWS
+from sheets_client import SHEETS_CLIENT
+from throttling import SingleFlight, sheets_call
+
+# gspread é importado só quando a planilha é lida (acelera o boot)
+if TYPE_CHECKING:
+    import gspread
 
 logger = logging.getLogger(__name__)
 
-def load_google_credentials() -> Credentials:
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets.readonly",
-        "https://www.googleapis.com/auth/drive.readonly"
-    ]
-
-    creds_json = os.getenv("GOOGLE_CREDENTIALS")
-    if creds_json:
-        try:
-            info = json.loads(creds_json)
-        except json.JSONDecodeError:
-            s = creds_json.strip().strip('"').replace("\\n", "\n")
-            info = json.loads(s)
-        return Credentials.from_service_account_info(info, scopes=scopes)
-    elif os.path.exists("credenciais.json"):
-        return Credentials.from_service_account_file("credenciais.json", scopes=scopes)
-    else:
-        raise ValueError("Defina GOOGLE_CREDENTIALS ou forneça credenciais.json")
-
-
-def load_sheet_data() -> pd.DataFrame:
-    """Carrega e pré-processa dados da planilha do Google Sheets."""
-    creds = load_google_credentials()
-    client = gspread.authorize(creds)
-
-    sheet_id = os.getenv("GOOGLE_SPREADSHEET_ID") or "1sFde6uvz0UdR1Vd1KJ7kflxqZd_-ydJuphesMMOLyMA"
-    worksheet_name = os.getenv("GOOGLE_WORKSHEET_NAME", "EXP/DIA")
-
-    sheet = client.open_by_key(sheet_id).worksheet(worksheet_name)
-    records = sheet.get_all_records()
-    df = pd.DataFrame(records)
+# Diretório do snapshot local (Parquet + metadados). Vazio desativa o cache.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", ".snapshots")
+
+# Esquema da planilha: formato exato da data, XP inteira e colunas categóricas
+DATE_FORMAT = os.getenv("SHEET_DATE_FORMAT", "%d-%m-%Y")
+REQUIRED_COLUMNS = ["create_at", "Experience"]
+CATEGORY_COLUMNS = ["Name", "Vocation"]
+# Com "1", linhas inválidas interrompem a carga em vez de serem descartadas
+STRICT_VALIDATION = os.getenv("SHEET_STRICT_VALIDATION", "0") == "1"
+# Datas gravadas como data pelo Sheets chegam como número de série (dias desde 30/12/1899)
+SHEETS_EPOCH = pd.Timestamp("1899-12-30")
+# Versão do formato dos metadados do snapshot; versões diferentes forçam releitura
+META_VERSION = 3
+# Marca (em `df.attrs`) dos dados vindos de uma releitura completa da aba: as
+# métricas incrementais só conferem o histórico inteiro nesses casos
+FULL_RESYNC_ATTR = "full_resync"
+# Intervalo (horas) entre conferências do histórico já sincronizado: data e XP
+# de todas as linhas são relidas e comparadas pelo fingerprint (0 = sempre)
+SHEET_VERIFY_HOURS = float(os.getenv("SHEET_VERIFY_HOURS", "24"))
+
+
+def _sheet_id() -> str:
+    return os.getenv("GOOGLE_SPREADSHEET_ID") or "1sFde6uvz0UdR1Vd1KJ7kflxqZd_-ydJuphesMMOLyMA"
+
+
+# Leituras simultâneas da mesma aba (várias requisições, o refresher) viram uma só
+_LOADS = SingleFlight("load_sheet_data")
+
+
+def load_sheet_data(worksheet_name: Optional[str] = None, full_resync: bool = False) -> pd.DataFrame:
+    """
+    Carrega e pré-processa dados da planilha do Google Sheets.
+    `worksheet_name` escolhe a aba (padrão: GOOGLE_WORKSHEET_NAME).
+
+    Com o snapshot local ativo, apenas as linhas adicionadas desde a última
+    sincronização são buscadas; `full_resync=True` força a releitura completa.
+    Chamadas simultâneas para a mesma aba compartilham a mesma leitura.
+    """
+    worksheet_name = worksheet_name or os.getenv("GOOGLE_WORKSHEET_NAME", "EXP/DIA")
+    return _LOADS.do((worksheet_name, full_resync), lambda: _load_sheet_data(worksheet_name, full_resync))
+
+
+def _load_sheet_data(worksheet_name: str, full_resync: bool) -> pd.DataFrame:
+    sheet_id = _sheet_id()
+    sheet = SHEETS_CLIENT.worksheet(sheet_id, worksheet_name)
+    from gspread.exceptions import APIError
+    try:
+        return _sync_sheet(sheet, sheet_id, worksheet_name, full_resync)
+    except APIError:
+        # A aba em cache pode ter sido renomeada ou removida: reabre na próxima leitura
+        SHEETS_CLIENT.invalidate(sheet_id, worksheet_name)
+        raise
+
+
+def _sync_sheet(sheet: "gspread.Worksheet", sheet_id: str, worksheet_name: str, full_resync: bool) -> pd.DataFrame:
+    if not SNAPSHOT_DIR:
+        df, _ = _sync_full(sheet)
+        df.attrs[FULL_RESYNC_ATTR] = True
+        logger.info(f"Dados carregados: {len(df)} registros")
+        return df
+
+    with stage("snapshot_read"):
+        snapshot = None if full_resync else read_snapshot(sheet_id, worksheet_name)
+    df, meta = None, None
+    if snapshot is not None:
+        df, meta = _sync_incremental(sheet, *snapshot)
+    full = df is None
+    if full:
+        df, meta = _sync_full(sheet)
+
+    with stage("snapshot_write"):
+        write_snapshot(sheet_id, worksheet_name, df, meta)
+    # Depois da gravação: a marca não vai para o Parquet (que guarda os attrs)
+    if full:
+        df.attrs[FULL_RESYNC_ATTR] = True
+    logger.info(f"Dados carregados: {len(df)} registros")
+    return df
+
+
+def load_cached_sheet_data(worksheet_name: Optional[str] = None, start: Optional[Any] = None,
+                           end: Optional[Any] = None) -> Optional[pd.DataFrame]:
+    """
+    Última leitura válida da aba gravada no snapshot local, sem acessar a API
+    (None se não houver). `start` e `end` (datas, inclusive) filtram as linhas
+    já na leitura do Parquet.
+    """
+    if not SNAPSHOT_DIR:
+        return None
+    worksheet_name = worksheet_name or os.getenv("GOOGLE_WORKSHEET_NAME", "EXP/DIA")
+    if start is None and end is None:
+        snapshot = read_snapshot(_sheet_id(), worksheet_name)
+        return snapshot[0] if snapshot is not None else None
+
+    data_path, _ = _snapshot_paths(_sheet_id(), worksheet_name)
+    if not os.path.exists(data_path):
+        return None
+    filters = []
+    if start is not None:
+        filters.append(("create_at", ">=", pd.Timestamp(start).normalize()))
+    if end is not None:
+        filters.append(("create_at", "<", pd.Timestamp(end).normalize() + pd.Timedelta(days=1)))
+    try:
+        return pd.read_parquet(data_path, filters=filters)
+    except Exception:
+        logger.warning("Snapshot local ilegível", exc_info=True)
+        return None
+
+
+def cached_sheet_synced_at(worksheet_name: Optional[str] = None) -> Optional[datetime]:
+    """Horário da última sincronização gravada no snapshot local (None se não houver)."""
+    if not SNAPSHOT_DIR:
+        return None
+    worksheet_name = worksheet_name or os.getenv("GOOGLE_WORKSHEET_NAME", "EXP/DIA")
+    _, meta_path = _snapshot_paths(_sheet_id(), worksheet_name)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return datetime.fromisoformat(json.load(f)["synced_at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def parse_sheet_records(records: List[Dict[str, Any]], prev_df: Optional[pd.DataFrame] = None,
+                        start_index: int = 0) -> pd.DataFrame:
+    """
+    Limpa registros crus da planilha (datas, XP numérica e `daily_exp`).
+
+    Caminho antigo, por registro (`get_all_records`): infere o formato da data
+    e descarta valores inválidos sem avisar. A carga usa `parse_sheet_columns`;
+    este fica para comparação nos benchmarks.
+
+    Se `prev_df` for informado, o `daily_exp` da primeira linha é calculado
+    a partir da última XP de `prev_df`, como se as linhas fossem contínuas.
+    """
+    df = pd.DataFrame(records, index=pd.RangeIndex(start_index, start_index + len(records)))
+    if df.empty:
+        return pd.DataFrame(columns=["create_at", "Experience", "daily_exp"])
 
     df["create_at"] = pd.to_datetime(df["create_at"], dayfirst=True, errors="coerce")
     df = df.dropna(subset=["create_at", "Experience"]).sort_values("create_at")
     df["Experience"] = pd.to_numeric(df["Experience"], errors="coerce")
-    df["daily_exp"] = df["Experience"].diff().fillna(0).clip(lower=0)
 
-    logger.info(f"Dados carregados: {len(df)} registros")
-    return df
\ No newline at end of file
+    exp = df["Experience"]
+    if prev_df is not None and not prev_df.empty:
+        exp = pd.concat([prev_df["Experience"].iloc[-1:], exp])
+    df["daily_exp"] = exp.diff().fillna(0).clip(lower=0).iloc[len(exp) - len(df):]
+    return df
+
+
+# === Ingestão colunar com esquema explícito ===
+
+@dataclass(frozen=True)
+class RowError:
+    """Célula rejeitada na validação; `row` é o número da linha na planilha."""
+    row: int
+    column: str
+    value: Any
+    reason: str
+
+
+class SheetValidationError(ValueError):
+    def __init__(self, errors: List[RowError]):
+        self.errors = errors
+        super().__init__(summarize_errors(errors))
+
+
+def summarize_errors(errors: List[RowError], limit: int = 5) -> str:
+    rows = sorted({e.row for e in errors})
+    examples = "; ".join(f"linha {e.row}, {e.column}={e.value!r}: {e.reason}" for e in errors[:limit])
+    more = f" (e mais {len(errors) - limit})" if len(errors) > limit else ""
+    return f"{len(rows)} linhas inválidas na planilha: {examples}{more}"
+
+
+def _is_blank(s: pd.Series) -> pd.Series:
+    return s.isna() | (s.astype(str).str.strip() == "")
+
+
+def _parse_dates(s: pd.Series, date_format: str = DATE_FORMAT) -> pd.Series:
+    """Texto no formato `date_format` ou número de série de data do Sheets."""
+    is_text = s.map(type) == str
+    dates = pd.to_datetime(s.where(is_text).str.strip(), format=date_format, errors="coerce")
+    serial = pd.to_numeric(s.where(~is_text), errors="coerce")
+    return dates.fillna(SHEETS_EPOCH + pd.to_timedelta(serial, unit="D"))
+
+
+def parse_sheet_columns(columns: Dict[str, List[Any]], first_row: int = 2,
+                        prev_df: Optional[pd.DataFrame] = None,
+                        start_index: int = 0,
+                        date_format: str = DATE_FORMAT) -> Tuple[pd.DataFrame, List[RowError]]:
+    """
+    Monta o DataFrame a partir das colunas cruas da planilha (uma lista por
+    coluna), aplicando o esquema: data no formato exato, Experience int64 e
+    Name/Vocation categóricas.
+
+    Linhas totalmente vazias são ignoradas; as demais que não passam na
+    validação ficam de fora e são devolvidas como `RowError`. `first_row` é o
+    número na planilha da primeira linha; `prev_df` e `start_index` têm o
+    mesmo papel que em `parse_sheet_records`. `date_format` troca o formato
+    de SHEET_DATE_FORMAT (ex.: exportações em outro formato).
+    """
+    n = max((len(v) for v in columns.values()), default=0)
+    raw = {c: pd.Series(list(v) + [""] * (n - len(v)), dtype=object) for c, v in columns.items()}
+    if n == 0:
+        return pd.DataFrame(columns=["create_at", "Experience", "daily_exp"]), []
+
+    blank = {c: _is_blank(v) for c, v in raw.items()}
+    empty_row = np.logical_and.reduce([b.to_numpy() for b in blank.values()])
+
+    dates = _parse_dates(raw["create_at"], date_format)
+    exp = pd.to_numeric(raw["Experience"].where(~blank["Experience"]), errors="coerce")
+    checks = {
+        "create_at": [(blank["create_at"], "vazio"), (dates.isna(), f"data fora do formato {date_format}")],
+        "Experience": [(blank["Experience"], "vazio"), (exp.isna(), "XP não numérica"),
+                       (exp % 1 != 0, "XP não inteira"), (exp < 0, "XP negativa")],
+    }
+
+    invalid = np.zeros(n, dtype=bool)
+    errors: List[RowError] = []
+    for column, rules in checks.items():
+        flagged = np.zeros(n, dtype=bool)
+        for mask, reason in rules:
+            # Só a primeira regra que falha em cada célula é reportada
+            hit = mask.to_numpy() & ~flagged & ~empty_row
+            for i in np.flatnonzero(hit):
+                errors.append(RowError(first_row + int(i), column, raw[column].iat[i], reason))
+            flagged |= hit
+        invalid |= flagged
+    errors.sort(key=lambda e: e.row)
+
+    keep = ~invalid & ~empty_row
+    df = pd.DataFrame({
+        "create_at": dates[keep].to_numpy(),
+        "Experience": exp[keep].to_numpy().astype(np.int64),
+    }, index=pd.Index(np.flatnonzero(keep) + start_index))
+    for c in CATEGORY_COLUMNS:
+        if c in raw:
+            df[c] = pd.Categorical(raw[c][keep].astype(str).str.strip().to_numpy())
+
+    df = df.sort_values("create_at", kind="stable")
+    exp = df["Experience"]
+    if prev_df is not None and not prev_df.empty:
+        exp = pd.concat([prev_df["Experience"].iloc[-1:], exp])
+    df["daily_exp"] = exp.diff().fillna(0).clip(lower=0).iloc[len(exp) - len(df):]
+    return df, errors
+
+
+def _column_letter(position: int) -> str:
+    from gspread.utils import rowcol_to_a1
+    return re.sub(r"\d+", "", rowcol_to_a1(1, position + 1))
+
+
+def _fetch_columns(sheet: "gspread.Worksheet", header: List[str], first_row: int,
+                   with_header: bool = False, columns: Optional[List[str]] = None,
+                   last_row: Optional[int] = None) -> Tuple[Optional[List[str]], Dict[str, List[Any]]]:
+    """
+    Lê só as colunas usadas (ou `columns`), de `first_row` até `last_row` (ou
+    o fim), em um único batch_get por coluna (valores sem formatação: números
+    chegam como números). Com `with_header`, busca também a linha 1 na mesma chamada.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes na planilha: {', '.join(missing)}")
+    wanted = [c for c in columns or REQUIRED_COLUMNS + CATEGORY_COLUMNS if c in header]
+    end = "" if last_row is None else str(last_row)
+    ranges = [f"{_column_letter(header.index(c))}{first_row}:{_column_letter(header.index(c))}{end}" for c in wanted]
+    if with_header:
+        ranges.insert(0, "1:1")
+
+    from gspread.utils import Dimension, ValueRenderOption
+    with stage("sheet_fetch"):
+        result = sheets_call(sheet.batch_get, ranges, major_dimension=Dimension.cols,
+                             value_render_option=ValueRenderOption.unformatted)
+    current_header = None
+    if with_header:
+        # Em colunas, a linha 1 vem como uma lista de um elemento por coluna
+        current_header = [str(col[0]) if col else "" for col in result.pop(0)]
+    return current_header, {c: list(vr[0]) if vr else [] for c, vr in zip(wanted, result)}
+
+
+def _row_values(columns: Dict[str, List[Any]], i: int) -> List[Any]:
+    return [v[i] if i < len(v) else "" for v in columns.values()]
+
+
+def _raw_fingerprint(columns: Dict[str, List[Any]], first_row: int, rows: int) -> int:
+    """
+    Soma (mod 2^64) dos hashes de data e XP crus de cada linha, junto com o
+    número da linha: a soma de blocos seguidos é a do trecho inteiro, então a
+    sincronização incremental só soma as linhas novas.
+    """
+    if rows <= 0:
+        return 0
+    frame = pd.DataFrame(
+        {c: [str(v) for v in columns.get(c, [])[:rows]] + [""] * max(0, rows - len(columns.get(c, [])))
+         for c in REQUIRED_COLUMNS},
+        index=pd.RangeIndex(first_row, first_row + rows)
+    )
+    return int(pd.util.hash_pandas_object(frame, index=True).sum()) % 2 ** 64
+
+
+def _report_ingest(sheet: "gspread.Worksheet", rows: int, seconds: float, errors: List[RowError]) -> None:
+    title = getattr(sheet, "title", "?")
+    rate = rows / seconds if seconds > 0 else float("inf")
+    logger.info(f"Ingestão de {title}: {rows} linhas em {seconds:.3f}s ({rate:,.0f} linhas/s)")
+    INVALID_ROWS.set(len({e.row for e in errors}), worksheet=title)
+    if errors:
+        if STRICT_VALIDATION:
+            raise SheetValidationError(errors)
+        logger.warning(f"{title}: {summarize_errors(errors)}")
+
+
+# === Snapshot local e sincronização incremental ===
+
+def _snapshot_paths(sheet_id: str, worksheet_name: str) -> Tuple[str, str]:
+    key = re.sub(r"[^A-Za-z0-9_-]+", "_", f"{sheet_id}_{worksheet_name}")
+    base = os.path.join(SNAPSHOT_DIR, key)
+    return base + ".parquet", base + ".json"
+
+
+def read_snapshot(sheet_id: str, worksheet_name: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+    """Lê o snapshot salvo em disco; retorna None se ausente ou corrompido."""
+    data_path, meta_path = _snapshot_paths(sheet_id, worksheet_name)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        df = pd.read_parquet(data_path)
+    except Exception:
+        logger.warning("Snapshot local ilegível, refazendo sincronização completa", exc_info=True)
+        return None
+    return df, meta
+
+
+def write_snapshot(sheet_id: str, worksheet_name: str, df: pd.DataFrame, meta: Dict[str, Any]) -> None:
+    """Grava o snapshot de forma atômica (arquivo temporário + os.replace)."""
+    data_path, meta_path = _snapshot_paths(sheet_id, worksheet_name)
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        df.to_parquet(data_path + ".tmp")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(dict(meta, synced_at=datetime.now().isoformat()), f, ensure_ascii=False)
+        os.replace(data_path + ".tmp", data_path)
+        os.replace(meta_path + ".tmp", meta_path)
+    except Exception:
+        logger.warning("Não foi possível gravar o snapshot local", exc_info=True)
+
+
+def _pad_row(row: List[Any], width: int) -> List[Any]:
+    return list(row) + [""] * (width - len(row))
+
+
+def _sync_full(sheet: "gspread.Worksheet") -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    start = time.perf_counter()
+    with stage("sheet_fetch"):
+        header = [str(h) for h in sheets_call(sheet.row_values, 1)]
+    _, columns = _fetch_columns(sheet, header, first_row=2)
+    with stage("parse"):
+        df, errors = parse_sheet_columns(columns, first_row=2)
+    raw_rows = max((len(v) for v in columns.values()), default=0)
+    _report_ingest(sheet, raw_rows, time.perf_counter() - start, errors)
+
+    meta = {
+        "version": META_VERSION,
+        "header": header,
+        "raw_rows": raw_rows,
+        "last_row": _row_values(columns, raw_rows - 1) if raw_rows else None,
+        "invalid_rows": sorted({e.row for e in errors}),
+        "fingerprint": _raw_fingerprint(columns, 2, raw_rows),
+        "verified_at": datetime.now().isoformat(),
+    }
+    logger.info(f"Sincronização completa: {raw_rows} linhas lidas")
+    return df, meta
+
+
+def _sync_incremental(sheet: "gspread.Worksheet", cached: pd.DataFrame,
+                      meta: Dict[str, Any]) -> Tuple[Optional[pd.DataFrame], Optional[Dict[str, Any]]]:
+    """
+    Busca somente as linhas após a última conhecida, validando a sobreposição.
+
+    Retorna (None, None) quando detecta edição (cabeçalho alterado, última
+    linha conhecida diferente, linhas removidas ou datas fora de ordem) ou
+    quando há linhas inválidas pendentes, que podem ter sido corrigidas,
+    sinalizando que é preciso uma sincronização completa. Edições em linhas
+    anteriores aparecem na conferência periódica (`_history_changed`).
+    """
+    header, raw_rows, last_row = meta.get("header"), meta.get("raw_rows", 0), meta.get("last_row")
+    if meta.get("version") != META_VERSION or not header or not raw_rows or last_row is None:
+        return None, None
+    if meta.get("invalid_rows"):
+        logger.info("Há linhas inválidas pendentes, refazendo sincronização completa")
+        return None, None
+    if _verify_due(meta):
+        if _history_changed(sheet, meta):
+            logger.info("Linhas já sincronizadas foram editadas, refazendo sincronização completa")
+            return None, None
+        meta = dict(meta, verified_at=datetime.now().isoformat())
+
+    # Linha 1 = cabeçalho; a última linha conhecida está em raw_rows + 1
+    start = time.perf_counter()
+    current_header, tail = _fetch_columns(sheet, header, first_row=raw_rows + 1, with_header=True)
+
+    if _pad_row(current_header, len(header)) != header or len(current_header) > len(header):
+        logger.info("Cabeçalho da planilha mudou, refazendo sincronização completa")
+        return None, None
+
+    tail_rows = max((len(v) for v in tail.values()), default=0)
+    if not tail_rows or _row_values(tail, 0) != last_row:
+        logger.info("Linhas existentes foram editadas ou removidas, refazendo sincronização completa")
+        return None, None
+
+    if tail_rows == 1:
+        return cached, meta
+
+    new_columns = {c: v[1:] for c, v in tail.items()}
+    with stage("parse"):
+        new_df, errors = parse_sheet_columns(
+            new_columns, first_row=raw_rows + 2, prev_df=cached, start_index=raw_rows
+        )
+    _report_ingest(sheet, tail_rows - 1, time.perf_counter() - start, errors)
+    if not new_df.empty and not cached.empty and new_df["create_at"].min() <= cached["create_at"].max():
+        logger.info("Novas linhas fora de ordem cronológica, refazendo sincronização completa")
+        return None, None
+
+    df = pd.concat([cached, new_df]) if not new_df.empty else cached
+    for c in CATEGORY_COLUMNS:
+        if c in df:
+            df[c] = df[c].astype("category")
+    meta = dict(
+        meta, raw_rows=raw_rows + tail_rows - 1, last_row=_row_values(tail, tail_rows - 1),
+        invalid_rows=sorted({e.row for e in errors}),
+        fingerprint=(meta["fingerprint"] + _raw_fingerprint(new_columns, raw_rows + 2, tail_rows - 1)) % 2 ** 64
+    )
+    logger.info(f"Sincronização incremental: {tail_rows - 1} novas linhas")
+    return df, meta
+
+
+def _verify_due(meta: Dict[str, Any]) -> bool:
+    try:
+        verified_at = datetime.fromisoformat(meta["verified_at"])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return (datetime.now() - verified_at).total_seconds() >= SHEET_VERIFY_HOURS * 3600
+
+
+def _history_changed(sheet: "gspread.Worksheet", meta: Dict[str, Any]) -> bool:
+    """Relê data e XP das linhas já sincronizadas e compara com o fingerprint salvo."""
+    raw_rows = meta["raw_rows"]
+    _, columns = _fetch_columns(sheet, meta["header"], first_row=2, columns=REQUIRED_COLUMNS, last_row=raw_rows + 1)
+    return _raw_fingerprint(columns, 2, raw_rows) != meta.get("fingerprint")
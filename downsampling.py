@@ -0,0 +1,115 @@
+# downsampling.py
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Limite de pontos por trace enviado ao navegador (por trecho: ver FULL_RESOLUTION_DAYS)
+MAX_POINTS_PER_TRACE = int(os.getenv("MAX_POINTS_PER_TRACE", "1000"))
+# Dias finais com orçamento próprio de MAX_POINTS_PER_TRACE pontos: o filtro
+# de período do navegador (30/90/365 dias, assets/date_range.js) só ajusta o
+# eixo, e com uma leitura por dia essa janela vai inteira
+FULL_RESOLUTION_DAYS = int(os.getenv("FULL_RESOLUTION_DAYS", "365"))
+
+
+def _as_numeric(x: np.ndarray) -> np.ndarray:
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Índices escolhidos pelo Largest-Triangle-Three-Buckets: mantém o primeiro e
+    o último ponto e, em cada balde, o ponto que forma o maior triângulo com o
+    ponto anterior escolhido e a média do balde seguinte.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    xf, yf = _as_numeric(np.asarray(x)), np.nan_to_num(np.asarray(y, dtype=np.float64))
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[next_start:next_end].mean() if next_end > next_start else xf[-1]
+        avg_y = yf[next_start:next_end].mean() if next_end > next_start else yf[-1]
+        area = np.abs(
+            (xf[a] - avg_x) * (yf[start:end] - yf[a]) - (xf[a] - xf[start:end]) * (avg_y - yf[a])
+        )
+        a = start + int(area.argmax()) if end > start else start
+        selected[i + 1] = a
+    return np.unique(selected)
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Índices do mínimo e do máximo de cada balde (preserva picos em barras e marcadores)."""
+    n = len(y)
+    if max_points >= n or max_points < 2:
+        return np.arange(n)
+    yf = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    buckets = max_points // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    mins = np.minimum.reduceat(yf, starts)
+    maxs = np.maximum.reduceat(yf, starts)
+    idx = []
+    for s, e, lo, hi in zip(starts, edges[1:], mins, maxs):
+        segment = yf[s:e]
+        idx.append(s + int(np.argmax(segment == lo)))
+        idx.append(s + int(np.argmax(segment == hi)))
+    return np.unique(np.array(idx, dtype=np.int64))
+
+
+def downsample(x: pd.Series, y: pd.Series, max_points: Optional[int] = MAX_POINTS_PER_TRACE,
+               method: str = "lttb", full_days: int = FULL_RESOLUTION_DAYS) -> Tuple[pd.Series, pd.Series]:
+    """
+    Reduz uma série (x, y) para o navegador. Com x em datas e histórico
+    anterior aos últimos `full_days` dias, a janela recente e o trecho
+    anterior têm `max_points` pontos cada (no máximo 2 * `max_points`; com uma
+    leitura por dia, a janela recente fica inteira); senão, `max_points` no total.
+    """
+    if not max_points or len(x) <= max_points:
+        return x, y
+    if full_days and np.issubdtype(x.dtype, np.datetime64):
+        split = int(x.searchsorted(x.iloc[-1].normalize() - pd.Timedelta(days=full_days - 1), side="left"))
+        if split > 0:
+            head_x, head_y = downsample(x.iloc[:split], y.iloc[:split], max_points, method, full_days=0)
+            tail_x, tail_y = downsample(x.iloc[split:], y.iloc[split:], max_points, method, full_days=0)
+            return pd.concat([head_x, tail_x]), pd.concat([head_y, tail_y])
+    if method == "minmax":
+        idx = minmax_indices(y.to_numpy(), max_points)
+    else:
+        idx = lttb_indices(x.to_numpy(), y.to_numpy(), max_points)
+    return x.iloc[idx], y.iloc[idx]
+
+
+def select_x_range(df: pd.DataFrame, x_range: Optional[Tuple[Any, Any]], column: str = "create_at") -> pd.DataFrame:
+    """Linhas dentro de `x_range`, mais um ponto de cada lado para as linhas não cortarem na borda."""
+    if not x_range:
+        return df
+    x = df[column]
+    start = int(x.searchsorted(pd.Timestamp(x_range[0]), side="left"))
+    end = int(x.searchsorted(pd.Timestamp(x_range[1]), side="right"))
+    return df.iloc[max(0, start - 1):min(len(df), end + 1)]
+
+
+def parse_x_range(relayout: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str]]:
+    """
+    Intervalo do eixo x a partir do `relayoutData` de um dcc.Graph.
+    Retorna None para autoscale/reset ou quando o eixo x não mudou.
+    """
+    if not relayout or relayout.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout and "xaxis.range[1]" in relayout:
+        return relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    if "xaxis.range" in relayout:
+        start, end = relayout["xaxis.range"]
+        return start, end
+    return None
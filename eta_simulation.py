@@ -0,0 +1,177 @@
+# eta_simulation.py
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+
+from rollups import Rollups
+
+# Caminhos simulados, meia-vida (em dias) do peso dos dias recentes (0 = sem
+# peso) e horizonte máximo da simulação
+ETA_SIM_PATHS = int(os.getenv("ETA_SIM_PATHS", "100000"))
+ETA_RECENT_HALF_LIFE_DAYS = float(os.getenv("ETA_RECENT_HALF_LIFE_DAYS", "90"))
+ETA_HORIZON_DAYS = int(os.getenv("ETA_HORIZON_DAYS", "3650"))
+
+PERCENTILES = (10, 50, 90)
+# Os caminhos andam em "superblocos" de SUPER_BLOCKS x BLOCK_DAYS dias. Os
+# blocos são sorteados dia a dia para um conjunto pré-amostrado, e os
+# superblocos, bloco a bloco; as somas parciais de cada nível localizam o
+# dia exato em que a meta é cruzada
+BLOCK_DAYS = 32
+SUPER_BLOCKS = 16
+BLOCK_POOL = 16384
+SUPER_POOL = 8192
+# Caminhos usados para as faixas do gráfico em leque
+FAN_PATHS = 4000
+
+
+@dataclass(frozen=True)
+class EtaSimulation:
+    """
+    Resultado da simulação: dias até o alvo nos percentis P10/P50/P90 (None
+    se o percentil passa do horizonte) e as faixas de XP acumulada por bloco,
+    usadas no gráfico em leque.
+    """
+    start: date
+    xp_start: float
+    xp_target: float
+    n_paths: int
+    days: Tuple[Optional[int], ...]
+    prob_within_horizon: float
+    fan_days: np.ndarray
+    fan_xp: np.ndarray  # (len(PERCENTILES), len(fan_days))
+
+    def date_for(self, percentile: int) -> Optional[date]:
+        days = self.days[PERCENTILES.index(percentile)]
+        return None if days is None else self.start + timedelta(days=days)
+
+    def date_str(self, percentile: int) -> str:
+        d = self.date_for(percentile)
+        return d.strftime("%d/%m/%Y") if d else f"> {ETA_HORIZON_DAYS // 365} anos"
+
+    def cache_key(self) -> str:
+        return f"eta:{self.start}:{self.xp_start}:{self.xp_target}:{self.n_paths}:{self.days}"
+
+
+def daily_distribution(rollups: Rollups, half_life_days: float = ETA_RECENT_HALF_LIFE_DAYS,
+                       include_zero_days: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    XP por dia de calendário e o peso de cada dia no sorteio.
+
+    O ganho registrado depois de uma lacuna na planilha é dividido igualmente
+    entre os dias sem registro. Os pesos decaem exponencialmente com a idade
+    do dia (`half_life_days`; 0 desativa).
+    """
+    daily = rollups.daily["sum"]
+    if daily.empty:
+        return np.array([]), np.array([])
+    dates = daily.index
+    span = np.diff(dates.values).astype("timedelta64[D]").astype(np.int64)
+    span = np.concatenate(([1], np.maximum(span, 1)))
+    values = np.repeat(daily.to_numpy(dtype=np.float64) / span, span)
+
+    age = np.arange(len(values))[::-1].astype(np.float64)
+    weights = 0.5 ** (age / half_life_days) if half_life_days > 0 else np.ones(len(values))
+    if not include_zero_days:
+        weights = np.where(values > 0, weights, 0.0)
+    return values, weights
+
+
+def simulate_eta(values: np.ndarray, weights: np.ndarray, xp_remaining: float, xp_start: float = 0.0,
+                 n_paths: int = ETA_SIM_PATHS, horizon_days: int = ETA_HORIZON_DAYS,
+                 seed: int = 0, start: Optional[date] = None) -> Optional[EtaSimulation]:
+    """
+    Monte Carlo por bootstrap dos dias: `n_paths` trajetórias de XP diária
+    sorteada (com reposição, pelos pesos) até somar `xp_remaining`.
+
+    Em vez de sortear dia a dia, cada trajetória sorteia superblocos de um
+    conjunto pré-amostrado (veja BLOCK_DAYS); o dia exato da chegada sai das
+    somas parciais do superbloco e do bloco em que a meta é cruzada.
+    """
+    start = start or date.today()
+    if xp_remaining <= 0 or len(values) == 0 or weights.sum() <= 0 or (values * weights).sum() <= 0:
+        return None
+
+    rng = np.random.default_rng(seed)
+    p = weights / weights.sum()
+    # Nível 1: blocos de dias (somas parciais por dia)
+    blocks = rng.choice(values, size=(BLOCK_POOL, BLOCK_DAYS), p=p).cumsum(axis=1)
+    # Nível 2: superblocos de blocos (somas parciais por bloco)
+    super_picks = rng.integers(BLOCK_POOL, size=(SUPER_POOL, SUPER_BLOCKS))
+    supers = blocks[super_picks, -1].cumsum(axis=1)
+
+    # Nível 3: trajetórias de superblocos até o horizonte
+    super_days = BLOCK_DAYS * SUPER_BLOCKS
+    n_supers = -(-horizon_days // super_days)
+    picks = rng.integers(SUPER_POOL, size=(n_paths, n_supers))
+    cum = supers[picks, -1].cumsum(axis=1)
+
+    # Descida pelos níveis: superbloco, bloco e dia em que a meta é cruzada
+    rows = np.arange(n_paths)
+    finished = cum[:, -1] >= xp_remaining
+    j = np.minimum((cum < xp_remaining).sum(axis=1), n_supers - 1)
+    remaining = xp_remaining - np.where(j > 0, cum[rows, j - 1], 0.0)
+    sb = picks[rows, j]
+    b = np.minimum((supers[sb] < remaining[:, None]).sum(axis=1), SUPER_BLOCKS - 1)
+    remaining -= np.where(b > 0, supers[sb, b - 1], 0.0)
+    d = np.minimum((blocks[super_picks[sb, b]] < remaining[:, None]).sum(axis=1), BLOCK_DAYS - 1)
+
+    never = np.iinfo(np.int64).max
+    days = j * super_days + b * BLOCK_DAYS + d + 1
+    days = np.where(finished & (days <= horizon_days), days, never)
+
+    # Percentis com os não concluídos ordenados no fim (None se caírem lá)
+    sorted_days = np.sort(days)
+    percentile_days = []
+    for q in PERCENTILES:
+        value = sorted_days[min(n_paths - 1, int(np.ceil(q / 100 * n_paths)) - 1)]
+        percentile_days.append(None if value == never else int(value))
+
+    # Faixas do leque por bloco, em uma amostra das trajetórias
+    m = min(FAN_PATHS, n_paths)
+    offsets = np.concatenate([np.zeros((m, 1)), cum[:m, :-1]], axis=1)
+    fan_cum = (offsets[:, :, None] + supers[picks[:m]]).reshape(m, -1)
+    fan_xp = np.percentile(fan_cum, PERCENTILES, axis=0) + xp_start
+    fan_days = np.arange(1, fan_cum.shape[1] + 1) * BLOCK_DAYS
+
+    return EtaSimulation(
+        start=start,
+        xp_start=float(xp_start),
+        xp_target=float(xp_start + xp_remaining),
+        n_paths=n_paths,
+        days=tuple(percentile_days),
+        prob_within_horizon=float((days != never).mean()),
+        fan_days=np.concatenate(([0], fan_days)),
+        fan_xp=np.concatenate([np.full((len(PERCENTILES), 1), float(xp_start)), fan_xp], axis=1),
+    )
+
+
+# Uma simulação por snapshot: a chave muda quando os agregados, a XP ou o dia mudam
+_cache: "OrderedDict[tuple, Optional[EtaSimulation]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 16
+
+
+def simulate_from_rollups(rollups: Rollups, xp_remaining: float, xp_start: float = 0.0,
+                          n_paths: int = ETA_SIM_PATHS) -> Optional[EtaSimulation]:
+    """`simulate_eta` sobre a distribuição diária dos agregados, com cache."""
+    daily = rollups.daily
+    key = (rollups.cache_key(), float(daily["sum"].sum()) if not daily.empty else 0.0,
+           str(daily.index.max()) if not daily.empty else None,
+           float(xp_remaining), float(xp_start), n_paths, date.today())
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    values, weights = daily_distribution(rollups)
+    sim = simulate_eta(values, weights, xp_remaining, xp_start=xp_start, n_paths=n_paths)
+    with _cache_lock:
+        _cache[key] = sim
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return sim
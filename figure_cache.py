@@ -0,0 +1,128 @@
+# figure_cache.py
+import os
+import json
+import hashlib
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+# id(df) -> (referência fraca, fingerprint); DataFrames não são hashable
+_fingerprints: Dict[int, Tuple[weakref.ref, str]] = {}
+_fingerprints_lock = threading.Lock()
+
+
+def dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Fingerprint do conteúdo do DataFrame (valores, índice e colunas).
+
+    O resultado é memorizado por objeto: os DataFrames do dashboard são
+    tratados como imutáveis depois de montados.
+    """
+    with _fingerprints_lock:
+        cached = _fingerprints.get(id(df))
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    fingerprint = h.hexdigest()
+    key = id(df)
+    with _fingerprints_lock:
+        _fingerprints[key] = (weakref.ref(df, lambda _: _fingerprints.pop(key, None)), fingerprint)
+    return fingerprint
+
+
+def _fingerprint_arg(value: Any) -> str:
+    if isinstance(value, pd.DataFrame):
+        return "df:" + dataframe_fingerprint(value)
+    if hasattr(value, "cache_key"):
+        return value.cache_key()
+    if hasattr(value, "to_dict"):
+        return json.dumps(value.to_dict(), sort_keys=True, default=str)
+    return repr(value)
+
+
+class FigureCache:
+    """
+    Cache LRU de figuras serializadas, limitado por número de entradas e bytes.
+
+    A chave combina o nome do builder com o fingerprint dos argumentos; o valor
+    guardado é o JSON da figura, então um acerto pula a construção e a
+    validação do Plotly e devolve apenas o dicionário decodificado.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def figure(self, builder: Callable[..., Any], *args, **kwargs) -> Dict[str, Any]:
+        """Retorna a figura de `builder(*args, **kwargs)`, construindo só em caso de falha no cache."""
+        # A data entra na chave porque alguns gráficos projetam datas a partir de hoje
+        parts = [date.today().isoformat()]
+        parts += [_fingerprint_arg(a) for a in args]
+        parts += [f"{k}={_fingerprint_arg(v)}" for k, v in sorted(kwargs.items())]
+        key = (builder.__name__, "|".join(parts))
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if payload is None:
+            with stage(f"figure.{builder.__name__}"):
+                fig = builder(*args, **kwargs)
+            with stage("figure_serialize"):
+                payload = fig.to_json()
+            self._store(key, payload)
+            logger.debug(f"Figura {builder.__name__} construída ({len(payload)} bytes)")
+        return json.loads(payload)
+
+    def _store(self, key: Tuple[str, str], payload: str) -> None:
+        with self._lock:
+            self.misses += 1
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+FIGURE_CACHE = FigureCache(
+    max_entries=int(os.getenv("FIGURE_CACHE_SIZE", "64")),
+    max_bytes=int(os.getenv("FIGURE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+)
@@ -1,40 +1,63 @@
 # figures.py
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-from scipy import stats
-from xp_calculator import cumulative_exp_closed
+from milestones import MilestoneIndex, MILESTONES
+from downsampling import downsample, select_x_range, MAX_POINTS_PER_TRACE
+from rollups import Rollups, ensure_rollups, DIAS_SEMANA
+from rolling_stats import RollingStats, ensure_rolling
+from eta_simulation import EtaSimulation
 from datetime import datetime, timedelta
+from typing import Optional, Tuple, Any
+
+XRange = Optional[Tuple[Any, Any]]
+
+
+def _px():
+    """plotly.express só é importado no primeiro gráfico que o usa (acelera o boot)."""
+    import plotly.express as px
+    return px
+
+
+def _zoomed(fig: go.Figure, x_range: XRange) -> go.Figure:
+    """Mantém o zoom do usuário quando a figura é recarregada em resolução maior."""
+    fig.update_layout(uirevision="zoom")
+    if x_range:
+        fig.update_xaxes(range=list(x_range))
+    return fig
 
 
 def create_roadmap_figure(level_real: int, level_target: int = 1000) -> go.Figure:
     fig = go.Figure()
     fig.add_trace(go.Bar(x=[level_target], y=["Progresso"], orientation='h', marker_color="#333", showlegend=False))
     fig.add_trace(go.Bar(x=[level_real], y=["Progresso"], orientation='h', marker_color="#E6BC53", name="Atual"))
-    for m in [200, 400, 600, 800, 900, 1000]:
+    for m in MILESTONES:
         fig.add_vline(x=m, line_dash="dash", line_color="white")
     fig.update_layout(
         showlegend=False, barmode='overlay', height=80,
         margin=dict(l=0, r=0, t=0, b=0),
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
-        xaxis=dict(range=[0, 1000]),
+        xaxis=dict(range=[0, max(level_target, 1000)]),
         yaxis=dict(showticklabels=False),
         font_color="white"
     )
     return fig
 
 
-def create_moving_avg_figure(df: pd.DataFrame) -> go.Figure:
-    df = df.copy()
-    df["MM7"] = df["daily_exp"].rolling(window=7, min_periods=1).mean()
-    df["MM30"] = df["daily_exp"].rolling(window=30, min_periods=1).mean()
+def create_moving_avg_figure(df: pd.DataFrame, rolling: Optional[RollingStats] = None, x_range: XRange = None,
+                             max_points: Optional[int] = MAX_POINTS_PER_TRACE) -> go.Figure:
+    rolling = ensure_rolling(df, rolling)
+    df = df[["create_at", "daily_exp"]].assign(MM7=rolling.mean(7), MM30=rolling.mean(30))
+    df = select_x_range(df, x_range)
 
+    x_d, y_d = downsample(df["create_at"], df["daily_exp"] / 1e6, max_points, method="minmax")
+    x_7, y_7 = downsample(df["create_at"], df["MM7"] / 1e6, max_points)
+    x_30, y_30 = downsample(df["create_at"], df["MM30"] / 1e6, max_points)
     fig = go.Figure([
-        go.Scatter(x=df["create_at"], y=df["daily_exp"]/1e6, mode='lines+markers', name="Diário", line=dict(color='#17a2b8')),
-        go.Scatter(x=df["create_at"], y=df["MM7"]/1e6, name="MM 7 dias", line=dict(color='#ffc107', width=3)),
-        go.Scatter(x=df["create_at"], y=df["MM30"]/1e6, name="MM 30 dias", line=dict(color='#dc3545', width=3))
+        go.Scatter(x=x_d, y=y_d, mode='lines+markers', name="Diário", line=dict(color='#17a2b8')),
+        go.Scatter(x=x_7, y=y_7, name="MM 7 dias", line=dict(color='#ffc107', width=3)),
+        go.Scatter(x=x_30, y=y_30, name="MM 30 dias", line=dict(color='#dc3545', width=3))
     ])
     fig.update_layout(
         title="XP Diário + Médias Móveis",
@@ -43,22 +66,13 @@ def create_moving_avg_figure(df: pd.DataFrame) -> go.Figure:
         xaxis_title="Data", yaxis_title="XP (milhões)",
         legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01, bgcolor="rgba(0,0,0,0.5)")
     )
-    return fig
+    return _zoomed(fig, x_range)
 
 
-def create_heatmap_figure(df: pd.DataFrame) -> go.Figure:
-    df_heat = df.copy()
-    df_heat['Semana'] = "S" + df_heat['create_at'].dt.strftime('%V')
-    df_heat['Dia'] = df_heat['create_at'].dt.day_name().map({
-        'Monday': 'Seg', 'Tuesday': 'Ter', 'Wednesday': 'Qua',
-        'Thursday': 'Qui', 'Friday': 'Sex', 'Saturday': 'Sab', 'Sunday': 'Dom'
-    })
-    pivot = df_heat.pivot_table(
-        index='Dia', columns='Semana', values='daily_exp',
-        aggfunc='sum', fill_value=0
-    ).reindex(['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sab', 'Dom'])
+def create_heatmap_figure(df: pd.DataFrame, rollups: Optional[Rollups] = None) -> go.Figure:
+    pivot = ensure_rollups(df, rollups).weekday_by_week("sum")
 
-    fig = px.imshow(pivot / 1e6, color_continuous_scale='blues')
+    fig = _px().imshow(pivot / 1e6, color_continuous_scale='blues')
     fig.update_layout(
         template='plotly_dark', paper_bgcolor="rgba(0,0,0,0)",
         coloraxis_showscale=False
@@ -66,17 +80,11 @@ def create_heatmap_figure(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def create_weekday_bar_figure(df: pd.DataFrame) -> go.Figure:
-    df_heat = df.copy()
-    df_heat['Dia'] = df_heat['create_at'].dt.day_name().map({
-        'Monday': 'Seg', 'Tuesday': 'Ter', 'Wednesday': 'Qua',
-        'Thursday': 'Qui', 'Friday': 'Sex', 'Saturday': 'Sab', 'Sunday': 'Dom'
-    })
-    media_dia_semana = df_heat.groupby('Dia')['daily_exp'].mean().reindex(
-        ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sab', 'Dom']
-    ).fillna(0) / 1e6
+def create_weekday_bar_figure(df: pd.DataFrame, rollups: Optional[Rollups] = None) -> go.Figure:
+    media_dia_semana = ensure_rollups(df, rollups).weekday["mean"].fillna(0) / 1e6
+    media_dia_semana.index = DIAS_SEMANA
 
-    fig = px.bar(
+    fig = _px().bar(
         x=media_dia_semana.values, y=media_dia_semana.index, orientation='h',
         color=media_dia_semana.values, color_continuous_scale='blues'
     )
@@ -118,21 +126,63 @@ def create_eta_scenarios_figure(xp_faltante: float, media_geral: float, media_re
     return fig
 
 
-def create_adherence_figure(df: pd.DataFrame, xp_meta_diaria: float) -> go.Figure:
+def create_eta_fan_figure(sim: Optional[EtaSimulation]) -> go.Figure:
+    """XP acumulada simulada: faixa P10–P90, mediana, alvo e datas de chegada."""
+    fig = go.Figure()
+    fig.update_layout(
+        title="Projeção de XP (Monte Carlo, P10–P90)",
+        template="plotly_dark", paper_bgcolor="rgba(0,0,0,0)",
+        yaxis_title="XP Total (M)", hovermode="x unified"
+    )
+    if sim is None:
+        return fig
+
+    # Até pouco depois da chegada no P90 (ou o horizonte inteiro, se não chegar)
+    last_day = max((d for d in sim.days if d is not None), default=None)
+    keep = sim.fan_days <= last_day * 1.15 + 32 if last_day is not None else slice(None)
+    x = [sim.start + timedelta(days=int(d)) for d in sim.fan_days[keep]]
+    p10, p50, p90 = (sim.fan_xp[i][keep] / 1e6 for i in range(3))
+
+    fig.add_trace(go.Scatter(x=x, y=p90, line=dict(width=0), showlegend=False, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(
+        x=x, y=p10, fill="tonexty", fillcolor="rgba(23, 162, 184, 0.25)",
+        line=dict(width=0), name="P10–P90", hoverinfo="skip"
+    ))
+    fig.add_trace(go.Scatter(x=x, y=p50, name="Mediana (P50)", line=dict(color="#17a2b8")))
+    fig.add_hline(y=sim.xp_target / 1e6, line_dash="dash", line_color="white")
+    for percentile, color in ((10, "#28a745"), (50, "#E6BC53"), (90, "#dc3545")):
+        arrival = sim.date_for(percentile)
+        if arrival is not None:
+            fig.add_vline(x=datetime.combine(arrival, datetime.min.time()).timestamp() * 1000,
+                          line_dash="dot", line_color=color,
+                          annotation_text=f"P{percentile}: {sim.date_str(percentile)}",
+                          annotation_position="top left")
+    fig.update_layout(legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01))
+    return fig
+
+
+def create_adherence_figure(df: pd.DataFrame, xp_meta_diaria: float, x_range: XRange = None,
+                            max_points: Optional[int] = MAX_POINTS_PER_TRACE) -> go.Figure:
+    df = select_x_range(df, x_range)
+    x, y = downsample(df['create_at'], df['daily_exp'] / 1e6, max_points, method="minmax")
     fig = go.Figure([
         go.Scatter(
-            x=df['create_at'],
-            y=df['daily_exp'] / 1e6,
+            x=x,
+            y=y,
             name="Real",
             line=dict(color='#17a2b8')
         ),
+        # Meta constante desenhada com add_hline (sem um ponto por dia); este
+        # traço vazio só leva a meta para a legenda
         go.Scatter(
-            x=df['create_at'],
-            y=[xp_meta_diaria / 1e6] * len(df),
+            x=[None],
+            y=[None],
             name="Meta Requerida",
+            mode="lines",
             line=dict(dash='dash', color='white')
         )
     ])
+    fig.add_hline(y=xp_meta_diaria / 1e6, line_dash="dash", line_color="white")
     fig.update_layout(
         title="Aderência à Meta Diária",
         template="plotly_dark",
@@ -146,21 +196,25 @@ def create_adherence_figure(df: pd.DataFrame, xp_meta_diaria: float) -> go.Figur
                 bgcolor="rgba(0,0,0,0.5)" # Fundo semi-transparente para não cobrir as linhas
             )
     )
-    return fig
+    return _zoomed(fig, x_range)
 
 
-def create_delivery_curve_figure(df: pd.DataFrame) -> go.Figure:
+def create_delivery_curve_figure(df: pd.DataFrame, x_range: XRange = None,
+                                 max_points: Optional[int] = MAX_POINTS_PER_TRACE) -> go.Figure:
+    df = select_x_range(df, x_range)
+    x_real, y_real = downsample(df['create_at'], df['Experience'] / 1e9, max_points)
+    x_meta, y_meta = downsample(df['create_at'], df['Exp_Projetada'] / 1e9, max_points)
     fig = go.Figure([
         go.Scatter(
-            x=df['create_at'],
-            y=df['Experience'] / 1e9,
+            x=x_real,
+            y=y_real,
             name="Acumulado Real",
             fill='tozeroy',
             line=dict(color='#007bff')
         ),
         go.Scatter(
-            x=df['create_at'],
-            y=df['Exp_Projetada'] / 1e9,
+            x=x_meta,
+            y=y_meta,
             name="Linha de Meta",
             line=dict(color='orange', dash='dot')
         )
@@ -178,30 +232,32 @@ def create_delivery_curve_figure(df: pd.DataFrame) -> go.Figure:
                 bgcolor="rgba(0,0,0,0.5)" # Fundo semi-transparente para não cobrir as linhas
             )
     )
-    return fig
+    return _zoomed(fig, x_range)
 
 
 # === GRÁFICOS PROFISSIONAIS ADICIONAIS ===
 
-def create_progress_timeline(df: pd.DataFrame) -> go.Figure:
+def create_progress_timeline(df: pd.DataFrame, milestone_index: Optional[MilestoneIndex] = None,
+                             x_range: XRange = None, max_points: Optional[int] = MAX_POINTS_PER_TRACE) -> go.Figure:
+    if milestone_index is None:
+        milestone_index = MilestoneIndex.build(df)
+    df = select_x_range(df, x_range)
+    x, y = downsample(df['create_at'], df['Experience'] / 1e9, max_points)
+
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=df['create_at'],
-        y=df['Experience'] / 1e9,
+        x=x,
+        y=y,
         mode='lines+markers',
         name='XP Acumulada',
         line=dict(color='#E6BC53', width=3),
         marker=dict(size=4)
     ))
 
-    milestones = [200, 400, 600, 800, 900, 1000]
-    for level in milestones:
-        xp_target = cumulative_exp_closed(level)
-        reached = df[df['Experience'] >= xp_target]
-        if not reached.empty:
-            row = reached.iloc[0]
+    for level, reached_at, xp_target in milestone_index.reached():
+        if level in MILESTONES:
             fig.add_annotation(
-                x=row['create_at'],
+                x=reached_at,
                 y=xp_target / 1e9,
                 text=f"L{level}",
                 showarrow=True,
@@ -221,14 +277,17 @@ def create_progress_timeline(df: pd.DataFrame) -> go.Figure:
         yaxis_title="XP Total (Bilhões)",
         hovermode="x unified"
     )
-    return fig
+    return _zoomed(fig, x_range)
 
 
-def create_daily_efficiency(df: pd.DataFrame, xp_meta_diaria: float) -> go.Figure:
+def create_daily_efficiency(df: pd.DataFrame, xp_meta_diaria: float, x_range: XRange = None,
+                            max_points: Optional[int] = MAX_POINTS_PER_TRACE) -> go.Figure:
     if xp_meta_diaria <= 0:
         return go.Figure()
 
-    df_eff = df.copy()
+    df_eff = select_x_range(df, x_range)
+    _, daily = downsample(df_eff['create_at'], df_eff['daily_exp'], max_points, method="minmax")
+    df_eff = df_eff.loc[daily.index, ['create_at', 'daily_exp']].copy()
     df_eff['efficiency'] = (df_eff['daily_exp'] / xp_meta_diaria) * 100
     df_eff['color'] = df_eff['efficiency'].apply(lambda x: 'red' if x < 50 else 'orange' if x < 100 else 'green')
 
@@ -251,30 +310,23 @@ def create_daily_efficiency(df: pd.DataFrame, xp_meta_diaria: float) -> go.Figur
         yaxis_title="% da Meta Diária",
         showlegend=False
     )
-    return fig
-
+    return _zoomed(fig, x_range)
 
-def create_activity_calendar(df: pd.DataFrame) -> go.Figure:
-    df_cal = df[['create_at', 'daily_exp']].copy()
-    df_cal['date'] = df_cal['create_at'].dt.date
-    df_cal = df_cal.groupby('date')['daily_exp'].sum().reset_index()
-    df_cal['xp_m'] = df_cal['daily_exp'] / 1e6
 
-    start = df_cal['date'].min()
-    end = df_cal['date'].max()
-    date_range = pd.date_range(start=start, end=end, freq='D')
-    calendar_df = pd.DataFrame({'date': date_range})
-    calendar_df['date'] = calendar_df['date'].dt.date
-    calendar_df = calendar_df.merge(df_cal[['date', 'xp_m']], on='date', how='left')
-    calendar_df['xp_m'] = calendar_df['xp_m'].fillna(0)
+def create_activity_calendar(df: pd.DataFrame, rollups: Optional[Rollups] = None) -> go.Figure:
+    daily = ensure_rollups(df, rollups).daily["sum"]
+    date_range = pd.date_range(start=daily.index.min(), end=daily.index.max(), freq='D')
+    calendar_df = pd.DataFrame({'xp_m': daily.reindex(date_range, fill_value=0) / 1e6})
 
-    calendar_df['week'] = pd.to_datetime(calendar_df['date']).dt.isocalendar().week
-    calendar_df['weekday'] = pd.to_datetime(calendar_df['date']).dt.weekday
+    # Semana com o ano ISO: históricos de mais de um ano não repetem a semana
+    iso = date_range.isocalendar()
+    calendar_df['week'] = iso['year'].astype(str) + "-S" + iso['week'].astype(str).str.zfill(2)
+    calendar_df['weekday'] = date_range.weekday
 
     pivot = calendar_df.pivot(index='weekday', columns='week', values='xp_m')
     pivot = pivot.reindex(index=[0, 1, 2, 3, 4, 5, 6])
 
-    fig = px.imshow(
+    fig = _px().imshow(
         pivot,
         labels=dict(x="Semana", y="Dia da Semana", color="XP (M)"),
         color_continuous_scale='greens',
@@ -297,6 +349,17 @@ def create_activity_calendar(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
+def _linear_fit(x: pd.Series, y: pd.Series) -> Tuple[float, float, float]:
+    """Regressão linear por mínimos quadrados: (inclinação, intercepto, R²)."""
+    x = x.to_numpy(dtype=np.float64)
+    y = y.to_numpy(dtype=np.float64)
+    dx, dy = x - x.mean(), y - y.mean()
+    sxx, sxy, syy = (dx * dx).sum(), (dx * dy).sum(), (dy * dy).sum()
+    slope = sxy / sxx if sxx > 0 else 0.0
+    r_squared = sxy * sxy / (sxx * syy) if sxx > 0 and syy > 0 else 0.0
+    return float(slope), float(y.mean() - slope * x.mean()), float(r_squared)
+
+
 def create_performance_trend(df: pd.DataFrame) -> go.Figure:
     df_trend = df[['create_at', 'daily_exp']].copy()
     df_trend['days_since_start'] = (df_trend['create_at'] - df_trend['create_at'].min()).dt.days
@@ -305,9 +368,7 @@ def create_performance_trend(df: pd.DataFrame) -> go.Figure:
     if len(df_trend) < 2:
         return go.Figure()
 
-    slope, intercept, r_value, p_value, std_err = stats.linregress(
-        df_trend['days_since_start'], df_trend['daily_exp']
-    )
+    slope, intercept, r_squared = _linear_fit(df_trend['days_since_start'], df_trend['daily_exp'])
 
     df_trend['trend'] = intercept + slope * df_trend['days_since_start']
 
@@ -323,7 +384,7 @@ def create_performance_trend(df: pd.DataFrame) -> go.Figure:
         x=df_trend['create_at'],
         y=df_trend['trend'] / 1e6,
         mode='lines',
-        name=f'Tendência (R²={r_value**2:.2f})',
+        name=f'Tendência (R²={r_squared:.2f})',
         line=dict(color='orange', width=2)
     ))
 
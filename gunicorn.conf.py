@@ -0,0 +1,10 @@
+# gunicorn.conf.py
+# Lido automaticamente pelo `gunicorn app:server`. Cada aba aberta mantém uma
+# conexão SSE (/events) parada esperando snapshots novos: com workers síncronos
+# ela ocuparia um processo inteiro, então os workers atendem com threads. Os
+# streams usam no máximo SSE_MAX_STREAMS threads (padrão: metade); as abas
+# além disso recebem 503 e consultam pelo intervalo, sem travar os callbacks
+import os
+
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
@@ -0,0 +1,268 @@
+# instrumentation.py
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Log por requisição/atualização com a etapa mais lenta: "1" sempre, ou só
+# acima de STAGE_TRACE_SLOW_MS
+STAGE_TRACE_LOG = os.getenv("STAGE_TRACE_LOG", "0") == "1"
+STAGE_TRACE_SLOW_MS = float(os.getenv("STAGE_TRACE_SLOW_MS", "0"))
+
+# Faixas do histograma, em segundos (de 5 ms a 60 s)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera os labels {self.labelnames}, recebeu {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico, por combinação de labels."""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Valor instantâneo. Com `callback`, o valor é lido na hora da coleta
+    (retornando {labels: valor}), sem precisar ser atualizado no código.
+    """
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], Dict[LabelValues, float]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        if self.callback is not None:
+            values = self.callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo no formato do Prometheus (buckets, _sum e _count)."""
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        lines = self._header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "tibiatracker_stage_seconds", "Duração de cada etapa da carga e renderização", ["stage"]
+))
+REFRESHES = REGISTRY.register(Counter(
+    "tibiatracker_refreshes_total", "Atualizações de snapshot por personagem e resultado", ["character", "result"]
+))
+ERRORS = REGISTRY.register(Counter(
+    "tibiatracker_errors_total", "Erros por origem (atualização, painel)", ["source"]
+))
+SNAPSHOT_ROWS = REGISTRY.register(Gauge(
+    "tibiatracker_snapshot_rows", "Linhas no snapshot atual de cada personagem", ["character"]
+))
+CALLBACK_BYTES = REGISTRY.register(Counter(
+    "tibiatracker_callback_bytes_total", "Bytes das respostas de callback, antes (raw) e depois (sent) da compressão", ["stage"]
+))
+INVALID_ROWS = REGISTRY.register(Gauge(
+    "tibiatracker_invalid_rows", "Linhas rejeitadas na validação da última leitura de cada aba", ["worksheet"]
+))
+
+
+# === Trace por requisição ===
+
+_local = threading.local()
+
+
+def begin_trace(name: str) -> None:
+    """Começa a agrupar as etapas executadas nesta thread sob `name`."""
+    _local.name = name
+    _local.stages = []
+    _local.started = time.perf_counter()
+    _local.rendered_at = None
+
+
+def mark_rendered(name: Optional[str] = None) -> None:
+    """
+    Marca o fim do callback; o tempo até `end_trace` é contado como a
+    serialização do layout (feita pelo Dash depois que o callback retorna).
+    """
+    if getattr(_local, "stages", None) is None:
+        return
+    _local.rendered_at = time.perf_counter()
+    if name:
+        _local.name = name
+
+
+def end_trace() -> None:
+    stages = getattr(_local, "stages", None)
+    if stages is None:
+        return
+    if _local.rendered_at is not None:
+        record_stage("layout_serialize", time.perf_counter() - _local.rendered_at)
+    _local.stages = None
+    log_trace(_local.name, stages, time.perf_counter() - _local.started)
+
+
+@contextmanager
+def trace(name: str) -> Iterator[None]:
+    """Agrupa as etapas do bloco; com STAGE_TRACE_LOG, registra no log a mais lenta."""
+    begin_trace(name)
+    try:
+        yield
+    finally:
+        end_trace()
+
+
+def log_trace(name: str, stages: List[Tuple[str, float, float]], total: float) -> None:
+    if not STAGE_TRACE_LOG or not stages or total * 1000 < STAGE_TRACE_SLOW_MS:
+        return
+    # A mais lenta pelo tempo próprio: uma etapa que engloba outras (ex.: o
+    # painel e suas figuras) não esconde a etapa interna que realmente pesou
+    slowest, _, own = max(stages, key=lambda s: s[2])
+    logger.info(
+        f"{name}: {total * 1000:.0f} ms | etapa mais lenta: {slowest} ({own * 1000:.0f} ms) | "
+        + ", ".join(f"{s}={d * 1000:.0f}ms" for s, d, _ in stages)
+    )
+
+
+def record_stage(name: str, seconds: float, own_seconds: Optional[float] = None) -> None:
+    """Registra a duração de uma etapa no histograma e no trace ativo da thread."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    stages = getattr(_local, "stages", None)
+    if stages is not None:
+        stages.append((name, seconds, seconds if own_seconds is None else own_seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mede o bloco como a etapa `name`; etapas podem ser aninhadas."""
+    nested = getattr(_local, "nested", None)
+    if nested is None:
+        nested = _local.nested = []
+    nested.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        children = nested.pop()
+        if nested:
+            nested[-1] += seconds
+        record_stage(name, seconds, seconds - children)
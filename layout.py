@@ -1,6 +1,7 @@
 # layout.py
 import dash_bootstrap_components as dbc
 from dash import html, dcc
+from typing import Optional
 
 
 def create_top_indicators(
@@ -10,7 +11,8 @@ def create_top_indicators(
     melhor_dia_xp: float,
     melhor_dia_data: str,
     tendencia_status: str,
-    cor_tendencia: str
+    cor_tendencia: str,
+    eta_faixa: Optional[str] = None
 ) -> dbc.Row:
     return dbc.Row([
         dbc.Col(dbc.Card(dbc.CardBody([
@@ -19,7 +21,8 @@ def create_top_indicators(
         ])), xs=6, md=2),
         dbc.Col(dbc.Card(dbc.CardBody([
             html.H6("Previsão ETA"),
-            html.H4(eta_str, className="text-warning")
+            html.H4(eta_str, className="text-warning"),
+            html.Small(eta_faixa) if eta_faixa else None
         ])), xs=6, md=3),
         dbc.Col(dbc.Card(dbc.CardBody([
             html.H6("🔥 Streak"),
@@ -42,7 +45,8 @@ def create_advanced_metrics(
     media_recente: float,
     score_consistencia: float,
     streak_baixo_texto: str,
-    cor_streak_baixo: str
+    cor_streak_baixo: str,
+    ritmo: Optional[str] = None
 ) -> dbc.Row:
     consistencia_class = "text-success" if score_consistencia > 60 else "text-warning"
     
@@ -53,7 +57,8 @@ def create_advanced_metrics(
         ])), xs=6, md=3),
         dbc.Col(dbc.Card(dbc.CardBody([
             html.H6("Média Recente"),
-            html.H3(f"{media_recente / 1e6:.1f}M", className="text-primary")
+            html.H3(f"{media_recente / 1e6:.1f}M", className="text-primary"),
+            html.Small(ritmo) if ritmo else None
         ])), xs=6, md=3),
         dbc.Col(dbc.Card(dbc.CardBody([
             html.H6("Consistência"),
@@ -98,6 +103,54 @@ def create_health_effort_row(texto_delta: str, cor_delta: str, xp_faltante: floa
 
 def create_curves_row(fig_adherence, fig_delivery) -> dbc.Row:
     return dbc.Row([
-        dbc.Col(dcc.Graph(figure=fig_adherence), xs=12, md=5),
-        dbc.Col(dcc.Graph(figure=fig_delivery), xs=12, md=7),
-    ], className="mb-4")
\ No newline at end of file
+        dbc.Col(dcc.Graph(id="graph-adherence", figure=fig_adherence), xs=12, md=5),
+        dbc.Col(dcc.Graph(id="graph-delivery", figure=fig_delivery), xs=12, md=7),
+    ], className="mb-4")
+
+# Períodos do filtro de datas (dias; "all" = histórico inteiro)
+DATE_RANGES = [("30 dias", "30"), ("90 dias", "90"), ("1 ano", "365"), ("Tudo", "all")]
+
+
+def create_date_range_selector() -> dbc.Row:
+    """
+    Filtro de período e agregados do período selecionado; ambos são
+    atualizados no navegador (assets/date_range.js), sem callback no servidor.
+    """
+    def resumo(titulo: str, id_: str, cor: str) -> dbc.Col:
+        return dbc.Col(dbc.Card(dbc.CardBody([
+            html.H6(titulo),
+            html.H5("–", id=id_, className=f"text-{cor}")
+        ])), xs=6, md=True)
+
+    return html.Div([
+        dcc.Store(id="series-store"),
+        dbc.Row(dbc.Col(dbc.RadioItems(
+            id="date-range",
+            options=[{"label": label, "value": value} for label, value in DATE_RANGES],
+            value="all",
+            className="btn-group",
+            inputClassName="btn-check",
+            labelClassName="btn btn-outline-warning",
+            labelCheckedClassName="active",
+        ), width="auto"), justify="center", className="mb-3"),
+        dbc.Row([
+            resumo("XP no Período", "range-total", "primary"),
+            resumo("Média por Dia", "range-mean", "info"),
+            resumo("Dias Ativos", "range-active", "success"),
+            resumo("Melhor Dia", "range-best", "warning"),
+            resumo("ETA no Ritmo do Período", "range-eta", "warning"),
+        ], className="mb-4 text-center"),
+    ])
+
+
+def create_panel_slot(name: str, lazy: bool = False) -> html.Div:
+    """
+    Espaço reservado de um painel preenchido pelo seu próprio callback.
+    Painéis `lazy` só são renderizados quando entram na tela (assets/lazy_panels.js).
+    """
+    return html.Div([
+        dcc.Store(id=f"visible-{name}", data=not lazy),
+        # Digest do conteúdo já enviado: painéis iguais não são reenviados
+        dcc.Store(id=f"rendered-{name}"),
+        dcc.Loading(html.Div(id=f"panel-{name}"), type="dot", color="#E6BC53")
+    ], className="lazy-panel" if lazy else None, **{"data-panel": name})
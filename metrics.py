@@ -1,12 +1,30 @@
 # metrics.py
+import json
+import math
+import os
+import time
+import bisect
+import threading
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Callable, Optional, Iterable
 
-from xp_calculator import cumulative_exp_closed
+from xp_calculator import cumulative_exp_closed, levels_for_exp
+from milestones import MilestoneIndex, MILESTONES
+from rollups import Rollups
+from rolling_stats import GrowingArray, RollingStats, ensure_rolling
+from eta_simulation import simulate_from_rollups
 
+# Linhas (dias) da média recente, base do ETA e da tendência
+RECENT_WINDOW = 30
+# Intervalo mínimo (segundos) entre gravações do estado incremental em disco;
+# o estado salvo pode ficar atrás do DataFrame, o resto é refeito ao carregar
+METRICS_STATE_SAVE_SECONDS = float(os.getenv("METRICS_STATE_SAVE_SECONDS", "60"))
 
-def calculate_all_metrics(df: pd.DataFrame, level_target: int = 1000) -> Dict[str, Any]:
+
+def calculate_all_metrics(df: pd.DataFrame, level_target: int = 1000,
+                          milestone_levels: Iterable[int] = MILESTONES) -> Dict[str, Any]:
     """
     Calcula todas as métricas do dashboard a partir do DataFrame de XP.
     Retorna um dicionário com todos os valores necessários para layout e gráficos.
@@ -14,20 +32,120 @@ def calculate_all_metrics(df: pd.DataFrame, level_target: int = 1000) -> Dict[st
     if df.empty:
         raise ValueError("DataFrame vazio")
 
+    # Médias (momentos exatos, os mesmos do acumulador incremental)
+    positive_hunts = df[df["daily_exp"] > 0]["daily_exp"]
+    pos_count, pos_sum, pos_sumsq = _positive_moments(df["daily_exp"].to_numpy(dtype=np.float64))
+    media_geral = _media(pos_count, pos_sum)
+    rolling = RollingStats.build(df)
+    media_recente = _media_recente(rolling, media_geral)
+
+    # Streaks contados a partir do fim da série
+    def streak_acima(limite: float) -> int:
+        count = 0
+        for val in reversed(df["daily_exp"]):
+            if val >= limite:
+                count += 1
+            else:
+                break
+        return count
+
+    def streak_abaixo(limite: float) -> int:
+        count = 0
+        for val in reversed(df["daily_exp"]):
+            if val < limite:
+                count += 1
+            else:
+                break
+        return count
+
+    # Melhor dia
+    idx_max = df["daily_exp"].idxmax()
+
+    # Índice de milestones (compartilhado com o gráfico de progresso)
+    milestone_index = MilestoneIndex.build(df, set(milestone_levels) | set(MILESTONES))
+
+    return _finalize_metrics(
+        level_target=level_target,
+        xp_consolidada=df["Experience"].iloc[-1],
+        media_geral=media_geral,
+        media_recente=media_recente,
+        streak_acima=streak_acima,
+        streak_abaixo=streak_abaixo,
+        melhor_dia_xp=float(df.loc[idx_max, "daily_exp"]),
+        melhor_dia_data=df.loc[idx_max, "create_at"].strftime("%d/%m/%Y"),
+        contar_acima=lambda limite: len(positive_hunts[positive_hunts >= limite]),
+        total_positivos=pos_count,
+        desvio_padrao=_desvio_padrao(pos_count, pos_sum, pos_sumsq),
+        xp_hoje=df["daily_exp"].iloc[-1],
+        milestone_index=milestone_index,
+        rollups=Rollups.build(df),
+        rolling=rolling,
+        enrich=lambda xp_meta_diaria, xp_consolidada: _add_derived_columns(df, xp_meta_diaria, xp_consolidada, rolling)
+    )
+
+
+def _positive_moments(daily: np.ndarray) -> Tuple[int, Any, Any]:
+    """
+    Contagem, soma e soma dos quadrados dos dias positivos. Com XP inteira, as
+    somas são int do Python (exatas, sem estouro), então somar por blocos dá o
+    mesmo resultado que somar tudo de uma vez.
+    """
+    positive = daily[daily > 0]
+    whole = positive == np.floor(positive)
+    ints, fractional = positive[whole].astype(np.int64), positive[~whole]
+    total, squares = 0, 0
+    if len(ints):
+        # Quadrados como int do Python (objeto): sem estouro do int64
+        total += int(ints.sum())
+        squares += int((ints.astype(object) ** 2).sum())
+    if len(fractional):
+        total += float(fractional.sum())
+        squares += float((fractional ** 2).sum())
+    return len(positive), total, squares
+
+
+def _media(count: int, total: Any) -> float:
+    return float(total / count) if count else 0.0
+
+
+def _desvio_padrao(count: int, total: Any, squares: Any) -> float:
+    """Desvio padrão amostral (ddof=1) a partir dos momentos; 0 com menos de dois dias."""
+    if count <= 1:
+        return 0.0
+    var = (count * squares - total * total) / (count * (count - 1))
+    return math.sqrt(max(var, 0.0))
+
+
+def _media_recente(rolling: RollingStats, media_geral: float) -> float:
+    """Média dos dias positivos nas últimas RECENT_WINDOW linhas (ou a geral, se não houver)."""
+    recent = rolling.latest(RECENT_WINDOW)
+    return recent["media_positiva"] if recent["dias_positivos"] else media_geral
+
+
+def _finalize_metrics(
+    level_target: int,
+    xp_consolidada: float,
+    media_geral: float,
+    media_recente: float,
+    streak_acima: Callable[[float], int],
+    streak_abaixo: Callable[[float], int],
+    melhor_dia_xp: float,
+    melhor_dia_data: str,
+    contar_acima: Callable[[float], int],
+    total_positivos: int,
+    desvio_padrao: float,
+    xp_hoje: float,
+    milestone_index: MilestoneIndex,
+    rollups: Rollups,
+    rolling: RollingStats,
+    enrich: Callable[[float, float], pd.DataFrame]
+) -> Dict[str, Any]:
+    """Monta o dicionário final de métricas a partir dos agregados já calculados."""
     # XP consolidada e nível real
-    xp_consolidada = df["Experience"].iloc[-1]
     level_real = find_level_for_exp_safe(int(xp_consolidada))
     xp_objetivo = cumulative_exp_closed(level_target)
     xp_faltante = max(0, xp_objetivo - xp_consolidada)
 
-    # Médias
-    positive_hunts = df[df["daily_exp"] > 0]["daily_exp"]
-    media_geral = float(positive_hunts.mean()) if not positive_hunts.empty else 0.0
-    recent_df = df.tail(30)
-    media_recente = float(
-        recent_df[recent_df["daily_exp"] > 0]["daily_exp"].mean()
-    ) if not recent_df[recent_df["daily_exp"] > 0].empty else media_geral
-
     # ETA e meta diária
     eta_str, xp_meta_diaria, dias_restantes = "N/A", 0.0, 0
     if media_recente > 0:
@@ -36,19 +154,16 @@ def calculate_all_metrics(df: pd.DataFrame, level_target: int = 1000) -> Dict[st
         eta_str = eta_date.strftime("%d/%m/%Y")
         xp_meta_diaria = xp_faltante / dias_restantes
 
-    # Streak (dias consecutivos acima da meta)
-    streak_count = 0
-    if xp_meta_diaria > 0:
-        for val in reversed(df["daily_exp"]):
-            if val >= xp_meta_diaria:
-                streak_count += 1
-            else:
-                break
+    # ETA probabilístico (Monte Carlo sobre o histórico diário): a data P50
+    # substitui a estimativa pela média recente; P10/P90 dão a faixa
+    eta_simulation = simulate_from_rollups(rollups, xp_faltante, xp_start=xp_consolidada)
+    eta_p10 = eta_p50 = eta_p90 = eta_str
+    if eta_simulation is not None:
+        eta_p10, eta_p50, eta_p90 = (eta_simulation.date_str(p) for p in (10, 50, 90))
+        eta_str = eta_p50
 
-    # Melhor dia
-    idx_max = df["daily_exp"].idxmax()
-    melhor_dia_xp = float(df.loc[idx_max, "daily_exp"])
-    melhor_dia_data = df.loc[idx_max, "create_at"].strftime("%d/%m/%Y")
+    # Streak (dias consecutivos acima da meta)
+    streak_count = streak_acima(xp_meta_diaria) if xp_meta_diaria > 0 else 0
 
     # Tendência (comparação média recente vs geral)
     tendencia_status, cor_tendencia = "ESTÁVEL", "info"
@@ -59,43 +174,23 @@ def calculate_all_metrics(df: pd.DataFrame, level_target: int = 1000) -> Dict[st
 
     # Consistência (% de dias acima da média recente)
     score_consistencia = (
-        len(positive_hunts[positive_hunts >= media_recente]) / len(positive_hunts) * 100
-        if len(positive_hunts) > 0 else 0.0
+        contar_acima(media_recente) / total_positivos * 100
+        if total_positivos > 0 else 0.0
     )
 
-    # Desvio padrão
-    desvio_padrao = float(positive_hunts.std()) if len(positive_hunts) > 1 else 0.0
-
     # Streak baixo (dias consecutivos com XP < 10% da meta)
-    current_streak_baixo = 0
-    if xp_meta_diaria > 0:
-        for val in reversed(df["daily_exp"]):
-            if val < (xp_meta_diaria * 0.1):
-                current_streak_baixo += 1
-            else:
-                break
+    current_streak_baixo = streak_abaixo(xp_meta_diaria * 0.1) if xp_meta_diaria > 0 else 0
     cor_streak_baixo = "danger" if current_streak_baixo > 3 else "success"
     streak_baixo_texto = f"{current_streak_baixo}d" if current_streak_baixo > 0 else "OK"
 
     # Performance hoje
-    xp_hoje = df["daily_exp"].iloc[-1]
     delta_meta = xp_hoje - xp_meta_diaria
     cor_delta = "success" if delta_meta >= 0 else "danger"
     texto_delta = f"{'+' if delta_meta > 0 else ''}{delta_meta / 1e6:.1f}M vs Meta"
 
-    # Histórico de milestones
-    historico_milestones = []
-    for m in [200, 400, 600, 800, 900, 1000]:
-        xp_m = cumulative_exp_closed(m)
-        alcancado = df[df["Experience"] >= xp_m]
-        if not alcancado.empty:
-            data_m = alcancado.iloc[0]["create_at"].strftime("%d/%m/%Y")
-            historico_milestones.append((m, data_m, True))
-        else:
-            historico_milestones.append((m, None, False))
-
     return {
         # Níveis e XP
+        "level_target": level_target,
         "level_real": level_real,
         "xp_consolidada": xp_consolidada,
         "xp_faltante": xp_faltante,
@@ -107,6 +202,10 @@ def calculate_all_metrics(df: pd.DataFrame, level_target: int = 1000) -> Dict[st
         "xp_meta_diaria": xp_meta_diaria,
         "eta_str": eta_str,
         "dias_restantes": dias_restantes,
+        "eta_p10": eta_p10,
+        "eta_p50": eta_p50,
+        "eta_p90": eta_p90,
+        "eta_simulation": eta_simulation,
 
         # Streaks
         "streak_count": streak_count,
@@ -131,20 +230,52 @@ def calculate_all_metrics(df: pd.DataFrame, level_target: int = 1000) -> Dict[st
         "cor_delta": cor_delta,
 
         # Milestones
-        "historico_milestones": historico_milestones,
+        "historico_milestones": milestone_index.history(MILESTONES),
+        "milestone_index": milestone_index,
+        "rollups": rollups,
+
+        # Ritmo nas janelas de 7/30/90 dias (média, desvio, total e dias positivos)
+        "ritmo": rolling.summary(),
+        "rolling_stats": rolling,
 
         # DataFrame enriquecido (para gráficos)
-        "df_enriched": _add_derived_columns(df, xp_meta_diaria, xp_consolidada)
+        "df_enriched": enrich(xp_meta_diaria, xp_consolidada)
     }
 
 
-def _add_derived_columns(df: pd.DataFrame, xp_meta_diaria: float, xp_initial: float) -> pd.DataFrame:
-    """Adiciona colunas derivadas ao DataFrame para uso em gráficos."""
+def _row_columns(rows: pd.DataFrame, rolling: RollingStats) -> Dict[str, np.ndarray]:
+    """
+    Colunas derivadas que só dependem da linha e das anteriores (médias móveis
+    e nível): calculadas uma vez por linha. `rows` são as últimas linhas de `rolling`.
+    """
+    level, progress, to_next = levels_for_exp(rows["Experience"])
+    return {
+        "MM7": rolling.tail(7, len(rows))["mean"],
+        "MM30": rolling.tail(30, len(rows))["mean"],
+        "Level": level,
+        "Progresso_Level": progress,
+        "XP_Proximo_Level": to_next,
+    }
+
+
+def _add_derived_columns(df: pd.DataFrame, xp_meta_diaria: float, xp_initial: float,
+                         rolling: Optional[RollingStats] = None,
+                         row_columns: Optional[Dict[str, np.ndarray]] = None) -> pd.DataFrame:
+    """
+    Adiciona colunas derivadas ao DataFrame para uso em gráficos. As colunas
+    por linha podem vir prontas (`row_columns`, do acumulador); meta e
+    projeção dependem da meta atual e são refeitas a cada chamada.
+    """
+    if row_columns is None:
+        row_columns = _row_columns(df, ensure_rolling(df, rolling))
     df = df.copy()
-    df["MM7"] = df["daily_exp"].rolling(window=7, min_periods=1).mean()
-    df["MM30"] = df["daily_exp"].rolling(window=30, min_periods=1).mean()
+    df["MM7"] = row_columns["MM7"]
+    df["MM30"] = row_columns["MM30"]
     df["Meta_SLA"] = xp_meta_diaria
     df["Exp_Projetada"] = xp_initial + (df.reset_index().index * xp_meta_diaria)
+    df["Level"] = row_columns["Level"]
+    df["Progresso_Level"] = row_columns["Progresso_Level"]
+    df["XP_Proximo_Level"] = row_columns["XP_Proximo_Level"]
     return df
 
 
@@ -154,4 +285,296 @@ def find_level_for_exp_safe(total_exp: int) -> int:
         from xp_calculator import find_level_for_exp
         return find_level_for_exp(total_exp)
     except Exception:
-        return 1
\ No newline at end of file
+        return 1
+
+
+# === Cálculo incremental ===
+
+def _rows_hash(df: pd.DataFrame) -> int:
+    """Soma (mod 2^64) dos hashes por linha de data, XP e XP diária."""
+    hashes = pd.util.hash_pandas_object(df[["create_at", "Experience", "daily_exp"]], index=False)
+    return int(hashes.sum()) % 2 ** 64
+
+
+def _trailing_run(values: np.ndarray, breaks: Callable[[np.ndarray], np.ndarray]) -> int:
+    """
+    Linhas no fim de `values` depois do último valor em que `breaks` é
+    verdadeiro. Examina blocos crescentes a partir do fim, então o custo
+    acompanha o tamanho do streak, não o do histórico.
+    """
+    n, size = len(values), 64
+    while True:
+        start = max(0, n - size)
+        hits = np.flatnonzero(breaks(values[start:]))
+        if len(hits):
+            return n - 1 - (start + int(hits[-1]))
+        if start == 0:
+            return n
+        size *= 8
+
+
+class _SortedValues:
+    """
+    Valores em blocos ordenados de até 2 * BLOCK: inserir custa O(BLOCK) e
+    contar quantos são >= um limite, O(log n + n / BLOCK), sem reordenar o
+    histórico. Guarda a XP dos dias positivos para a contagem acima da média.
+    """
+
+    BLOCK = 1024
+
+    def __init__(self, values: Iterable[float] = ()):
+        self._load(np.asarray(values, dtype=np.float64))
+
+    def _load(self, values: np.ndarray) -> None:
+        ordered = np.sort(values)
+        self.blocks = [ordered[i:i + self.BLOCK] for i in range(0, len(ordered), self.BLOCK)]
+        self.maxes = [float(b[-1]) for b in self.blocks]
+        self.n = len(ordered)
+
+    def insert_many(self, values: np.ndarray) -> None:
+        if len(values) > max(self.BLOCK, self.n // 4):
+            # Bloco grande (recarga do histórico): reordenar tudo sai mais barato
+            self._load(np.concatenate(self.blocks + [values]))
+            return
+        for value in values.tolist():
+            self._insert(value)
+
+    def _insert(self, value: float) -> None:
+        if not self.blocks:
+            self.blocks, self.maxes = [np.array([value])], [value]
+            self.n = 1
+            return
+        i = min(bisect.bisect_left(self.maxes, value), len(self.blocks) - 1)
+        block = self.blocks[i]
+        block = np.insert(block, int(np.searchsorted(block, value)), value)
+        if len(block) > 2 * self.BLOCK:
+            self.blocks[i:i + 1] = [block[:self.BLOCK], block[self.BLOCK:]]
+            self.maxes[i:i + 1] = [float(block[self.BLOCK - 1]), float(block[-1])]
+        else:
+            self.blocks[i], self.maxes[i] = block, float(block[-1])
+        self.n += 1
+
+    def count_at_least(self, limit: float) -> int:
+        i = bisect.bisect_left(self.maxes, limit)
+        if i == len(self.blocks):
+            return 0
+        inside = len(self.blocks[i]) - int(np.searchsorted(self.blocks[i], limit, side="left"))
+        return inside + sum(len(b) for b in self.blocks[i + 1:])
+
+
+class MetricsAccumulator:
+    """
+    Estado incremental de `calculate_all_metrics`.
+
+    Guarda somas e contagens exatas dos dias positivos, o melhor dia e os
+    marcos já atingidos; as janelas móveis vêm de `RollingStats`, estendido
+    junto com os rollups, e as colunas derivadas de cada linha são calculadas
+    uma vez só. `update` custa O(linhas novas): confere o histórico pela chave
+    da última linha já vista e soma ao hash só as linhas novas; o hash de
+    todas as linhas só é refeito em uma sincronização completa (ou ao carregar
+    o estado do disco). Quando o histórico mudou, tudo é refeito pelo mesmo
+    caminho vetorizado sobre o DataFrame inteiro.
+
+    O estado persistido tem tamanho fixo; os agregados por linha (rollups,
+    janelas, colunas derivadas e a XP dos dias positivos) ficam só em memória
+    e são refeitos do DataFrame ao carregar. `metrics()` dá exatamente o
+    mesmo resultado do caminho em lote.
+    """
+
+    def __init__(self, milestone_levels: Iterable[int] = MILESTONES):
+        self.milestone_levels = sorted(set(milestone_levels) | set(MILESTONES))
+        self.reset()
+
+    def reset(self) -> None:
+        self.n_rows = 0
+        self.last_key: Optional[List[Any]] = None
+        self.prefix_hash = 0
+        self.last_experience: Optional[float] = None
+        self.last_daily = 0.0
+        # Dias positivos: contagem, soma e soma dos quadrados (int do Python quando a XP é inteira)
+        self.pos_count = 0
+        self.pos_sum = 0
+        self.pos_sumsq = 0
+        # Melhor dia (primeira ocorrência do máximo, como idxmax)
+        self.best_xp: Optional[float] = None
+        self.best_date: Optional[str] = None
+        # Marcos atingidos
+        self.milestone_index = MilestoneIndex(self.milestone_levels)
+        # Só em memória (refeitos do DataFrame ao carregar): agregados por
+        # dia/semana/mês, janelas móveis, colunas derivadas e XP dos dias positivos
+        self.rollups: Optional[Rollups] = Rollups()
+        self.rolling: Optional[RollingStats] = RollingStats()
+        self.row_columns: Optional[Dict[str, GrowingArray]] = {}
+        self.positives: Optional[_SortedValues] = _SortedValues()
+
+    # --- Atualização ---
+
+    def update(self, df: pd.DataFrame, full_resync: bool = False) -> int:
+        """
+        Incorpora as linhas novas de `df`; retorna quantas foram processadas.
+
+        `full_resync` indica que `df` veio de uma releitura completa da fonte:
+        só então o hash de todas as linhas já vistas é conferido.
+        """
+        validate = full_resync or self.rolling is None
+        if self.n_rows and not self._is_prefix_of(df, validate):
+            self.reset()
+        if self.rolling is None:
+            self._rebuild(df.iloc[:self.n_rows])
+        new_rows = df.iloc[self.n_rows:]
+        if new_rows.empty:
+            return 0
+        self._fold(new_rows)
+        self.milestone_index = self.milestone_index.extended(new_rows)
+        self.rollups = self.rollups.extended(new_rows)
+        self.rolling = self.rolling.extended(new_rows)
+        self._extend_row_columns(new_rows)
+        self.last_key = self._row_key(df.iloc[-1])
+        self.prefix_hash = (self.prefix_hash + _rows_hash(new_rows)) % 2 ** 64
+        return len(new_rows)
+
+    def _rebuild(self, seen: pd.DataFrame) -> None:
+        """Agregados em memória das linhas já vistas, depois de carregar o estado do disco."""
+        daily = seen["daily_exp"].to_numpy(dtype=np.float64)
+        self.rollups = Rollups.build(seen)
+        self.rolling = RollingStats.build(seen)
+        self.row_columns = {}
+        self._extend_row_columns(seen)
+        self.positives = _SortedValues(daily[daily > 0])
+
+    def _extend_row_columns(self, rows: pd.DataFrame) -> None:
+        if rows.empty:
+            return
+        for name, values in _row_columns(rows, self.rolling).items():
+            column = self.row_columns.get(name)
+            self.row_columns[name] = column.appended(values) if column is not None else GrowingArray(values, values.dtype)
+
+    @staticmethod
+    def _row_key(row: pd.Series) -> List[Any]:
+        return [row["create_at"].isoformat(), float(row["Experience"]), float(row["daily_exp"])]
+
+    def _is_prefix_of(self, df: pd.DataFrame, validate: bool) -> bool:
+        if len(df) < self.n_rows:
+            return False
+        key = self._row_key(df.iloc[self.n_rows - 1])
+        same_last = all(a == b or (isinstance(a, float) and math.isnan(a) and math.isnan(b))
+                        for a, b in zip(key, self.last_key))
+        return same_last and (not validate or _rows_hash(df.iloc[:self.n_rows]) == self.prefix_hash)
+
+    def _fold(self, rows: pd.DataFrame) -> None:
+        """Incorpora um bloco de linhas de uma vez (vetorizado)."""
+        daily = rows["daily_exp"].to_numpy(dtype=np.float64)
+
+        count, total, squares = _positive_moments(daily)
+        self.pos_count += count
+        self.pos_sum += total
+        self.pos_sumsq += squares
+        self.positives.insert_many(daily[daily > 0])
+
+        if not np.isnan(daily).all():
+            i = int(np.nanargmax(daily))
+            if self.best_xp is None or daily[i] > self.best_xp:
+                self.best_xp = float(daily[i])
+                self.best_date = rows["create_at"].iloc[i].strftime("%d/%m/%Y")
+
+        self.last_experience = rows["Experience"].iloc[-1:].tolist()[0]
+        self.last_daily = float(daily[-1])
+        self.n_rows += len(rows)
+
+    # --- Consultas ---
+
+    def metrics(self, df: pd.DataFrame, level_target: int = 1000) -> Dict[str, Any]:
+        """Monta o mesmo dicionário de `calculate_all_metrics` a partir do estado."""
+        if not self.n_rows:
+            raise ValueError("DataFrame vazio")
+
+        media_geral = _media(self.pos_count, self.pos_sum)
+        daily = df["daily_exp"].to_numpy(dtype=np.float64)
+        row_columns = {name: column.values for name, column in self.row_columns.items()}
+
+        return _finalize_metrics(
+            level_target=level_target,
+            xp_consolidada=self.last_experience,
+            media_geral=media_geral,
+            media_recente=_media_recente(self.rolling, media_geral),
+            # NaN quebra os dois streaks, como nas comparações do caminho em lote
+            streak_acima=lambda limite: _trailing_run(daily, lambda v: ~(v >= limite)),
+            streak_abaixo=lambda limite: _trailing_run(daily, lambda v: ~(v < limite)),
+            melhor_dia_xp=self.best_xp,
+            melhor_dia_data=self.best_date,
+            contar_acima=self.positives.count_at_least,
+            total_positivos=self.pos_count,
+            desvio_padrao=_desvio_padrao(self.pos_count, self.pos_sum, self.pos_sumsq),
+            xp_hoje=self.last_daily,
+            milestone_index=self.milestone_index,
+            rollups=self.rollups,
+            rolling=self.rolling,
+            enrich=lambda xp_meta_diaria, xp_consolidada: _add_derived_columns(
+                df, xp_meta_diaria, xp_consolidada, row_columns=row_columns
+            )
+        )
+
+    # --- Serialização ---
+
+    def to_dict(self) -> Dict[str, Any]:
+        state = {k: v for k, v in vars(self).items() if k not in ("rollups", "rolling", "row_columns", "positives")}
+        state["milestone_index"] = self.milestone_index.to_dict()
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "MetricsAccumulator":
+        acc = cls(state.get("milestone_levels", MILESTONES))
+        for k, v in state.items():
+            if k == "milestone_index":
+                acc.milestone_index = MilestoneIndex.from_dict(v)
+            elif hasattr(acc, k):
+                setattr(acc, k, v)
+        # Agregados em memória: refeitos do DataFrame (e o histórico conferido) no primeiro update
+        acc.rollups = acc.rolling = acc.row_columns = acc.positives = None
+        return acc
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MetricsAccumulator":
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError):
+            return cls()
+
+
+_accumulators: Dict[str, MetricsAccumulator] = {}
+_saved_at: Dict[str, float] = {}
+_accumulators_lock = threading.Lock()
+
+
+def calculate_metrics_incremental(df: pd.DataFrame, level_target: int = 1000,
+                                  state_path: Optional[str] = None, full_resync: bool = False) -> Dict[str, Any]:
+    """
+    Versão incremental de `calculate_all_metrics`: mantém um acumulador por
+    `state_path` em memória e processa só as linhas novas. O estado vai para
+    o disco no máximo a cada METRICS_STATE_SAVE_SECONDS, não a cada refresh.
+    `full_resync` (dados de uma releitura completa) confere o histórico inteiro.
+    """
+    if df.empty:
+        raise ValueError("DataFrame vazio")
+
+    key = state_path or ""
+    with _accumulators_lock:
+        acc = _accumulators.get(key)
+        if acc is None:
+            acc = MetricsAccumulator.load(state_path) if state_path else MetricsAccumulator()
+            _accumulators[key] = acc
+        now = time.monotonic()
+        if acc.update(df, full_resync=full_resync) and state_path and now - _saved_at.get(key, -math.inf) >= METRICS_STATE_SAVE_SECONDS:
+            acc.save(state_path)
+            _saved_at[key] = now
+        return acc.metrics(df, level_target=level_target)
@@ -0,0 +1,102 @@
+# milestones.py
+from typing import Iterable, List, Tuple, Optional, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+from xp_calculator import cumulative_exp_closed
+
+MILESTONES = [200, 400, 600, 800, 900, 1000]
+
+
+class MilestoneIndex:
+    """
+    Índice da primeira data em que cada marco de nível foi atingido.
+
+    Em vez de um filtro `df[df["Experience"] >= xp]` por marco, usa o máximo
+    acumulado da XP (monotônico mesmo com mortes) e um único `searchsorted`
+    para todos os marcos pendentes. Suporta conjuntos densos de marcos (todo
+    nível, a cada 10 níveis...) e pode ser estendido com linhas novas.
+    """
+
+    def __init__(self, levels: Iterable[int] = MILESTONES):
+        self.levels = sorted(set(int(l) for l in levels))
+        self.thresholds = np.array([cumulative_exp_closed(l) for l in self.levels], dtype=np.float64)
+        self.dates: List[Optional[pd.Timestamp]] = [None] * len(self.levels)
+        self.n_reached = 0
+        self.running_max = -np.inf
+        self.n_rows = 0
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, levels: Iterable[int] = MILESTONES) -> "MilestoneIndex":
+        index = cls(levels)
+        index.extend(df)
+        return index
+
+    def extend(self, df: pd.DataFrame) -> None:
+        """Incorpora linhas novas (na ordem cronológica do DataFrame)."""
+        if df.empty:
+            return
+        exp = np.nan_to_num(df["Experience"].to_numpy(dtype=np.float64, na_value=np.nan), nan=-np.inf)
+        running = np.maximum.accumulate(np.maximum(exp, self.running_max))
+
+        pending = self.thresholds[self.n_reached:]
+        positions = np.searchsorted(running, pending, side="left")
+        hits = int((positions < len(running)).sum())
+        if hits:
+            dates = df["create_at"].to_numpy()[positions[:hits]]
+            for offset, date in enumerate(dates):
+                self.dates[self.n_reached + offset] = pd.Timestamp(date)
+            self.n_reached += hits
+
+        self.running_max = float(running[-1])
+        self.n_rows += len(df)
+
+    def extended(self, df: pd.DataFrame) -> "MilestoneIndex":
+        """Cópia estendida com as linhas novas; a instância atual não muda (snapshots já publicados a usam)."""
+        index = MilestoneIndex.__new__(MilestoneIndex)
+        index.levels, index.thresholds = self.levels, self.thresholds
+        index.dates = list(self.dates)
+        index.n_reached, index.running_max, index.n_rows = self.n_reached, self.running_max, self.n_rows
+        index.extend(df)
+        return index
+
+    def date_for(self, level: int) -> Optional[pd.Timestamp]:
+        """Data em que `level` foi atingido, ou None (também para níveis fora do índice)."""
+        try:
+            return self.dates[self.levels.index(level)]
+        except ValueError:
+            return None
+
+    def reached(self) -> List[Tuple[int, pd.Timestamp, float]]:
+        """Marcos atingidos como (nível, data, XP do marco)."""
+        return [
+            (self.levels[i], self.dates[i], float(self.thresholds[i]))
+            for i in range(self.n_reached)
+        ]
+
+    def history(self, levels: Optional[Iterable[int]] = None) -> List[Tuple[int, Optional[str], bool]]:
+        """Lista (nível, data dd/mm/aaaa, atingido) no formato usado pelo layout."""
+        result = []
+        for level in (self.levels if levels is None else levels):
+            date = self.date_for(level)
+            result.append((level, date.strftime("%d/%m/%Y") if date is not None else None, date is not None))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "levels": self.levels,
+            "dates": [d.isoformat() if d is not None else None for d in self.dates],
+            "n_reached": self.n_reached,
+            "running_max": self.running_max,
+            "n_rows": self.n_rows,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "MilestoneIndex":
+        index = cls(state["levels"])
+        index.dates = [pd.Timestamp(d) if d is not None else None for d in state["dates"]]
+        index.n_reached = state["n_reached"]
+        index.running_max = state["running_max"]
+        index.n_rows = state["n_rows"]
+        return index
@@ -0,0 +1,187 @@
+# rolling_stats.py
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Janelas (em linhas, uma leitura por dia) usadas pelas métricas e gráficos
+WINDOWS = (7, 30, 90)
+
+
+class GrowingArray:
+    """
+    Array só de acréscimo com capacidade que dobra: `appended` custa O(linhas
+    novas) amortizado, sem recopiar o histórico. Cada versão enxerga só as suas
+    `n` posições, então versões antigas (snapshots já publicados) continuam
+    válidas; só a versão mais nova escreve no buffer compartilhado, as outras
+    copiam antes. Quem estende serializa as chamadas (o acumulador de métricas).
+    """
+
+    def __init__(self, values: Iterable[Any] = (), dtype: Any = np.float64):
+        values = np.asarray(values, dtype=dtype)
+        self._buffer = np.empty(max(16, 2 * len(values)), dtype=values.dtype)
+        self._buffer[:len(values)] = values
+        self._written = [len(values)]  # compartilhado entre as versões do mesmo buffer
+        self.n = len(values)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, index: Any) -> Any:
+        return self._buffer[:self.n][index]
+
+    @property
+    def values(self) -> np.ndarray:
+        view = self._buffer[:self.n]
+        view.flags.writeable = False
+        return view
+
+    def appended(self, values: Any) -> "GrowingArray":
+        """Nova versão com `values` no fim; o dtype é promovido se preciso (ex.: int com NaN)."""
+        values = np.asarray(values)
+        dtype = np.result_type(self._buffer.dtype, values.dtype)
+        need = self.n + len(values)
+        out = GrowingArray.__new__(GrowingArray)
+        if self._written[0] == self.n and need <= len(self._buffer) and dtype == self._buffer.dtype:
+            out._buffer, out._written = self._buffer, self._written
+        else:
+            capacity = max(16, len(self._buffer))
+            while capacity < need:
+                capacity *= 2
+            out._buffer = np.empty(capacity, dtype=dtype)
+            out._buffer[:self.n] = self._buffer[:self.n]
+            out._written = [self.n]
+        out._buffer[self.n:need] = values
+        out._written[0] = out.n = need
+        return out
+
+
+def _prefix(values: np.ndarray, start: float = 0) -> np.ndarray:
+    """
+    Somas acumuladas com o valor inicial na frente: a soma de [i, j) é p[j] - p[i].
+    A soma continua de `start` valor a valor, então estender em blocos dá os
+    mesmos floats que montar tudo de uma vez.
+    """
+    return np.cumsum(np.concatenate(([start], values)))
+
+
+class RollingStats:
+    """
+    Estatísticas móveis de `daily_exp` (média, desvio padrão, soma e dias
+    positivos) para qualquer janela de N linhas, como `rolling(N, min_periods=1)`.
+
+    Uma passada pelo histórico monta somas acumuladas (valor, quadrado e dias
+    positivos, em `GrowingArray`); cada janela sai da diferença entre duas
+    posições, em O(n) qualquer que seja N. Calculadas uma vez por snapshot e estendidas com as
+    linhas novas, como os `Rollups`. `latest` lê só a última janela; as séries
+    completas (gráficos) ficam em cache na instância, uma por snapshot.
+    """
+
+    def __init__(self, windows: Iterable[int] = WINDOWS):
+        self.windows = tuple(sorted(set(windows)))
+        self.n_rows = 0
+        # Quadrados centrados em `shift` (XP da primeira linha) para reduzir o
+        # cancelamento no desvio padrão. Depende só da primeira linha, então a
+        # montagem completa e a incremental usam o mesmo; XP diária é inteira,
+        # então as somas simples são exatas em float64
+        self.shift: Optional[float] = None
+        self._sum = GrowingArray([0.0])
+        self._sumsq = GrowingArray([0.0])
+        self._pos_sum = GrowingArray([0.0])
+        self._pos_count = GrowingArray([0], dtype=np.int64)
+        self._cache: Dict[int, Dict[str, np.ndarray]] = {}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, windows: Iterable[int] = WINDOWS) -> "RollingStats":
+        stats = cls(windows)
+        stats.extend(df)
+        return stats
+
+    def extend(self, df: pd.DataFrame) -> None:
+        """Incorpora linhas novas (em ordem cronológica); XP diária ausente conta como 0."""
+        if df.empty:
+            return
+        values = np.nan_to_num(df["daily_exp"].to_numpy(dtype=np.float64))
+        if self.shift is None:
+            self.shift = float(values[0])
+        positive = values > 0
+        self._sum = self._sum.appended(_prefix(values, self._sum[-1])[1:])
+        self._sumsq = self._sumsq.appended(_prefix((values - self.shift) ** 2, self._sumsq[-1])[1:])
+        self._pos_sum = self._pos_sum.appended(_prefix(np.where(positive, values, 0), self._pos_sum[-1])[1:])
+        self._pos_count = self._pos_count.appended(_prefix(positive.astype(np.int64), self._pos_count[-1])[1:])
+        self.n_rows += len(values)
+        self._cache = {}
+
+    def extended(self, df: pd.DataFrame) -> "RollingStats":
+        """Cópia estendida com as linhas novas; a instância atual não muda (snapshots já publicados a usam)."""
+        stats = RollingStats(self.windows)
+        stats.n_rows, stats.shift = self.n_rows, self.shift
+        stats._sum, stats._sumsq = self._sum, self._sumsq
+        stats._pos_sum, stats._pos_count = self._pos_sum, self._pos_count
+        stats.extend(df)
+        return stats
+
+    def cache_key(self) -> str:
+        """Chave barata para o cache de figuras (o DataFrame de origem já entra na chave)."""
+        return f"rolling:{self.n_rows}"
+
+    def window(self, size: int) -> Dict[str, np.ndarray]:
+        """Séries da janela `size` (uma posição por linha): mean, std, sum, positive_days e positive_mean."""
+        series = self._cache.get(size)
+        if series is None:
+            series = self._cache[size] = self._window_at(size, np.arange(1, self.n_rows + 1))
+        return series
+
+    def tail(self, size: int, rows: int) -> Dict[str, np.ndarray]:
+        """Séries da janela `size` só nas últimas `rows` linhas (o que as linhas novas acrescentam)."""
+        return self._window_at(size, np.arange(self.n_rows - rows + 1, self.n_rows + 1))
+
+    def _window_at(self, size: int, end: np.ndarray) -> Dict[str, np.ndarray]:
+        """Janelas `size` que terminam antes de cada posição de `end` (1..n_rows)."""
+        start = np.maximum(end - size, 0)
+        count = (end - start).astype(np.float64)
+        sums, sumsq = self._sum.values, self._sumsq.values
+        pos_sum, pos_count = self._pos_sum.values, self._pos_count.values
+        total = sums[end] - sums[start]
+        # Soma dos desvios em relação a `shift` e soma dos quadrados: variância amostral (ddof=1)
+        centered = total - count * (self.shift or 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = (sumsq[end] - sumsq[start] - centered * centered / count) / (count - 1)
+            positive_days = pos_count[end] - pos_count[start]
+            positive_mean = (pos_sum[end] - pos_sum[start]) / positive_days
+        return {
+            "mean": total / count,
+            "std": np.where(count > 1, np.sqrt(np.maximum(var, 0.0)), np.nan),
+            "sum": total,
+            "positive_days": positive_days,
+            "positive_mean": positive_mean,
+        }
+
+    def mean(self, size: int) -> np.ndarray:
+        return self.window(size)["mean"]
+
+    def std(self, size: int) -> np.ndarray:
+        return self.window(size)["std"]
+
+    def latest(self, size: int) -> Dict[str, float]:
+        """Janela `size` terminando na última linha; `media_positiva` é 0 sem dias positivos."""
+        if not self.n_rows:
+            raise ValueError("Sem linhas")
+        # Só a janela que termina na última linha, sem montar a série inteira
+        series = self._cache.get(size) or self._window_at(size, np.array([self.n_rows]))
+        return {
+            "dias": min(size, self.n_rows),
+            "media": float(series["mean"][-1]),
+            "desvio": float(np.nan_to_num(series["std"][-1])),
+            "total": float(series["sum"][-1]),
+            "dias_positivos": int(series["positive_days"][-1]),
+            "media_positiva": float(np.nan_to_num(series["positive_mean"][-1])),
+        }
+
+    def summary(self, windows: Optional[Iterable[int]] = None) -> Dict[str, Dict[str, float]]:
+        """Ritmo nas janelas (padrão: `self.windows`), com chaves "7d", "30d"..."""
+        return {f"{w}d": self.latest(w) for w in (windows or self.windows)}
+
+
+def ensure_rolling(df: pd.DataFrame, rolling: Optional[RollingStats]) -> RollingStats:
+    return rolling if rolling is not None else RollingStats.build(df)
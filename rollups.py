@@ -0,0 +1,131 @@
+# rollups.py
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DIAS_SEMANA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sab", "Dom"]
+AGGREGATES = ["sum", "mean", "count", "max"]
+
+
+def _aggregate_daily(df: pd.DataFrame) -> pd.DataFrame:
+    values = df["daily_exp"].astype(np.float64)
+    table = values.groupby(df["create_at"].dt.normalize().rename("date"), sort=True).agg(["sum", "count", "max"])
+    table["mean"] = table["sum"] / table["count"]
+    return table[AGGREGATES]
+
+
+def _roll_up(daily: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Demais níveis a partir dos agregados diários (soma de somas e contagens,
+    máximo dos máximos): as chaves de data são derivadas por dia, não por linha.
+    """
+    dates = daily.index
+    iso = dates.isocalendar()
+    keys = {
+        "weekly": [iso["year"].rename("iso_year"), iso["week"].rename("iso_week")],
+        "monthly": [pd.Series(dates.to_period("M").start_time, index=dates, name="month")],
+        "weekday": [pd.Series(dates.weekday, index=dates, name="weekday")],
+        # Semana ISO (sem o ano) x dia da semana, usada pelo heatmap semanal
+        "week_weekday": [iso["week"].rename("iso_week"), pd.Series(dates.weekday, index=dates, name="weekday")],
+    }
+    tables = {}
+    for level, level_keys in keys.items():
+        table = daily.groupby(level_keys, sort=True).agg({"sum": "sum", "count": "sum", "max": "max"})
+        table["mean"] = table["sum"] / table["count"]
+        tables[level] = table[AGGREGATES]
+    return tables
+
+
+def _merge(table: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Combina agregados de linhas novas com os existentes (soma, contagem e máximo)."""
+    if table.empty:
+        return new
+    overlap = new.index.intersection(table.index)
+    if len(overlap):
+        old = table.loc[overlap]
+        new = new.copy()
+        new.loc[overlap, "sum"] += old["sum"]
+        new.loc[overlap, "count"] += old["count"]
+        new.loc[overlap, "max"] = np.maximum(new.loc[overlap, "max"], old["max"])
+        new["mean"] = new["sum"] / new["count"]
+        table = table.drop(overlap)
+    merged = pd.concat([table, new])
+    return merged if merged.index.is_monotonic_increasing else merged.sort_index()
+
+
+class Rollups:
+    """
+    Agregados de `daily_exp` (soma, média, contagem e máximo) por dia, semana
+    ISO, mês, dia da semana e semana x dia da semana.
+
+    Calculados uma vez por snapshot e estendidos com as linhas novas, para que
+    os gráficos agregados leiam tabelas pequenas em vez de reagrupar o
+    DataFrame inteiro a cada renderização.
+    """
+
+    LEVELS = ["daily", "weekly", "monthly", "weekday", "week_weekday"]
+
+    def __init__(self):
+        self.n_rows = 0
+        self.tables: Dict[str, pd.DataFrame] = {
+            level: pd.DataFrame(columns=AGGREGATES, dtype=np.float64) for level in self.LEVELS
+        }
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "Rollups":
+        rollups = cls()
+        rollups.extend(df)
+        return rollups
+
+    def extend(self, df: pd.DataFrame) -> None:
+        """Incorpora linhas novas (em ordem cronológica)."""
+        self.n_rows += len(df)
+        df = df.dropna(subset=["create_at"])
+        if df.empty:
+            return
+        daily = _aggregate_daily(df)
+        self.tables["daily"] = _merge(self.tables["daily"], daily)
+        for level, table in _roll_up(daily).items():
+            self.tables[level] = _merge(self.tables[level], table)
+
+    def extended(self, df: pd.DataFrame) -> "Rollups":
+        """Cópia estendida com as linhas novas; a instância atual não muda (snapshots já publicados a usam)."""
+        rollups = Rollups()
+        rollups.n_rows = self.n_rows
+        rollups.tables = dict(self.tables)
+        rollups.extend(df)
+        return rollups
+
+    def cache_key(self) -> str:
+        """Chave barata para o cache de figuras (o DataFrame de origem já entra na chave)."""
+        return f"rollups:{self.n_rows}"
+
+    @property
+    def daily(self) -> pd.DataFrame:
+        return self.tables["daily"]
+
+    @property
+    def weekly(self) -> pd.DataFrame:
+        return self.tables["weekly"]
+
+    @property
+    def monthly(self) -> pd.DataFrame:
+        return self.tables["monthly"]
+
+    @property
+    def weekday(self) -> pd.DataFrame:
+        """Indexado de 0 (segunda) a 6 (domingo), com todos os dias presentes."""
+        return self.tables["weekday"].reindex(range(7))
+
+    def weekday_by_week(self, aggregate: str = "sum") -> pd.DataFrame:
+        """Matriz dia da semana (Seg..Dom) x semana ISO ("S01".."S53")."""
+        table = self.tables["week_weekday"][aggregate].unstack("iso_week", fill_value=0)
+        table = table.reindex(range(7), fill_value=0)
+        table.index = DIAS_SEMANA
+        table.columns = [f"S{int(w):02d}" for w in table.columns]
+        return table
+
+
+def ensure_rollups(df: pd.DataFrame, rollups: Optional[Rollups]) -> Rollups:
+    return rollups if rollups is not None else Rollups.build(df)
@@ -0,0 +1,174 @@
+# sheets_client.py
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import requests
+from google.auth.credentials import AnonymousCredentials, Credentials as BaseCredentials
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+
+from instrumentation import Counter, REGISTRY, stage
+from throttling import sheets_call
+
+if TYPE_CHECKING:
+    import gspread
+
+logger = logging.getLogger(__name__)
+
+# Conexões mantidas abertas por host e antecedência (segundos) com que o
+# token OAuth é renovado antes de expirar
+SHEETS_POOL_SIZE = int(os.getenv("SHEETS_POOL_SIZE", "8"))
+SHEETS_TOKEN_MARGIN_SECONDS = float(os.getenv("SHEETS_TOKEN_MARGIN_SECONDS", "300"))
+# Endereço alternativo da API do Sheets (servidor local de teste); vazio usa o Google
+SHEETS_API_URL = os.getenv("SHEETS_API_URL", "").rstrip("/")
+
+GOOGLE_SHEETS_URL = "https://sheets.googleapis.com"
+
+READONLY_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets.readonly",
+    "https://www.googleapis.com/auth/drive.readonly"
+]
+
+CLIENT_EVENTS = REGISTRY.register(Counter(
+    "tibiatracker_sheets_client_events_total",
+    "Eventos do cliente do Sheets (authorize, token_refresh, open_worksheet, reuse, invalidate)", ["event"]
+))
+
+
+def load_google_credentials(scopes: Optional[List[str]] = None) -> Credentials:
+    scopes = scopes or READONLY_SCOPES
+
+    creds_json = os.getenv("GOOGLE_CREDENTIALS")
+    if creds_json:
+        try:
+            info = json.loads(creds_json)
+        except json.JSONDecodeError:
+            s = creds_json.strip().strip('"').replace("\\n", "\n")
+            info = json.loads(s)
+        return Credentials.from_service_account_info(info, scopes=scopes)
+    elif os.path.exists("credenciais.json"):
+        return Credentials.from_service_account_file("credenciais.json", scopes=scopes)
+    else:
+        raise ValueError("Defina GOOGLE_CREDENTIALS ou forneça credenciais.json")
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """Envia as requisições feitas a GOOGLE_SHEETS_URL para outro endereço (o gspread fixa a URL)."""
+
+    def __init__(self, base_url: str, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        request.url = self.base_url + request.url[len(GOOGLE_SHEETS_URL):]
+        return super().send(request, **kwargs)
+
+
+class SheetsClientManager:
+    """
+    Cliente do Sheets compartilhado pelo processo: credenciais lidas uma vez,
+    sessão HTTP com conexões reaproveitadas (sem novo handshake TLS a cada
+    leitura), token OAuth renovado antes de expirar e abas já abertas em cache.
+    Seguro para uso entre threads.
+    """
+
+    def __init__(self, credentials_factory: Callable[[], BaseCredentials] = load_google_credentials,
+                 api_url: str = SHEETS_API_URL, pool_size: int = SHEETS_POOL_SIZE,
+                 token_margin_seconds: float = SHEETS_TOKEN_MARGIN_SECONDS):
+        self._credentials_factory = credentials_factory
+        self.api_url = api_url.rstrip("/")
+        self.pool_size = pool_size
+        self.token_margin = timedelta(seconds=token_margin_seconds)
+        self._lock = threading.RLock()
+        self._creds: Optional[BaseCredentials] = None
+        self._auth_request: Optional[Request] = None
+        self._client: Optional["gspread.Client"] = None
+        self._spreadsheets: Dict[str, "gspread.Spreadsheet"] = {}
+        self._worksheets: Dict[Tuple[str, str], "gspread.Worksheet"] = {}
+
+    def _mount(self, session: requests.Session) -> None:
+        if self.api_url:
+            adapter = _RedirectAdapter(self.api_url, pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount(GOOGLE_SHEETS_URL, adapter)
+        else:
+            session.mount("https://", HTTPAdapter(pool_maxsize=self.pool_size))
+
+    def _ensure_client(self) -> "gspread.Client":
+        if self._client is None:
+            # gspread (e o oauthlib que ele carrega) só é importado na primeira leitura
+            import gspread
+            with stage("credentials"):
+                self._creds = self._credentials_factory()
+            with stage("authorize"):
+                # Sessão própria para o endpoint de token, também reaproveitada (um
+                # único Request: o google-auth fecha a sessão quando ele é descartado)
+                token_session = requests.Session()
+                self._mount(token_session)
+                self._auth_request = Request(token_session)
+                session = AuthorizedSession(self._creds, auth_request=self._auth_request)
+                self._mount(session)
+                self._client = gspread.Client(self._creds, session=session)
+            CLIENT_EVENTS.inc(event="authorize")
+        self._ensure_token()
+        return self._client
+
+    def _ensure_token(self) -> None:
+        """Renova o token se não existe ou expira em menos de `token_margin`."""
+        creds = self._creds
+        if creds is None or isinstance(creds, AnonymousCredentials):
+            return
+        expiry = getattr(creds, "expiry", None)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth usa UTC sem fuso
+        if creds.token and expiry is not None and expiry - now > self.token_margin:
+            return
+        with stage("token_refresh"):
+            creds.refresh(self._auth_request)
+        CLIENT_EVENTS.inc(event="token_refresh")
+        logger.debug(f"Token do Sheets renovado (expira em {creds.expiry})")
+
+    def client(self) -> "gspread.Client":
+        with self._lock:
+            return self._ensure_client()
+
+    def worksheet(self, sheet_id: str, worksheet_name: str) -> "gspread.Worksheet":
+        """Aba `worksheet_name` da planilha `sheet_id`, aberta uma única vez."""
+        with self._lock:
+            client = self._ensure_client()
+            sheet = self._worksheets.get((sheet_id, worksheet_name))
+            if sheet is not None:
+                CLIENT_EVENTS.inc(event="reuse")
+                return sheet
+            with stage("open_worksheet"):
+                spreadsheet = self._spreadsheets.get(sheet_id)
+                if spreadsheet is None:
+                    spreadsheet = self._spreadsheets[sheet_id] = sheets_call(client.open_by_key, sheet_id)
+                sheet = self._worksheets[(sheet_id, worksheet_name)] = sheets_call(spreadsheet.worksheet, worksheet_name)
+            CLIENT_EVENTS.inc(event="open_worksheet")
+            return sheet
+
+    def invalidate(self, sheet_id: str, worksheet_name: Optional[str] = None) -> None:
+        """Descarta as abas em cache (após erro: aba renomeada, removida, sem acesso...)."""
+        with self._lock:
+            if worksheet_name is None:
+                self._spreadsheets.pop(sheet_id, None)
+            for key in [k for k in self._worksheets if k[0] == sheet_id and worksheet_name in (None, k[1])]:
+                del self._worksheets[key]
+        CLIENT_EVENTS.inc(event="invalidate")
+
+    def close(self) -> None:
+        """Fecha as conexões; a próxima chamada autentica de novo."""
+        with self._lock:
+            if self._client is not None:
+                self._client.http_client.session.close()
+                self._auth_request.session.close()
+            self._creds = self._auth_request = self._client = None
+            self._spreadsheets.clear()
+            self._worksheets.clear()
+
+
+SHEETS_CLIENT = SheetsClientManager()
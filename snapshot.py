@@ -0,0 +1,378 @@
+# snapshot.py
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional, List
+
+import pandas as pd
+
+from data_loader import SNAPSHOT_DIR, FULL_RESYNC_ATTR
+from storage import STORAGE
+from metrics import calculate_metrics_incremental
+from figure_cache import dataframe_fingerprint
+from characters import Character, CHARACTERS, get_character
+from instrumentation import stage, trace, REFRESHES, ERRORS, SNAPSHOT_ROWS
+from throttling import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Com "1", o boot publica primeiro a última leitura salva em disco e a
+# atualização pela planilha segue em segundo plano
+BOOT_FROM_SNAPSHOT = os.getenv("BOOT_FROM_SNAPSHOT", "1") == "1"
+
+
+def metrics_state_path(character: Character) -> Optional[str]:
+    """Estado incremental das métricas, persistido junto ao snapshot dos dados."""
+    return os.path.join(SNAPSHOT_DIR, f"metrics_state_{character.slug}.json") if SNAPSHOT_DIR else None
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Dados e métricas de um carregamento da planilha, tratados como imutáveis.
+    `stale_error` marca um snapshot montado com a última leitura salva em
+    disco, porque a planilha não pôde ser lida (o erro da leitura).
+    """
+    key: str
+    character: Character
+    df: pd.DataFrame
+    metrics: Dict[str, Any]
+    created_at: datetime = field(default_factory=datetime.now)
+    stale_error: Optional[str] = None
+
+    @property
+    def stale(self) -> bool:
+        return self.stale_error is not None
+
+    @property
+    def level_target(self) -> int:
+        return self.character.level_target
+
+
+def build_snapshot(character: Character, allow_stale: bool = False) -> Snapshot:
+    """
+    Carrega o histórico do personagem (STORAGE), calcula as métricas e monta
+    um novo snapshot. Com `allow_stale`, uma falha na leitura usa os dados já
+    armazenados localmente (snapshot marcado como `stale`) em vez de propagar
+    o erro.
+    """
+    stale_error = None
+    try:
+        df = STORAGE.read(character)
+    except Exception as e:
+        df = STORAGE.query(character) if allow_stale else None
+        if df is None:
+            raise
+        stale_error = str(e)
+        logger.warning(f"Falha ao ler a planilha de {character.name}; usando a última leitura salva", exc_info=True)
+    return _make_snapshot(character, df, stale_error=stale_error)
+
+
+def build_cached_snapshot(character: Character) -> Optional[Snapshot]:
+    """
+    Snapshot dos dados já armazenados localmente, sem acessar a planilha
+    (None se não houver). `created_at` é o horário daquela sincronização.
+    """
+    with stage("snapshot_read"):
+        df = STORAGE.query(character)
+    if df is None:
+        return None
+    created_at = STORAGE.synced_at(character)
+    return _make_snapshot(character, df, **({"created_at": created_at} if created_at else {}))
+
+
+def _make_snapshot(character: Character, df: pd.DataFrame, **kwargs) -> Snapshot:
+    with stage("calculate_metrics"):
+        metrics = calculate_metrics_incremental(
+            df, level_target=character.level_target, state_path=metrics_state_path(character),
+            full_resync=df.attrs.get(FULL_RESYNC_ATTR, False)
+        )
+    key = f"{character.slug}-{dataframe_fingerprint(df)}-{character.level_target}"
+    return Snapshot(key=key, character=character, df=df, metrics=metrics, **kwargs)
+
+
+# Montagens simultâneas do mesmo personagem (primeiras requisições, refresher) viram uma só
+_BUILDS = SingleFlight("build_snapshot")
+
+
+def build_snapshot_once(character: Character, allow_stale: bool = False) -> Snapshot:
+    return _BUILDS.do((character.name, allow_stale), lambda: build_snapshot(character, allow_stale))
+
+
+class SnapshotRegistry:
+    """
+    Snapshots publicados, indexados pela chave enviada ao navegador.
+
+    Os callbacks de cada painel recebem só a chave (via dcc.Store) e buscam o
+    snapshot aqui, sem trafegar o DataFrame entre cliente e servidor.
+    """
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Snapshot]" = OrderedDict()
+        self._current: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+        # Incrementada a cada publicação; quem espera por novidades (SSE) é acordado
+        self.version = 0
+        self._published = threading.Condition(self._lock)
+
+    def publish(self, snapshot: Snapshot) -> Snapshot:
+        with self._lock:
+            return self._publish(snapshot)
+
+    def publish_if_absent(self, snapshot: Snapshot) -> Snapshot:
+        """Publica só se o personagem ainda não tem snapshot; retorna o atual."""
+        with self._lock:
+            return self._current.get(snapshot.character.name) or self._publish(snapshot)
+
+    def _publish(self, snapshot: Snapshot) -> Snapshot:
+        # Chamado com self._lock adquirido
+        self._entries.pop(snapshot.key, None)
+        self._entries[snapshot.key] = snapshot
+        self._current[snapshot.character.name] = snapshot
+        # Mantém alguns snapshots antigos além do atual de cada personagem
+        while len(self._entries) > self.max_entries + len(self._current):
+            self._entries.popitem(last=False)
+        self.version += 1
+        self._published.notify_all()
+        return snapshot
+
+    def wait_for_publish(self, version: int, timeout: float) -> int:
+        """Bloqueia até uma publicação posterior a `version` (ou `timeout`); retorna a versão atual."""
+        with self._published:
+            self._published.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def get(self, key: Optional[str]) -> Optional[Snapshot]:
+        with self._lock:
+            return self._entries.get(key) if key else None
+
+    def latest(self, character: Optional[str] = None) -> Optional[Snapshot]:
+        """Snapshot atual do personagem (ou do primeiro configurado)."""
+        with self._lock:
+            return self._current.get(get_character(character).name)
+
+    def current(self) -> List[Snapshot]:
+        with self._lock:
+            return list(self._current.values())
+
+
+SNAPSHOTS = SnapshotRegistry()
+
+
+def get_snapshot(key: Optional[str], character: Optional[str] = None) -> Snapshot:
+    """
+    Snapshot publicado com a chave informada. Se este processo não o conhece
+    (ex.: outro worker do gunicorn publicou), usa o snapshot atual do
+    personagem; só carrega a planilha se ainda não houver nenhum.
+    """
+    snapshot = SNAPSHOTS.get(key) or SNAPSHOTS.latest(character)
+    if snapshot is None and BOOT_FROM_SNAPSHOT:
+        snapshot = prewarm_snapshot(get_character(character))
+    if snapshot is None:
+        snapshot = SNAPSHOTS.publish(build_snapshot_once(get_character(character), allow_stale=True))
+    return snapshot
+
+
+def prewarm_snapshot(character: Character, registry: Optional["SnapshotRegistry"] = None) -> Optional[Snapshot]:
+    """Publica o snapshot salvo em disco se o personagem ainda não tem nenhum."""
+    registry = registry or SNAPSHOTS
+    cached = _BUILDS.do((character.name, "disk"), lambda: build_cached_snapshot(character))
+    return registry.publish_if_absent(cached) if cached is not None else registry.latest(character.name)
+
+
+# Intervalo dos comentários de keep-alive do SSE (proxies fecham conexões ociosas)
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "25"))
+# Streams SSE simultâneos por processo: cada um prende uma thread do worker
+# enquanto a aba está aberta, então metade das threads fica para os callbacks
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", str(max(1, int(os.getenv("GUNICORN_THREADS", "32")) // 2))))
+
+
+class StreamSlots:
+    """Vagas para streams SSE abertos neste processo; sem vaga, a aba volta a consultar pelo intervalo."""
+
+    def __init__(self, limit: int = SSE_MAX_STREAMS):
+        self.limit = limit
+        self.open = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.open >= self.limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.open = max(0, self.open - 1)
+
+
+SSE_STREAMS = StreamSlots()
+
+
+def snapshot_event(snapshot: Snapshot) -> Dict[str, Any]:
+    return {
+        "character": snapshot.character.name,
+        "key": snapshot.key,
+        "created_at_ms": int(snapshot.created_at.timestamp() * 1000),
+    }
+
+
+def snapshot_events(registry: SnapshotRegistry = SNAPSHOTS,
+                    heartbeat: float = SSE_HEARTBEAT_SECONDS) -> Iterator[str]:
+    """
+    Stream SSE (text/event-stream): um evento `snapshot` por publicação, com
+    personagem, chave e horário. A conexão fica parada esperando a próxima
+    publicação; o navegador decide se a chave mudou e só então pede os painéis.
+    """
+    yield "retry: 5000\n\n"
+    sent: Dict[str, int] = {}
+    version = -1
+    while True:
+        version = registry.wait_for_publish(version, heartbeat)
+        events = [e for e in map(snapshot_event, registry.current()) if sent.get(e["character"]) != e["created_at_ms"]]
+        if not events:
+            yield ": ping\n\n"
+            continue
+        for event in events:
+            sent[event["character"]] = event["created_at_ms"]
+            yield f"event: snapshot\ndata: {json.dumps(event)}\n\n"
+
+
+class SnapshotRefresher:
+    """
+    Thread em segundo plano que recarrega as abas de todos os personagens a
+    cada `interval` segundos e publica novos snapshots. Os callbacks só leem o
+    snapshot atual, então o tempo de resposta não depende da API do Google.
+    """
+
+    def __init__(self, registry: SnapshotRegistry = SNAPSHOTS, interval: float = 900,
+                 characters: Optional[List[Character]] = None, max_threads: int = 8):
+        self.registry = registry
+        self.interval = interval
+        self.characters = characters or CHARACTERS
+        self.max_threads = max_threads
+        self.last_errors: Dict[str, str] = {}
+        self.last_duration: Optional[float] = None
+        self.last_attempt: Optional[datetime] = None
+        self._first = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SnapshotRefresher":
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        if BOOT_FROM_SNAPSHOT:
+            self.prewarm()
+        while not self._stop.is_set():
+            self.refresh_now()
+            self._stop.wait(self.interval)
+
+    def refresh_now(self) -> List[Snapshot]:
+        """Recarrega todos os personagens em paralelo (leituras de I/O em threads)."""
+        self.last_attempt = datetime.now()
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_threads, len(self.characters))) as pool:
+                results = list(pool.map(self.refresh_character, self.characters))
+            return [s for s in results if s is not None]
+        finally:
+            self.last_duration = time.perf_counter() - start
+            self._first.set()
+
+    def prewarm(self) -> List[Snapshot]:
+        """Publica a última leitura salva de cada personagem antes da primeira atualização."""
+        snapshots = []
+        for character in self.characters:
+            try:
+                snapshot = prewarm_snapshot(character, self.registry)
+            except Exception:
+                logger.warning(f"Snapshot salvo de {character.name} ilegível; aguardando a planilha", exc_info=True)
+                continue
+            if snapshot is not None:
+                snapshots.append(snapshot)
+                logger.info(f"Boot de {character.name} com a leitura salva em {snapshot.created_at:%d/%m %H:%M}")
+        return snapshots
+
+    def refresh_character(self, character: Character) -> Optional[Snapshot]:
+        """
+        Recarrega um personagem; em caso de erro mantém o snapshot anterior
+        (ou, se ainda não há nenhum, publica um com a última leitura salva).
+        """
+        with trace(f"Atualização de {character.name}"):
+            try:
+                first = self.registry.latest(character.name) is None
+                snapshot = self.registry.publish(build_snapshot_once(character, allow_stale=first))
+            except Exception as e:
+                self.last_errors[character.name] = str(e)
+                REFRESHES.inc(character=character.name, result="error")
+                ERRORS.inc(source="refresh")
+                logger.exception(f"Erro ao atualizar o snapshot de {character.name} em segundo plano")
+                return None
+        if snapshot.stale:
+            self.last_errors[character.name] = snapshot.stale_error
+            REFRESHES.inc(character=character.name, result="stale")
+            return snapshot
+        self.last_errors.pop(character.name, None)
+        REFRESHES.inc(character=character.name, result="ok")
+        SNAPSHOT_ROWS.set(len(snapshot.df), character=character.name)
+        logger.info(f"Snapshot de {character.name} atualizado: {len(snapshot.df)} registros")
+        return snapshot
+
+    def last_error(self, character: Optional[str] = None) -> Optional[str]:
+        return self.last_errors.get(get_character(character).name)
+
+    def wait_for_first(self, timeout: float, character: Optional[str] = None) -> Optional[Snapshot]:
+        """
+        Aguarda um snapshot do personagem (o salvo em disco, no boot) ou o fim
+        da primeira tentativa de carga (usado só logo após o boot).
+        """
+        deadline = time.monotonic() + timeout
+        version = self.registry.version
+        while self.registry.latest(character) is None and not self._first.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Acorda a cada publicação; o limite cobre uma primeira carga que falhou sem publicar
+            version = self.registry.wait_for_publish(version, min(remaining, 0.5))
+        return self.registry.latest(character)
+
+    def status(self) -> Dict[str, Any]:
+        characters = {}
+        for c in self.characters:
+            snapshot = self.registry.latest(c.name)
+            characters[c.name] = {
+                "snapshot_created_at": snapshot.created_at.isoformat() if snapshot else None,
+                "snapshot_age_seconds": round(snapshot_age(snapshot), 1) if snapshot else None,
+                "snapshot_rows": len(snapshot.df) if snapshot else 0,
+                "stale": bool(snapshot and (snapshot.stale or c.name in self.last_errors)),
+                "last_error": self.last_errors.get(c.name),
+            }
+        return {
+            "characters": characters,
+            "refresh_interval_seconds": self.interval,
+            "last_refresh_attempt": self.last_attempt.isoformat() if self.last_attempt else None,
+            "last_refresh_seconds": round(self.last_duration, 3) if self.last_duration is not None else None,
+        }
+
+
+def snapshot_age(snapshot: Snapshot) -> float:
+    """Idade do snapshot em segundos."""
+    return (datetime.now() - snapshot.created_at).total_seconds()
+
+
+REFRESHER = SnapshotRefresher(interval=float(os.getenv("REFRESH_INTERVAL_SECONDS", "900")))
@@ -0,0 +1,337 @@
+# storage.py
+import os
+import sys
+import hashlib
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from characters import Character, CHARACTERS, get_character
+from data_loader import (
+    SNAPSHOT_DIR, CATEGORY_COLUMNS, FULL_RESYNC_ATTR, load_sheet_data, load_cached_sheet_data,
+    cached_sheet_synced_at
+)
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+# Origem dos dados dos snapshots: "sheets" (planilha) ou "sqlite" (banco local,
+# espelhado da planilha a cada atualização; com STORAGE_MIRROR=0, só o que a
+# sincronização e o backfill gravaram, sem acessar a planilha)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sheets")
+STORAGE_PATH = os.getenv("STORAGE_PATH") or os.path.join(SNAPSHOT_DIR or ".", "tibiatracker.sqlite3")
+STORAGE_MIRROR = os.getenv("STORAGE_MIRROR", "1") == "1"
+
+# Datas gravadas como texto ISO: a ordem do texto é a ordem cronológica
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def date_bounds(start: Optional[Any] = None, end: Optional[Any] = None) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    """Intervalo [start, end] em dias inteiros como [início, fim exclusivo)."""
+    lo = pd.Timestamp(start).normalize() if start is not None else None
+    hi = pd.Timestamp(end).normalize() + pd.Timedelta(days=1) if end is not None else None
+    return lo, hi
+
+
+def slice_dates(df: pd.DataFrame, start: Optional[Any] = None, end: Optional[Any] = None) -> pd.DataFrame:
+    lo, hi = date_bounds(start, end)
+    mask = np.ones(len(df), dtype=bool)
+    if lo is not None:
+        mask &= (df["create_at"] >= lo).to_numpy()
+    if hi is not None:
+        mask &= (df["create_at"] < hi).to_numpy()
+    return df if mask.all() else df[mask]
+
+
+class StorageBackend:
+    """
+    Origem do histórico de XP de cada personagem.
+
+    `read` traz os dados atuais (pode acessar a rede); `query` lê só o que já
+    está armazenado localmente, sem rede (None se não houver nada). Os dois
+    aceitam um intervalo de datas (`start`/`end`, inclusive).
+    """
+    name = "base"
+
+    def read(self, character: Character, start: Optional[Any] = None, end: Optional[Any] = None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def query(self, character: Character, start: Optional[Any] = None,
+              end: Optional[Any] = None) -> Optional[pd.DataFrame]:
+        raise NotImplementedError
+
+    def synced_at(self, character: Character) -> Optional[datetime]:
+        """Horário da última sincronização dos dados locais (None se desconhecido)."""
+        return None
+
+
+class SheetsBackend(StorageBackend):
+    """
+    Planilha do Google. A API não filtra por data: `read` baixa a aba (de
+    forma incremental) e recorta no pandas; `query` lê o snapshot em Parquet
+    com o filtro aplicado na leitura.
+    """
+    name = "sheets"
+
+    def read(self, character, start=None, end=None):
+        return slice_dates(load_sheet_data(worksheet_name=character.worksheet), start, end)
+
+    def query(self, character, start=None, end=None):
+        return load_cached_sheet_data(character.worksheet, start, end)
+
+    def synced_at(self, character):
+        return cached_sheet_synced_at(character.worksheet)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS xp_history (
+    character TEXT NOT NULL,
+    create_at TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    experience INTEGER NOT NULL,
+    name TEXT,
+    vocation TEXT,
+    source TEXT NOT NULL,
+    PRIMARY KEY (character, create_at, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    character TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    fingerprint TEXT,
+    synced_at TEXT NOT NULL
+);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Banco SQLite local (um arquivo), com a chave primária (personagem, data)
+    como índice agrupado: filtros por personagem e intervalo de datas viram
+    uma busca no índice em vez de ler o histórico inteiro.
+
+    `seq` ordena as leituras de um mesmo instante. `daily_exp` não é gravado:
+    sai da diferença entre leituras na consulta, como na ingestão da planilha.
+    Com `source`, `read` sem intervalo (a leitura que monta os snapshots)
+    espelha a fonte antes de consultar; as demais leituras só consultam.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str = STORAGE_PATH, source: Optional[StorageBackend] = None):
+        self.path = path
+        self.source = source
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por thread (o sqlite3 não compartilha conexões entre threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def read(self, character, start=None, end=None):
+        replaced = False
+        if self.source is not None and start is None and end is None:
+            _, replaced = self._sync(character)
+        df = self.query(character, start, end)
+        df = df if df is not None else _empty_frame()
+        if replaced:
+            df.attrs[FULL_RESYNC_ATTR] = True
+        return df
+
+    def query(self, character, start=None, end=None):
+        lo, hi = date_bounds(start, end)
+        sql = "SELECT create_at, experience, name, vocation FROM xp_history WHERE character = ?"
+        params: List[Any] = [character.name]
+        if lo is not None:
+            sql += " AND create_at >= ?"
+            params.append(lo.strftime(ISO_FORMAT))
+        if hi is not None:
+            sql += " AND create_at < ?"
+            params.append(hi.strftime(ISO_FORMAT))
+        conn = self._connect()
+        with stage("storage_query"):
+            rows = conn.execute(sql + " ORDER BY create_at, seq", params).fetchall()
+            # Leitura anterior ao intervalo: o daily_exp da primeira linha parte dela
+            prev = None
+            if rows and lo is not None:
+                prev = conn.execute(
+                    "SELECT experience FROM xp_history WHERE character = ? AND create_at < ? "
+                    "ORDER BY create_at DESC, seq DESC LIMIT 1", (character.name, params[1])
+                ).fetchone()
+        if not rows:
+            return None
+        return _to_frame(rows, prev[0] if prev else None)
+
+    def write(self, character: Character, df: pd.DataFrame, source: str, replace: bool = True,
+              seq: Optional[np.ndarray] = None, conn: Optional[sqlite3.Connection] = None) -> int:
+        """
+        Grava as linhas de `df` (create_at, Experience e, se houver, Name e
+        Vocation) em uma transação, ou na de `conn`. Com `replace=False`,
+        linhas já existentes (mesmo personagem, instante e `seq`) são mantidas.
+        Retorna quantas linhas foram gravadas.
+        """
+        if df.empty:
+            return 0
+        if conn is None:
+            conn = self._connect()
+            with self._write_lock, conn:
+                return self.write(character, df, source, replace, seq, conn)
+        if seq is None:
+            seq = df.groupby("create_at", sort=False).cumcount().to_numpy()
+        records = zip(
+            [character.name] * len(df),
+            df["create_at"].dt.strftime(ISO_FORMAT),
+            seq.tolist(),
+            df["Experience"].astype(np.int64).tolist(),
+            *[(df[c].astype(object).where(df[c].notna(), None).tolist() if c in df else [None] * len(df))
+              for c in CATEGORY_COLUMNS],
+            [source] * len(df),
+        )
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        before = conn.total_changes
+        conn.executemany(
+            f"{verb} INTO xp_history (character, create_at, seq, experience, name, vocation, source) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", records
+        )
+        return conn.total_changes - before
+
+    def sync(self, character: Character, full: bool = False) -> int:
+        """
+        Espelha a fonte no banco. Se as linhas já espelhadas continuam iguais
+        no início da fonte (mesmo fingerprint de data e XP), grava só as novas;
+        senão substitui as linhas do personagem vindas dessa fonte.
+        """
+        return self._sync(character, full)[0]
+
+    def _sync(self, character: Character, full: bool = False) -> Tuple[int, bool]:
+        """`sync`, retornando também se as linhas da fonte foram substituídas."""
+        if self.source is None:
+            raise ValueError("SQLiteBackend sem fonte para sincronizar")
+        df = self.source.read(character)
+        seq = df.groupby("create_at", sort=False).cumcount().to_numpy()
+        conn = self._connect()
+        with stage("storage_sync"), self._write_lock, conn:
+            state = conn.execute(
+                "SELECT rows, fingerprint FROM sync_state WHERE character = ?", (character.name,)
+            ).fetchone()
+            start = 0
+            if not full and state and 0 < state[0] <= len(df) and _fingerprint(df.iloc[:state[0]]) == state[1]:
+                start = state[0]
+            if start == 0:
+                conn.execute("DELETE FROM xp_history WHERE character = ? AND source = ?",
+                             (character.name, self.source.name))
+            written = self.write(character, df.iloc[start:], self.source.name, seq=seq[start:], conn=conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (character, rows, fingerprint, synced_at) VALUES (?, ?, ?, ?)",
+                (character.name, len(df), _fingerprint(df), datetime.now().isoformat())
+            )
+        logger.info(f"Banco local de {character.name}: {written} linhas gravadas "
+                    f"({'incremental' if start else 'completa'})")
+        return written, start == 0
+
+    def synced_at(self, character):
+        row = self._connect().execute(
+            "SELECT synced_at FROM sync_state WHERE character = ?", (character.name,)
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _fingerprint(df: pd.DataFrame) -> str:
+    """Hash das datas e XP das linhas, na ordem (detecta edições em qualquer linha)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(df[["create_at", "Experience"]], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame(columns=["create_at", "Experience", "daily_exp"])
+
+
+def _to_frame(rows: List[tuple], prev_experience: Optional[int] = None) -> pd.DataFrame:
+    raw = pd.DataFrame.from_records(rows, columns=["create_at", "Experience", *CATEGORY_COLUMNS])
+    df = pd.DataFrame({
+        "create_at": pd.to_datetime(raw["create_at"], format=ISO_FORMAT),
+        "Experience": raw["Experience"].astype(np.int64),
+    })
+    for column in CATEGORY_COLUMNS:
+        if raw[column].notna().any():
+            df[column] = pd.Categorical(raw[column])
+    exp = df["Experience"]
+    if prev_experience is not None:
+        exp = pd.concat([pd.Series([prev_experience]), exp], ignore_index=True)
+    df["daily_exp"] = exp.diff().fillna(0).clip(lower=0).iloc[len(exp) - len(df):].to_numpy()
+    return df
+
+
+def create_storage(kind: str = STORAGE_BACKEND) -> StorageBackend:
+    if kind == "sheets":
+        return SheetsBackend()
+    if kind == "sqlite":
+        return SQLiteBackend(STORAGE_PATH, source=SheetsBackend() if STORAGE_MIRROR else None)
+    raise ValueError(f"STORAGE_BACKEND desconhecido: {kind} (use sheets ou sqlite)")
+
+
+STORAGE = create_storage()
+
+
+def sync_all(characters: Iterable[Character] = CHARACTERS, store: Optional[SQLiteBackend] = None,
+             full: bool = False) -> int:
+    """Espelha a planilha de cada personagem no banco local; retorna quantos falharam."""
+    store = store or SQLiteBackend(STORAGE_PATH, source=SheetsBackend())
+    failures = 0
+    for character in characters:
+        try:
+            store.sync(character, full=full)
+        except Exception:
+            failures += 1
+            logger.exception(f"Falha ao sincronizar {character.name}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Banco local do histórico de XP (SQLite).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync = sub.add_parser("sync", help="espelha a planilha no banco local")
+    sync.add_argument("--character", help="só este personagem (padrão: todos)")
+    sync.add_argument("--full", action="store_true", help="regrava todas as linhas")
+    query = sub.add_parser("query", help="exporta o histórico do banco local em CSV")
+    query.add_argument("--character", help="personagem (padrão: o primeiro configurado)")
+    query.add_argument("--days", type=int, help="só os últimos N dias")
+    query.add_argument("--start", help="data inicial (AAAA-MM-DD)")
+    query.add_argument("--end", help="data final (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    if args.command == "sync":
+        characters = [get_character(args.character)] if args.character else CHARACTERS
+        sys.exit(1 if sync_all(characters, full=args.full) else 0)
+
+    start = args.start
+    if args.days:
+        start = pd.Timestamp.today().normalize() - pd.Timedelta(days=args.days - 1)
+    df = SQLiteBackend(STORAGE_PATH).query(get_character(args.character), start, args.end)
+    if df is None:
+        sys.exit("Nenhuma linha no banco local para esse filtro")
+    df.to_csv(sys.stdout, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# tests/test_collector.py
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from characters import Character
+from collector import HighscoreCollector, append_rows, build_rows
+
+WORLD = "Antica"
+PAGE_SIZE = 50
+
+
+class StubTibiaData:
+    """
+    Servidor local no formato da API de highscores do TibiaData.
+
+    `placed` põe personagens em páginas ({nome: página}); `failures` dá a
+    sequência de status de erro de cada página antes de ela responder 200;
+    `broken` são páginas que respondem 200 com corpo que não é JSON e
+    `short_page` é a última página do ranking (incompleta).
+    """
+
+    def __init__(self, total_pages: int = 20, placed: Optional[Dict[str, int]] = None,
+                 failures: Optional[Dict[int, List[int]]] = None, broken: Optional[List[int]] = None,
+                 short_page: Optional[int] = None):
+        self.total_pages = total_pages
+        self.placed = placed or {}
+        self.failures = {page: list(statuses) for page, statuses in (failures or {}).items()}
+        self.broken = set(broken or [])
+        self.short_page = short_page
+        self.requests: Counter = Counter()
+        self.url = ""
+
+    def _entries(self, page: int) -> List[Dict[str, Any]]:
+        size = PAGE_SIZE if self.short_page is None or page < self.short_page else 10
+        if self.short_page is not None and page > self.short_page:
+            size = 0
+        entries = [
+            {"rank": (page - 1) * PAGE_SIZE + i + 1, "name": f"Filler {page}-{i}", "vocation": "Elite Knight",
+             "world": WORLD, "level": 500, "value": 1_000_000_000 - page * 1000 - i}
+            for i in range(size)
+        ]
+        for i, name in enumerate(n for n, p in self.placed.items() if p == page):
+            entries[i] = dict(entries[i], name=name, level=700 + i, value=5_000_000_000 + i)
+        return entries
+
+    async def handle(self, request: web.Request) -> web.Response:
+        page = int(request.match_info["page"])
+        self.requests[page] += 1
+        if self.failures.get(page):
+            return web.Response(status=self.failures[page].pop(0))
+        if page in self.broken:
+            return web.Response(status=200, text="<html>Bad gateway</html>", content_type="text/html")
+        body = {"highscores": {
+            "world": WORLD, "category": "experience",
+            "highscore_list": self._entries(page),
+            "highscore_page": {"current_page": page, "total_pages": self.total_pages},
+        }}
+        return web.Response(text=json.dumps(body), content_type="application/json")
+
+    def run(self, characters: List[Character], **kwargs) -> Dict[str, Dict[str, Any]]:
+        async def main():
+            app = web.Application()
+            app.router.add_get("/highscores/{world}/{category}/{vocation}/{page}", self.handle)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = runner.addresses[0][1]
+            try:
+                kwargs.setdefault("backoff", 0.01)
+                return await HighscoreCollector(base_url=f"http://127.0.0.1:{port}", **kwargs).collect(characters)
+            finally:
+                await runner.cleanup()
+        return asyncio.run(main())
+
+
+def _character(name: str, worksheet: str = "EXP/DIA") -> Character:
+    return Character(name=name, worksheet=worksheet, world=WORLD, vocation="knights")
+
+
+def test_resolves_several_characters_in_one_sweep_and_stops_early():
+    stub = StubTibiaData(placed={"Alpha": 2, "Bravo": 4})
+    found = stub.run([_character("alpha"), _character("Bravo")], concurrency=2)
+
+    assert set(found) == {"alpha", "Bravo"}
+    assert found["Bravo"]["level"] == 700
+    # Janela de 2 páginas: nada além da página 5 chega a ser pedido
+    assert max(stub.requests) <= 5
+    assert all(count == 1 for count in stub.requests.values())
+
+
+def test_retries_server_errors_without_sweeping_every_page():
+    stub = StubTibiaData(placed={"Alpha": 3}, failures={3: [503]})
+    found = stub.run([_character("Alpha")], concurrency=4)
+
+    assert "Alpha" in found
+    assert stub.requests[3] == 2
+    # A janela fica presa na página 3 enquanto ela espera a nova tentativa
+    assert max(stub.requests) <= 3 + 4 - 1
+
+
+def test_gives_up_after_retries_and_keeps_sweeping():
+    stub = StubTibiaData(placed={"Alpha": 4}, failures={2: [500] * 10})
+    found = stub.run([_character("Alpha")], concurrency=2, retries=2)
+
+    assert "Alpha" in found
+    assert stub.requests[2] == 3
+
+
+def test_does_not_retry_client_errors():
+    stub = StubTibiaData(placed={"Alpha": 3}, failures={2: [404]})
+    found = stub.run([_character("Alpha")], concurrency=1)
+
+    assert "Alpha" in found
+    assert stub.requests[2] == 1
+
+
+def test_non_json_page_is_skipped():
+    stub = StubTibiaData(placed={"Alpha": 3}, broken=[2])
+    found = stub.run([_character("Alpha")], concurrency=1)
+
+    assert "Alpha" in found
+    assert stub.requests[2] == 1
+
+
+def test_short_page_ends_the_sweep():
+    stub = StubTibiaData(total_pages=20, short_page=3)
+    found = stub.run([_character("Missing")], concurrency=1)
+
+    assert found == {}
+    assert max(stub.requests) == 3
+
+
+def test_rows_are_appended_once_per_worksheet(monkeypatch):
+    characters = [_character("Alpha", "EXP/DIA"), _character("Bravo", "EXP/DIA"), _character("Charlie", "Outra")]
+    stub = StubTibiaData(placed={"Alpha": 1, "Bravo": 2, "Charlie": 2})
+    rows = build_rows(characters, stub.run(characters, concurrency=2))
+
+    appended: Dict[str, List[List[Any]]] = {}
+
+    class Worksheet:
+        def __init__(self, name):
+            self.name = name
+
+        def append_rows(self, values, value_input_option):
+            assert self.name not in appended
+            appended[self.name] = values
+
+    class Spreadsheet:
+        def worksheet(self, name):
+            return Worksheet(name)
+
+    class Client:
+        def open_by_key(self, key):
+            return Spreadsheet()
+
+    import gspread
+    import sheets_client
+    monkeypatch.setattr(sheets_client, "load_google_credentials", lambda scopes=None: object())
+    monkeypatch.setattr(gspread, "authorize", lambda creds: Client())
+    append_rows(rows)
+
+    assert sorted(appended) == ["EXP/DIA", "Outra"]
+    assert [row[1] for row in appended["EXP/DIA"]] == ["Alpha", "Bravo"]
+    assert [row[1:] for row in appended["Outra"]] == [["Charlie", "Elite Knight", 701, 5_000_000_001]]
@@ -0,0 +1,76 @@
+# tests/test_data_loader.py
+import re
+from datetime import datetime, timedelta
+from typing import Any, List
+
+import pytest
+
+import data_loader
+from data_loader import _sync_full, _sync_incremental
+
+HEADER = ["create_at", "Experience", "Name"]
+
+
+class FakeWorksheet:
+    """Aba em memória que responde `row_values` e `batch_get` por colunas, como o gspread."""
+
+    title = "EXP/DIA"
+
+    def __init__(self, rows: List[List[Any]]):
+        self.rows = [list(HEADER)] + [list(r) for r in rows]
+        self.fetched_rows = 0
+
+    def row_values(self, row: int) -> List[Any]:
+        return list(self.rows[row - 1])
+
+    def batch_get(self, ranges: List[str], major_dimension=None, value_render_option=None):
+        result = []
+        for r in ranges:
+            if r == "1:1":
+                result.append([[v] for v in self.rows[0]])
+                continue
+            col, first, end = re.fullmatch(r"([A-Z]+)(\d+):[A-Z]+(\d*)", r).groups()
+            values = [row[ord(col) - ord("A")] for row in self.rows[int(first) - 1:int(end) if end else None]]
+            self.fetched_rows += len(values)
+            result.append([values] if values else [])
+        return result
+
+
+def _rows(days: int) -> List[List[Any]]:
+    return [[f"{d % 28 + 1:02d}-{d // 28 + 1:02d}-2024", 1_000_000 + d * 5_000, "Druid"] for d in range(days)]
+
+
+@pytest.fixture
+def synced():
+    sheet = FakeWorksheet(_rows(100))
+    df, meta = _sync_full(sheet)
+    return sheet, df, meta
+
+
+def test_incremental_keeps_the_fingerprint_of_a_full_sync(synced):
+    sheet, df, meta = synced
+    sheet.rows += _rows(150)[100:]
+    inc_df, inc_meta = _sync_incremental(sheet, df, meta)
+    _, full_meta = _sync_full(sheet)
+    assert len(inc_df) == 150
+    assert inc_meta["fingerprint"] == full_meta["fingerprint"]
+
+
+def test_edited_old_row_forces_full_sync_when_verification_is_due(synced):
+    sheet, df, meta = synced
+    sheet.rows[10][1] += 1
+    # Conferência recente: só a última linha é comparada e a edição passa
+    assert _sync_incremental(sheet, df, meta)[0] is df
+    stale = dict(meta, verified_at=(datetime.now() - timedelta(hours=data_loader.SHEET_VERIFY_HOURS + 1)).isoformat())
+    assert _sync_incremental(sheet, df, stale) == (None, None)
+
+
+def test_verification_of_unchanged_history_renews_verified_at(synced):
+    sheet, df, meta = synced
+    stale = dict(meta, verified_at=(datetime.now() - timedelta(days=2)).isoformat())
+    sheet.fetched_rows = 0
+    out_df, out_meta = _sync_incremental(sheet, df, stale)
+    assert out_df is df
+    assert datetime.fromisoformat(out_meta["verified_at"]) > datetime.now() - timedelta(minutes=1)
+    # Conferência: data e XP de todas as linhas, mais a linha final de cada coluna
+    assert sheet.fetched_rows == 2 * 100 + len(HEADER)
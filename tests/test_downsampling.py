@@ -0,0 +1,35 @@
+# tests/test_downsampling.py
+import numpy as np
+import pandas as pd
+
+from downsampling import downsample
+
+
+def _series(start: str, periods: int, freq: str):
+    x = pd.Series(pd.date_range(start, periods=periods, freq=freq))
+    y = pd.Series(np.random.default_rng(0).random(periods))
+    return x, y
+
+
+def test_daily_history_keeps_the_last_year_whole():
+    x, y = _series("2019-01-01", 2000, "D")
+    for method in ("lttb", "minmax"):
+        xs, ys = downsample(x, y, 500, method, full_days=365)
+        recent = x[x >= x.iloc[-1] - pd.Timedelta(days=364)]
+        assert xs.iloc[-len(recent):].equals(recent)
+        assert len(xs) <= 500 + len(recent)
+        assert xs.is_monotonic_increasing and (ys.index == xs.index).all()
+
+
+def test_dense_recent_window_is_still_capped():
+    # 20 mil leituras dentro de um ano: tudo na janela recente, que também tem teto
+    x, y = _series("2024-01-01", 20_000, "15min")
+    xs, _ = downsample(x, y, 1000, full_days=365)
+    assert len(xs) <= 1000
+
+
+def test_dense_history_is_capped_per_segment():
+    x, y = _series("2020-01-01", 40_000, "2h")
+    xs, _ = downsample(x, y, 1000, full_days=365)
+    assert len(xs) <= 2 * 1000
+    assert xs.iloc[-1] == x.iloc[-1]
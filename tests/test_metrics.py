@@ -0,0 +1,74 @@
+# tests/test_metrics.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import metrics
+from metrics import MetricsAccumulator, calculate_all_metrics
+
+# Objetos (não escalares) do dicionário de métricas; o DataFrame é comparado à parte
+OBJECT_KEYS = {"df_enriched", "milestone_index", "rollups", "eta_simulation", "rolling_stats"}
+
+
+def _history(days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    daily = rng.integers(0, 6_000_000, days).astype(np.float64)
+    daily[rng.random(days) < 0.2] = 0
+    experience = 1_000_000_000 + np.cumsum(daily).astype(np.int64)
+    return pd.DataFrame({
+        "create_at": pd.date_range("2010-01-01", periods=days, freq="D"),
+        "Experience": experience,
+        "daily_exp": daily,
+    })
+
+
+def _assert_same_metrics(batch, incremental):
+    assert batch.keys() == incremental.keys()
+    for key in batch.keys() - OBJECT_KEYS:
+        assert incremental[key] == batch[key], key
+    pd.testing.assert_frame_equal(incremental["df_enriched"], batch["df_enriched"], check_exact=True)
+    assert batch["eta_simulation"] is not None
+    assert incremental["eta_simulation"].days == batch["eta_simulation"].days
+
+
+@pytest.mark.parametrize("splits", [(4000, 1000), (1, 2999, 1000, 1000), (4999, 1)])
+def test_split_updates_match_batch_exactly(splits):
+    df = _history(sum(splits))
+    acc = MetricsAccumulator()
+    end = 0
+    for size in splits:
+        end += size
+        assert acc.update(df.iloc[:end]) == size
+    _assert_same_metrics(calculate_all_metrics(df), acc.metrics(df))
+
+
+def test_reloaded_state_matches_batch():
+    df = _history(3000, seed=1)
+    acc = MetricsAccumulator()
+    acc.update(df.iloc[:2000])
+    reloaded = MetricsAccumulator.from_dict(acc.to_dict())
+    assert reloaded.update(df) == 1000
+    _assert_same_metrics(calculate_all_metrics(df), reloaded.metrics(df))
+
+
+def test_refresh_hashes_only_new_rows(monkeypatch):
+    df = _history(3000, seed=2)
+    acc = MetricsAccumulator()
+    acc.update(df.iloc[:2990])
+    hashed = []
+    original = metrics._rows_hash
+    monkeypatch.setattr(metrics, "_rows_hash", lambda rows: hashed.append(len(rows)) or original(rows))
+    acc.update(df)
+    assert hashed == [10]
+
+
+def test_full_resync_detects_edited_history():
+    df = _history(1000, seed=3)
+    acc = MetricsAccumulator()
+    acc.update(df)
+    edited = df.copy()
+    edited.loc[10, "daily_exp"] += 1
+    edited.loc[10:, "Experience"] += 1
+    edited = pd.concat([edited, _history(1001, seed=3).iloc[-1:]], ignore_index=True)
+    acc.update(edited, full_resync=True)
+    _assert_same_metrics(calculate_all_metrics(edited), acc.metrics(edited))
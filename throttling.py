@@ -0,0 +1,147 @@
+# throttling.py
+import os
+import time
+import random
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+from instrumentation import Counter, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Cota de leitura da API do Sheets (padrão do Google: 60 leituras/min por
+# usuário), rajada permitida e tentativas em erro de cota (429) ou 5xx
+SHEETS_READS_PER_MINUTE = float(os.getenv("SHEETS_READS_PER_MINUTE", "50"))
+SHEETS_BURST = int(os.getenv("SHEETS_BURST", "10"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+SHEETS_BACKOFF_BASE = float(os.getenv("SHEETS_BACKOFF_BASE", "1"))
+SHEETS_BACKOFF_MAX = float(os.getenv("SHEETS_BACKOFF_MAX", "60"))
+
+SHEETS_CALLS = REGISTRY.register(Counter(
+    "tibiatracker_sheets_calls_total", "Chamadas à API do Sheets por resultado (ok, retry, error)", ["result"]
+))
+COALESCED = REGISTRY.register(Counter(
+    "tibiatracker_coalesced_calls_total", "Chamadas que aproveitaram uma execução já em andamento", ["flight"]
+))
+
+
+class SingleFlight:
+    """
+    Chamadas simultâneas com a mesma chave compartilham uma única execução:
+    a primeira executa `fn`, as demais esperam e recebem o mesmo resultado
+    (ou a mesma exceção).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, "SingleFlight._Call"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            COALESCED.inc(flight=self.name)
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class TokenBucket:
+    """Limite de taxa: `rate` fichas por segundo, acumulando até `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Bloqueia até haver `tokens` fichas; retorna quanto tempo esperou."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Erro de cota (429) ou falha temporária do Google (5xx)."""
+    from gspread.exceptions import APIError
+    if isinstance(error, APIError):
+        status = getattr(error.response, "status_code", None)
+        return status == 429 or (status is not None and status >= 500)
+    return False
+
+
+def _retry_after(error: BaseException) -> float:
+    """Espera pedida pelo servidor no cabeçalho Retry-After (segundos), se houver."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def backoff_delay(attempt: int, base: float = SHEETS_BACKOFF_BASE, maximum: float = SHEETS_BACKOFF_MAX) -> float:
+    """Backoff exponencial com jitter completo: uniforme em [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+SHEETS_BUCKET = TokenBucket(SHEETS_READS_PER_MINUTE / 60, SHEETS_BURST)
+
+
+def sheets_call(fn: Callable[..., T], *args, bucket: Optional[TokenBucket] = None,
+                retries: int = SHEETS_MAX_RETRIES, **kwargs) -> T:
+    """
+    Executa uma chamada à API do Sheets respeitando o limite de taxa e
+    repetindo com backoff exponencial (com jitter) em erros de cota e 5xx.
+    """
+    bucket = bucket or SHEETS_BUCKET
+    attempt = 0
+    while True:
+        bucket.acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e) or attempt >= retries:
+                SHEETS_CALLS.inc(result="error")
+                raise
+            delay = max(backoff_delay(attempt), _retry_after(e))
+            attempt += 1
+            SHEETS_CALLS.inc(result="retry")
+            logger.warning(f"Sheets: {e} — nova tentativa em {delay:.1f}s ({attempt}/{retries})")
+            time.sleep(delay)
+            continue
+        SHEETS_CALLS.inc(result="ok")
+        return result
@@ -1,4 +1,11 @@
 # xp_calculator.py
+from typing import Tuple
+
+import numpy as np
+
+_cumulative_table = np.zeros(1, dtype=np.int64)
+
+
 def cumulative_exp_closed(level: int) -> int:
     """Calcula XP acumulada até um nível usando fórmula fechada."""
     if level <= 1:
@@ -10,12 +17,58 @@ def cumulative_exp_closed(level: int) -> int:
 
 
 def find_level_for_exp(total_exp: int) -> int:
-    """Encontra o nível atual com base na XP total."""
-    low, high = 1, 2500
+    """Encontra o nível atual com base na XP total (sem teto de nível)."""
+    high = 2
+    while cumulative_exp_closed(high) <= total_exp:
+        high *= 2
+    low = 1
     while low < high:
         mid = (low + high + 1) // 2
         if cumulative_exp_closed(mid) <= total_exp:
             low = mid
         else:
             high = mid - 1
-    return low
\ No newline at end of file
+    return low
+
+
+def cumulative_exp_table(max_level: int) -> np.ndarray:
+    """
+    Tabela de XP acumulada: posição i = XP necessária para o nível i + 1.
+    A tabela é compartilhada e só cresce quando um nível maior é pedido.
+    """
+    global _cumulative_table
+    if len(_cumulative_table) < max_level:
+        size = max(max_level, 2 * len(_cumulative_table))
+        m = np.arange(size, dtype=np.int64)
+        _cumulative_table = 50 * (m * (m + 1) * (2 * m + 1) // 6) - 150 * (m * (m + 1) // 2) + 200 * m
+    return _cumulative_table[:max_level]
+
+
+def levels_for_exp(total_exp) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Versão vetorizada de `find_level_for_exp` para arrays/Series de XP.
+
+    Retorna (nível, progresso fracionário dentro do nível, XP até o próximo
+    nível). Entradas NaN resultam em NaN nas três saídas.
+    """
+    exp = np.asarray(total_exp, dtype=np.float64)
+    valid = ~np.isnan(exp)
+    max_exp = exp[valid].max() if valid.any() else 0.0
+
+    table = cumulative_exp_table(2)
+    while table[-1] <= max_exp:
+        table = cumulative_exp_table(2 * len(table))
+
+    levels = np.searchsorted(table, np.where(valid, exp, 0), side="right").clip(min=1)
+    start = table[levels - 1]
+    nxt = table[levels]
+    progress = (exp - start) / (nxt - start)
+    to_next = nxt - exp
+
+    if valid.all():
+        return levels, progress, to_next.astype(np.int64)
+    return (
+        np.where(valid, levels, np.nan),
+        np.where(valid, progress, np.nan),
+        np.where(valid, to_next, np.nan),
+    )